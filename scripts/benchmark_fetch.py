@@ -0,0 +1,119 @@
+# scripts/benchmark_fetch.py
+"""
+Offline benchmark for the OHLCV fetch layer.
+
+Runs full-matrix fetches against fake exchanges (no network) through the
+serial `fetch_and_store` path and the concurrent `fetch_all_async` path,
+and reports wall-clock, requests issued and bars/sec per scenario.
+
+    python -m scripts.benchmark_fetch --days 2 --latency 0.05 --json bench.json
+"""
+import json
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+from src.shared.constants import SYMBOLS, NATIVE_TIMEFRAMES
+from src.data_fetch.data_source import EXCHANGES_TO_TRY
+from src.data_fetch.exchange_pool import pool
+from src.data_fetch.exchange_health import ExchangeHealth, health
+from src.data_fetch.history_store import HistoryStore
+from src.data_fetch.async_fetcher import AsyncFetchEngine
+from src.data_fetch.fake_exchange import FakeExchange, AsyncFakeExchange
+from src.data_fetch.fetch_futures_data import fetch_and_store, fetch_all_async
+
+# Per-exchange fake settings layered on top of the common ones
+SCENARIOS = {
+    "healthy": {},
+    "primary-outage": {"bybit": {"outage": True}},
+    "rate-limited": {"bybit": {"rate_limit_every": 5}},
+}
+
+def _fakes(fake_class, overrides: dict, **common) -> dict:
+    return {name: fake_class(name=name, **{**common, **overrides.get(name, {})}) for name in EXCHANGES_TO_TRY}
+
+def _summary(mode: str, scenario: str, fakes: dict, wall: float) -> dict:
+    bars = sum(f.bars_served for f in fakes.values())
+    return {
+        "mode": mode,
+        "scenario": scenario,
+        "wall_seconds": round(wall, 3),
+        "requests": sum(f.requests for f in fakes.values()),
+        "errors": sum(f.errors for f in fakes.values()),
+        "bars": bars,
+        "bars_per_second": round(bars / wall, 1) if wall else 0.0,
+    }
+
+def run_serial(scenario: str, symbols: list[str], timeframes: list[str], **common) -> dict:
+    """Fetches the matrix one series at a time through the pooled sync clients."""
+    fakes = _fakes(FakeExchange, SCENARIOS[scenario], **common)
+    pool.clear()
+    health.reset()
+    for name, fake in fakes.items():
+        pool.register(name, fake)
+
+    with tempfile.TemporaryDirectory() as root:
+        history = HistoryStore(root=root)
+        started = time.perf_counter()
+        for symbol in symbols:
+            for tf in timeframes:
+                fetch_and_store(symbol, tf, history=history)
+        wall = time.perf_counter() - started
+
+    pool.clear()
+    health.reset()
+    return _summary("serial", scenario, fakes, wall)
+
+def run_async(scenario: str, symbols: list[str], timeframes: list[str], **common) -> dict:
+    """Fetches the matrix concurrently through AsyncFetchEngine."""
+    fakes = _fakes(AsyncFakeExchange, SCENARIOS[scenario], **common)
+    engine = AsyncFetchEngine(exchange_health=ExchangeHealth(path=None), exchange_factory=fakes.__getitem__)
+
+    with tempfile.TemporaryDirectory() as root:
+        started = time.perf_counter()
+        asyncio.run(fetch_all_async(symbols=symbols, timeframes=timeframes,
+                                    history=HistoryStore(root=root), engine=engine))
+        wall = time.perf_counter() - started
+
+    return _summary("async", scenario, fakes, wall)
+
+def run_benchmark(scenarios: list[str], modes: list[str], symbols: list[str], timeframes: list[str],
+                  **common) -> list[dict]:
+    runners = {"serial": run_serial, "async": run_async}
+    return [runners[mode](scenario, symbols, timeframes, **common) for scenario in scenarios for mode in modes]
+
+def print_report(rows: list[dict]):
+    header = f"{'scenario':<16}{'mode':<8}{'wall (s)':>10}{'requests':>10}{'errors':>8}{'bars':>10}{'bars/s':>12}"
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(f"{r['scenario']:<16}{r['mode']:<8}{r['wall_seconds']:>10.3f}{r['requests']:>10}"
+              f"{r['errors']:>8}{r['bars']:>10}{r['bars_per_second']:>12.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the OHLCV fetch layer against fake exchanges.")
+    parser.add_argument("--scenario", choices=list(SCENARIOS), action="append",
+                        help="Scenario to run (repeatable). Default: all.")
+    parser.add_argument("--mode", choices=["serial", "async"], action="append",
+                        help="Fetch path to run (repeatable). Default: both.")
+    parser.add_argument("--days", type=float, default=2, help="Days of history each fake exchange holds.")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds per fake request.")
+    parser.add_argument("--page-limit", type=int, default=1000, help="Most candles a fake returns per request.")
+    parser.add_argument("--symbols", nargs="+", default=SYMBOLS)
+    parser.add_argument("--timeframes", nargs="+", default=NATIVE_TIMEFRAMES)
+    parser.add_argument("--json", help="Also write the results to this JSON file.")
+    parser.add_argument("--verbose", action="store_true", help="Keep the fetchers' logging.")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+
+    rows = run_benchmark(
+        args.scenario or list(SCENARIOS), args.mode or ["serial", "async"], args.symbols, args.timeframes,
+        history_days=args.days, latency=args.latency, page_limit=args.page_limit,
+    )
+    print_report(rows)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=4)
@@ -1,14 +1,10 @@
 # src/models/train_predictor.py
-import os
 import json
 import logging
-import pandas as pd
 from src.utils.model import train_model
 from src.utils.indicators import compute_indicators
 from src.shared.constants import SYMBOLS, ALL_TIMEFRAMES
-
-# --- Configuration ---
-HISTORY_DATA_PATH = "/workspace/data/history"
+from src.data_fetch.history_store import store
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -17,13 +13,12 @@ def train_all():
 
     for symbol in SYMBOLS:
         for tf in ALL_TIMEFRAMES:
-            path = f"{HISTORY_DATA_PATH}/{symbol}USDT_{tf}.csv"
-            if not os.path.exists(path):
-                logging.warning(f"⛔ Data file not found: {path}")
+            if not store.exists(symbol, tf):
+                logging.warning(f"⛔ No stored history for {symbol}-{tf}")
                 continue
             
             try:
-                df = pd.read_csv(path)
+                df = store.read(symbol, tf)
                 if len(df) < 50:
                     logging.warning(f"⚠️ Insufficient data for {symbol}-{tf}")
                     continue
@@ -26,6 +26,8 @@ class Config:
     RSI_OVERBOUGHT = 70
     RSI_OVERSOLD = 30
     AMOUNT = 0.001
+    # Preload markets and the clock offset and retry orders within milliseconds
+    ORDER_FAST_PATH = os.getenv("ORDER_FAST_PATH", "false").lower() == "true"
 
     # Database
     DB_PATH = "trading_bot.db"
@@ -33,6 +35,17 @@ class Config:
     # Model
     MODEL_PATH = "model.pkl"
     BACKUP_MODEL_PATH = "backup_model.pkl" # Path to a backup model
+    # Per-pair models, named {COIN}USDT_{timeframe}_model.pkl; one strategy task runs per model found
+    MODELS_DIR = "models_data"
+    TRADE_TIMEFRAMES = ["5m", "15m", "30m", "1h"]
+    # Memory budget for loaded models, estimated by pickle size
+    MODEL_CACHE_BYTES = int(os.getenv("MODEL_CACHE_MB", "512")) * 1024 * 1024
+    # How often the running bot looks for retrained models to swap in
+    MODEL_WATCH_SECONDS = 60
+    # How long after a swap a model that fails on live data is rolled back; then its predecessor is released
+    MODEL_PROBATION_SECONDS = 4 * 3600
+    # 'stream': candles built from the live trade stream; 'poll': REST fetch at each candle close
+    CANDLE_SOURCE = os.getenv("CANDLE_SOURCE", "stream")
 
     # Logging
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
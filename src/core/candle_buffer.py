@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+from utils.indicators import StreamingIndicators, INDICATOR_COLUMNS
+
+OHLCV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+COLUMNS = OHLCV_COLUMNS + INDICATOR_COLUMNS
+
+class CandleBuffer:
+    """
+    The last `capacity` closed candles of one series, with indicators.
+
+    Rows live in one preallocated array twice the capacity; appending
+    writes the next row and, once the array is full, the newest
+    `capacity` rows are copied back to the front, so appends are O(1)
+    amortised. Indicators are updated from running state as each bar is
+    added, so they carry over the full history seen rather than being
+    recomputed over the window.
+    """
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data = np.empty((2 * capacity, len(COLUMNS)), dtype=float)
+        self._start = 0
+        self._end = 0
+        self._indicators = StreamingIndicators()
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    @property
+    def last_timestamp(self) -> int | None:
+        return int(self._data[self._end - 1, 0]) if len(self) else None
+
+    def clear(self):
+        self._start = self._end = 0
+        self._indicators = StreamingIndicators()
+
+    def append(self, ohlcv):
+        """Adds one closed [timestamp, open, high, low, close, volume] bar."""
+        if self._end == len(self._data):
+            keep = self.capacity - 1
+            self._data[:keep] = self._data[self._end - keep:self._end]
+            self._start, self._end = 0, keep
+        row = self._data[self._end]
+        row[:6] = ohlcv
+        row[6:] = self._indicators.update(float(ohlcv[4]))
+        self._end += 1
+        if len(self) > self.capacity:
+            self._start += 1
+
+    def extend(self, rows):
+        for ohlcv in rows:
+            self.append(ohlcv)
+
+    def frame(self) -> pd.DataFrame:
+        """The buffered candles and indicators, oldest first."""
+        df = pd.DataFrame(self._data[self._start:self._end].copy(), columns=COLUMNS)
+        df['timestamp'] = df['timestamp'].astype('int64')
+        return df
@@ -0,0 +1,76 @@
+import time
+import asyncio
+import ccxt
+from logger import logger
+
+# Seconds to wait after a candle's close for the exchange to finalise it
+SETTLE_SECONDS = 2.0
+# How often the exchange clock offset is re-measured
+CLOCK_SYNC_SECONDS = 3600
+
+class CandleCloseScheduler:
+    """
+    Wakes tasks at candle close plus a settle delay, on the exchange's clock.
+
+    Every wait is computed from the current (offset-corrected) time, so
+    slow cycles never push the cadence off the candle grid. Waiters whose
+    candles close at the same moment share one timer and one future: at
+    the top of the hour the 5m, 15m, 30m and 1h tasks wake together.
+    """
+    def __init__(self, settle_seconds: float = SETTLE_SECONDS, clock=time.time):
+        self.settle_ms = int(settle_seconds * 1000)
+        self.clock = clock
+        # Exchange time minus local time, in ms
+        self.offset_ms = 0
+        self._waiters: dict[int, asyncio.Future] = {}
+
+    def now_ms(self) -> int:
+        return int(self.clock() * 1000) + self.offset_ms
+
+    async def sync_clock(self, exchange):
+        """Measures the exchange clock offset, correcting for half the round trip."""
+        sent = self.clock()
+        server_ms = await exchange.fetch_time()
+        received = self.clock()
+        offset_ms = int(server_ms - (sent + received) / 2 * 1000)
+        if abs(offset_ms - self.offset_ms) > 100:
+            logger.info(f"Exchange clock offset is now {offset_ms}ms (was {self.offset_ms}ms).")
+        self.offset_ms = offset_ms
+
+    async def clock_sync_loop(self, exchange, interval: float = CLOCK_SYNC_SECONDS):
+        """Re-measures the offset every `interval` seconds; await `sync_clock` once before the first wait."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.sync_clock(exchange)
+            except Exception as e:
+                logger.warning(f"Exchange clock sync failed: {e}")
+
+    def next_close_ms(self, timeframe: str) -> int:
+        step = ccxt.Exchange.parse_timeframe(timeframe) * 1000
+        return (self.now_ms() - self.settle_ms) // step * step + step
+
+    async def wait_for_close(self, timeframe: str) -> int:
+        """Sleeps until the next `timeframe` candle has closed and settled; returns that candle's open time."""
+        step = ccxt.Exchange.parse_timeframe(timeframe) * 1000
+        boundary = self.next_close_ms(timeframe)
+        future = self._waiters.get(boundary)
+        if future is None:
+            future = self._waiters[boundary] = asyncio.get_running_loop().create_future()
+            self._schedule(boundary)
+        # Shielded so one cancelled waiter doesn't cancel the shared future
+        await asyncio.shield(future)
+        return boundary - step
+
+    def _schedule(self, boundary: int):
+        delay = (boundary + self.settle_ms - self.now_ms()) / 1000
+        asyncio.get_running_loop().call_later(max(delay, 0), self._fire, boundary)
+
+    def _fire(self, boundary: int):
+        # The offset may have moved since the timer was set; never wake early
+        if self.now_ms() < boundary + self.settle_ms:
+            self._schedule(boundary)
+            return
+        future = self._waiters.pop(boundary, None)
+        if future is not None and not future.done():
+            future.set_result(boundary)
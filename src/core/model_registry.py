@@ -0,0 +1,282 @@
+import os
+import re
+import json
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from logger import logger
+from config import config
+from core.model_validator import load_model
+
+PAIR_MODEL_PATTERN = re.compile(r"^(?P<coin>[A-Z0-9]+)USDT_(?P<timeframe>\w+)_model\.pkl$")
+# Older per-coin models, used for any timeframe without its own model
+LEGACY_MODEL_PATTERN = re.compile(r"^(?P<coin>[a-z0-9]+)_model\.pkl$")
+# Model files that failed validation or were rolled back, kept across restarts
+REJECTED_FILE = "rejected_models.json"
+
+class ModelRejectedError(FileNotFoundError):
+    """The only model file for a pair is a version that was rejected."""
+
+@dataclass
+class ModelEntry:
+    path: str
+    size: int
+    mtime: float
+    backup_path: str | None = None
+    # SHA-256 of the file, once the model watcher has read it
+    checksum: str | None = None
+
+class ModelRegistry:
+    """
+    Index of the models in `models_dir`, loaded on first use and kept in an
+    LRU cache.
+
+    Building the index only lists the directory; nothing is unpickled until
+    `get` asks for a model, and a cached model is returned as is. A model is
+    unpickled outside the registry lock, so cached models stay available
+    while another loads. When the cached models, plus the old versions kept
+    for rollback, exceed `memory_budget` bytes (estimated by pickle size),
+    rollback copies of other pairs go first, then the least recently used
+    models; size the budget to hold every traded pair so the signal path
+    never unpickles twice.
+
+    Once a model has been loaded, a later version of its file is only
+    used after `validator(key, entry)` accepts it, and a file version
+    that was rejected is never loaded; see ModelWatcher. Until then the
+    model from the old file stays cached whatever the budget. Rejections
+    are saved in `models_dir`, so they hold across restarts.
+    """
+    def __init__(self, models_dir: str = config.MODELS_DIR, memory_budget: int = config.MODEL_CACHE_BYTES):
+        self.models_dir = models_dir
+        self.memory_budget = memory_budget
+        self.index: dict[tuple[str, str | None], ModelEntry] = {}
+        # Models added with `register`, kept across refreshes
+        self._registered: dict[tuple[str, str | None], ModelEntry] = {}
+        # key -> (model, the file version it was loaded from), least recently used first
+        self._cache: OrderedDict[tuple[str, str | None], tuple[object, ModelEntry]] = OrderedDict()
+        # key -> the (model, entry) a swap replaced, for rollback
+        self._previous: dict[tuple[str, str | None], tuple[object, ModelEntry]] = {}
+        # key -> time.monotonic() of the swap its `_previous` model was replaced in
+        self._swapped_at: dict[tuple[str, str | None], float] = {}
+        # key -> the file version last loaded or swapped in
+        self._validated: dict[tuple[str, str | None], ModelEntry] = {}
+        # Called as validator(key, entry) -> model to load a changed file; set by ModelWatcher
+        self.validator = None
+        self.rejected: dict[tuple[str, str | None], tuple[float, int]] = self._load_rejected()
+        self._cached_bytes = 0
+        self._lock = threading.RLock()
+        # key -> lock held while that key's model is unpickled, so it is only loaded once
+        self._loading: dict[tuple[str, str | None], threading.Lock] = {}
+        self.hits = self.misses = self.evictions = 0
+        self.refresh()
+
+    def scan(self) -> dict[tuple[str, str | None], ModelEntry]:
+        """Lists the model files in `models_dir` without touching the index."""
+        found = {}
+        if os.path.isdir(self.models_dir):
+            for item in os.scandir(self.models_dir):
+                key = self._key(item.name)
+                if key is None:
+                    continue
+                stat = item.stat()
+                # Empty placeholders can't be unpickled
+                if stat.st_size:
+                    found[key] = ModelEntry(item.path, stat.st_size, stat.st_mtime)
+        return found
+
+    def refresh(self, found: dict | None = None):
+        """
+        Re-lists `models_dir`, or takes the listing `scan` returned. Models whose file is gone are dropped from the
+        cache; a cached model whose file changed stays in use until it is
+        swapped for the new version.
+        """
+        found = self.scan() if found is None else found
+        with self._lock:
+            self.index = found | self._registered
+            for key in [key for key in self._cache if key not in self.index]:
+                self._evict(key)
+
+    def _rejected_path(self) -> str:
+        return os.path.join(self.models_dir, REJECTED_FILE)
+
+    def _load_rejected(self) -> dict:
+        try:
+            with open(self._rejected_path()) as f:
+                return {self._key(name): (mtime, size) for name, (mtime, size) in json.load(f).items()
+                        if self._key(name) is not None}
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _file_name(key) -> str:
+        coin = key[0].split('/')[0]
+        return f"{coin}USDT_{key[1]}_model.pkl" if key[1] else f"{coin.lower()}_model.pkl"
+
+    def reject(self, key, entry: ModelEntry):
+        """Marks a file version as rejected, so it is never loaded."""
+        with self._lock:
+            self.rejected[key] = (entry.mtime, entry.size)
+            rejected = {self._file_name(k): list(v) for k, v in self.rejected.items()}
+        try:
+            os.makedirs(self.models_dir, exist_ok=True)
+            tmp_path = f"{self._rejected_path()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(rejected, f, indent=4)
+            os.replace(tmp_path, self._rejected_path())
+        except OSError as e:
+            logger.warning(f"Could not save rejected models: {e}")
+
+    def is_rejected(self, key, entry: ModelEntry) -> bool:
+        return self.rejected.get(key) == (entry.mtime, entry.size)
+
+    @staticmethod
+    def _key(name: str) -> tuple[str, str | None] | None:
+        match = PAIR_MODEL_PATTERN.match(name)
+        if match:
+            return f"{match['coin']}/USDT", match['timeframe']
+        match = LEGACY_MODEL_PATTERN.match(name)
+        if match:
+            return f"{match['coin'].upper()}/USDT", None
+        return None
+
+    def register(self, symbol: str, timeframe: str | None, path: str, backup_path: str | None = None):
+        """Adds a model outside `models_dir`, e.g. the configured default model."""
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        with self._lock:
+            self._registered[(symbol, timeframe)] = self.index[(symbol, timeframe)] = ModelEntry(path, size, 0.0, backup_path)
+
+    def pairs(self, timeframes: list[str] = config.TRADE_TIMEFRAMES) -> list[tuple[str, str]]:
+        """The (symbol, timeframe) pairs with their own model in one of `timeframes`."""
+        return sorted(key for key in self.index if key[1] in timeframes)
+
+    def lookup(self, symbol: str, timeframe: str) -> tuple[str, str | None] | None:
+        """The index key serving (symbol, timeframe): its own model, else the symbol's legacy model."""
+        for key in ((symbol, timeframe), (symbol, None)):
+            if key in self.index:
+                return key
+        return None
+
+    def get(self, symbol: str, timeframe: str):
+        """Returns the model for (symbol, timeframe), unpickling it on first use."""
+        key = self.lookup(symbol, timeframe)
+        if key is None:
+            raise FileNotFoundError(f"No model for {symbol} {timeframe} in {self.models_dir}.")
+        with self._lock:
+            cached = self._cached(key)
+            if cached is not None:
+                return cached
+            loading = self._loading.setdefault(key, threading.Lock())
+        with loading:
+            with self._lock:
+                # Another thread may have loaded it while this one waited
+                cached = self._cached(key)
+                if cached is not None:
+                    return cached
+                self.misses += 1
+                entry = self.index[key]
+                if self.is_rejected(key, entry):
+                    raise ModelRejectedError(f"The {symbol} {timeframe} model at {entry.path} was rejected.")
+                validated = self._validated.get(key)
+                # Changed since it was last used: load it only through validation
+                validate = self.validator is not None and validated is not None \
+                    and (validated.mtime, validated.size) != (entry.mtime, entry.size)
+            model = self.validator(key, entry) if validate else load_model(entry.path, entry.backup_path)
+            with self._lock:
+                if key in self._cache:
+                    # Swapped in meanwhile; that version is newer
+                    return self._cached(key)
+                self._cache[key] = (model, entry)
+                self._validated[key] = entry
+                self._cached_bytes += entry.size
+                self._shrink(keep=key)
+                return model
+
+    def _cached(self, key):
+        cached = self._cache.get(key)
+        if cached is None:
+            return None
+        self._cache.move_to_end(key)
+        self.hits += 1
+        return cached[0]
+
+    def active(self, key) -> tuple[object, ModelEntry] | None:
+        """The loaded (model, entry) for an index key, or None if it isn't loaded."""
+        with self._lock:
+            return self._cache.get(key)
+
+    def swap(self, key, model, entry: ModelEntry):
+        """
+        Replaces a key's model in one step: a signal running concurrently
+        gets either the old model or the new one. The old version is kept
+        for `rollback`, and counts against the memory budget until dropped.
+        """
+        with self._lock:
+            previous = self._cache.get(key)
+            if previous is not None:
+                self._drop_previous(key)
+                self._previous[key] = previous
+                self._swapped_at[key] = time.monotonic()
+            self._cache[key] = (model, entry)
+            self._cache.move_to_end(key)
+            self._cached_bytes += entry.size
+            self.index[key] = entry
+            self._validated[key] = entry
+            self._shrink(keep=key)
+
+    def rollback(self, key) -> bool:
+        """Restores the model a swap replaced; False if there is none."""
+        with self._lock:
+            previous = self._previous.pop(key, None)
+            self._swapped_at.pop(key, None)
+            if previous is None:
+                return False
+            current = self._cache.pop(key, None)
+            if current is not None:
+                self._cached_bytes -= current[1].size
+            # Already counted while it was kept for rollback
+            self._cache[key] = previous
+            # The index keeps the file's current version, so the restored model is pinned in the cache
+            self._validated[key] = previous[1]
+            return True
+
+    def drop_previous(self, swapped_before: float) -> list[tuple]:
+        """Drops the rollback copies of swaps made before `swapped_before` (time.monotonic()); returns their keys."""
+        with self._lock:
+            expired = [key for key, swapped_at in self._swapped_at.items() if swapped_at < swapped_before]
+            for key in expired:
+                self._drop_previous(key)
+            return expired
+
+    def _drop_previous(self, key):
+        self._swapped_at.pop(key, None)
+        previous = self._previous.pop(key, None)
+        if previous is not None:
+            self._cached_bytes -= previous[1].size
+
+    def _evict(self, key):
+        _, entry = self._cache.pop(key)
+        self._cached_bytes -= entry.size
+        self._drop_previous(key)
+
+    def _shrink(self, keep):
+        for key in [key for key in self._previous if key != keep]:
+            if self._cached_bytes <= self.memory_budget:
+                return
+            logger.info(f"Model cache over budget; dropping the rollback copy of {key[0]} {key[1]}.")
+            self._drop_previous(key)
+        # A model whose file has since changed is the only validated copy, so it is never dropped
+        evictable = iter([key for key, (_, entry) in self._cache.items() if key != keep and key in self.index
+                          and (self.index[key].mtime, self.index[key].size) == (entry.mtime, entry.size)])
+        while self._cached_bytes > self.memory_budget:
+            oldest = next(evictable, None)
+            if oldest is None:
+                break
+            logger.info(f"Model cache over budget; dropping {oldest[0]} {oldest[1]}.")
+            self._evict(oldest)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {'indexed': len(self.index), 'cached': len(self._cache), 'rollback_copies': len(self._previous),
+                'cached_bytes': self._cached_bytes,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
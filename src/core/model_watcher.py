@@ -0,0 +1,180 @@
+import math
+import time
+import pickle
+import asyncio
+import hashlib
+import numpy as np
+from logger import logger
+from config import config
+from core.model_registry import ModelRegistry, ModelEntry, ModelRejectedError
+
+class ModelValidationError(Exception):
+    """A new model artifact failed validation and was not swapped in."""
+
+class ModelValidationDeferred(Exception):
+    """The live input the canary needs is incomplete; the artifact is validated again on the next check."""
+
+def file_checksum(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+class ModelWatcher:
+    """
+    Swaps retrained models into a running ModelRegistry.
+
+    Every `check` compares the files in the registry's directory with the
+    versions the loaded models came from. A changed file is read once and
+    validated before it is used:
+
+    1. Checksum: if the trainer left a `{model}.sha256` file next to it,
+       the bytes must match it; identical bytes are not reloaded.
+    2. Load test: the bytes must unpickle to an object with `predict`.
+    3. Canary: if `canary(symbol, timeframe, model)` returns the live
+       input for the new model, it must give one finite prediction for
+       it; without one, its input width must match the current model's.
+       If the live data lacks a feature the model needs (raising
+       KeyError), a swap waits for the next check.
+
+    A model that passes is swapped in atomically and the old one kept for
+    `rollback` during `probation` seconds; a model that fails, or is
+    rolled back, is rejected in the registry and not retried until its
+    file changes again. A model that isn't loaded goes through the same
+    checks when the registry next loads it, if its file changed since it
+    was last used.
+    """
+    def __init__(self, registry: ModelRegistry, canary=None, probation: float = config.MODEL_PROBATION_SECONDS):
+        self.registry = registry
+        self.canary = canary
+        self.probation = probation
+        self.swaps = self.failures = self.rollbacks = 0
+        registry.validator = self._load_validated
+
+    @property
+    def rejected(self) -> dict[tuple, tuple[float, int]]:
+        """key -> (mtime, size) of artifacts that failed or were rolled back."""
+        return self.registry.rejected
+
+    def check(self) -> list[tuple]:
+        """Validates and swaps in every changed model; returns the keys swapped."""
+        swapped = []
+        self._end_probation()
+        found = self.registry.scan()
+        self.registry.refresh(found)
+        for key, entry in found.items():
+            active = self.registry.active(key)
+            if active is None or (active[1].mtime, active[1].size) == (entry.mtime, entry.size):
+                continue
+            if self.registry.is_rejected(key, entry):
+                continue
+            try:
+                model = self.validate(key, entry, active)
+            except ModelValidationDeferred as e:
+                logger.info(f"Not swapping in the new {key[0]} {key[1]} model yet: {e}")
+                continue
+            except ModelValidationError as e:
+                logger.error(f"Keeping the current {key[0]} {key[1]} model: {e}")
+                self.registry.reject(key, entry)
+                self.failures += 1
+                continue
+            if model is None:
+                continue
+            self.registry.swap(key, model, entry)
+            self.swaps += 1
+            swapped.append(key)
+            logger.info(f"Swapped in the new {key[0]} {key[1]} model from {entry.path}.")
+        return swapped
+
+    def _load_validated(self, key, entry: ModelEntry):
+        """The registry's validator: loads a changed file that isn't cached, or rejects it."""
+        try:
+            model = self.validate(key, entry, None)
+        except ModelValidationError as e:
+            logger.error(f"Not loading the {key[0]} {key[1]} model: {e}")
+            self.registry.reject(key, entry)
+            self.failures += 1
+            raise ModelRejectedError(f"The {key[0]} {key[1]} model at {entry.path} was rejected: {e}") from e
+        logger.info(f"Loaded the new {key[0]} {key[1]} model from {entry.path}.")
+        return model
+
+    def validate(self, key, entry: ModelEntry, active: tuple[object, ModelEntry] | None):
+        """Returns the new model, or None if the file's content hasn't changed from `active`'s."""
+        try:
+            with open(entry.path, 'rb') as f:
+                data = f.read()
+        except OSError as e:
+            raise ModelValidationError(f"cannot read {entry.path}: {e}") from e
+
+        checksum = file_checksum(data)
+        expected = self._expected_checksum(entry.path)
+        if expected is not None and expected != checksum:
+            raise ModelValidationError(f"checksum mismatch for {entry.path} (still being written?)")
+        if active is not None and active[1].checksum == checksum:
+            # Rewritten with identical content
+            active[1].mtime, active[1].size = entry.mtime, entry.size
+            return None
+        entry.checksum = checksum
+
+        try:
+            model = pickle.loads(data)
+        except Exception as e:
+            raise ModelValidationError(f"{entry.path} does not unpickle: {e}") from e
+        if not callable(getattr(model, 'predict', None)):
+            raise ModelValidationError(f"{entry.path} holds a {type(model).__name__}, which has no predict()")
+
+        self._check_schema(key, model, active[0] if active is not None else None)
+        return model
+
+    @staticmethod
+    def _expected_checksum(path: str) -> str | None:
+        try:
+            with open(f"{path}.sha256") as f:
+                return f.read().split()[0].strip().lower()
+        except (OSError, IndexError):
+            return None
+
+    def _check_schema(self, key, model, current):
+        try:
+            features = self.canary(*key, model) if self.canary else None
+        except KeyError as e:
+            if current is not None:
+                raise ModelValidationDeferred(f"live data lacks the feature {e} the model was trained on") from e
+            # Nothing to keep using instead: fall back to the width check
+            features = None
+        if features is None:
+            width, current_width = getattr(model, 'n_features_in_', None), getattr(current, 'n_features_in_', None)
+            if width is not None and current_width is not None and width != current_width:
+                raise ModelValidationError(f"new model takes {width} features, the current one {current_width}")
+            return
+        try:
+            prediction = np.asarray(model.predict(features)).ravel()
+        except Exception as e:
+            raise ModelValidationError(f"canary prediction failed: {e}") from e
+        if prediction.shape != (1,) or not math.isfinite(float(prediction[0])):
+            raise ModelValidationError(f"canary prediction {prediction!r} is not one finite value")
+
+    def _end_probation(self):
+        for key in self.registry.drop_previous(time.monotonic() - self.probation):
+            logger.info(f"The {key[0]} {key[1]} model passed probation; released the model it replaced.")
+
+    def rollback(self, key) -> bool:
+        """
+        Puts back the model the last swap for `key` replaced, and rejects
+        the swapped-in version; False once that swap is past probation.
+        """
+        self._end_probation()
+        active = self.registry.active(key)
+        if not self.registry.rollback(key):
+            return False
+        if active is not None:
+            self.registry.reject(key, active[1])
+        self.rollbacks += 1
+        logger.warning(f"Rolled back the {key[0]} {key[1]} model to {self.registry.active(key)[1].path}.")
+        return True
+
+    async def watch_loop(self, interval: float = config.MODEL_WATCH_SECONDS):
+        """Checks for new models every `interval` seconds, reading and unpickling off the event loop."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.check)
+            except Exception as e:
+                logger.error(f"Model watcher check failed: {e}", exc_info=True)
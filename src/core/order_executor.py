@@ -1,5 +1,10 @@
+import time
+import uuid
+import asyncio
+import hashlib
+from collections import deque
 import ccxt.async_support as ccxt
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from tenacity import AsyncRetrying, retry, stop_after_attempt, wait_exponential, wait_random, retry_if_exception_type
 from logger import logger
 
 # Define what exceptions should trigger a retry
@@ -8,24 +13,79 @@ RETRYABLE_EXCEPTIONS = (
     ccxt.ExchangeError,
     ccxt.RequestTimeout,
 )
+# How often the fast path pings the exchange to keep the connection open and the clock offset fresh
+KEEP_WARM_SECONDS = 30
+# Order timing records kept in memory
+ORDER_TIMINGS_KEPT = 1000
+# Most orders the exchange accepts in one batch request
+BATCH_ORDER_LIMIT = 5
+# Binance accepts client order IDs of up to 36 characters from [.A-Z:/a-z0-9_-]
+CLIENT_ORDER_ID_PREFIX = "hodl-"
+
+def make_client_order_id(*parts) -> str:
+    """
+    A client order ID derived from `parts`, e.g. (symbol, timeframe, side,
+    candle time): the same decision always maps to the same ID, so the
+    exchange can tell a resubmission from a new order.
+    """
+    if not parts:
+        parts = (uuid.uuid4().hex,)
+    digest = hashlib.sha256(":".join(map(str, parts)).encode()).hexdigest()
+    return CLIENT_ORDER_ID_PREFIX + digest[:36 - len(CLIENT_ORDER_ID_PREFIX)]
+
+_slow_wait = wait_exponential(multiplier=1, min=4, max=10)
+# Network blips clear in well under a second; 50ms, 100ms, ... capped at 500ms, plus up to 50ms jitter
+_fast_wait = wait_exponential(multiplier=0.05, max=0.5) + wait_random(0, 0.05)
+
+def _retry_wait(retry_state) -> float:
+    """Waits briefly with jitter for a fast-path executor, seconds otherwise."""
+    executor = retry_state.args[0] if retry_state.args else None
+    return (_fast_wait if getattr(executor, 'fast_path', False) else _slow_wait)(retry_state)
 
 class OrderExecutor:
     """
     Handles all exchange interactions, such as placing orders and fetching data.
     Includes robust retry logic for network-related issues.
+
+    With `fast_path`, `warm_up` loads markets and the exchange clock offset
+    before the first order and `keep_warm_loop` keeps the connection open,
+    so an order is a single request; retries wait tens of milliseconds
+    instead of seconds. Every order's timing is kept in `order_timings`.
     """
-    def __init__(self, api_key, api_secret):
-        self.exchange = ccxt.binance({
+    def __init__(self, api_key, api_secret, fast_path: bool = False, exchange=None):
+        self.fast_path = fast_path
+        # `exchange` replaces Binance, e.g. with a PaperExchange
+        self.exchange = exchange or ccxt.binance({
             'apiKey': api_key,
             'secret': api_secret,
             'options': {
                 'defaultType': 'spot',
             },
         })
+        self.order_timings: deque[dict] = deque(maxlen=ORDER_TIMINGS_KEPT)
+
+    async def warm_up(self):
+        """Loads markets and precision and measures the exchange clock offset."""
+        started = time.perf_counter()
+        await self.exchange.load_markets()
+        # Signed requests are then stamped with exchange time, avoiding -1021 timestamp rejections
+        await self.exchange.load_time_difference()
+        self.exchange.options['adjustForTimeDifference'] = True
+        logger.info(f"Order path warmed up in {(time.perf_counter() - started) * 1000:.0f}ms "
+                    f"({len(self.exchange.markets)} markets, clock offset {self.exchange.options.get('timeDifference', 0)}ms).")
+
+    async def keep_warm_loop(self, interval: float = KEEP_WARM_SECONDS):
+        """Re-syncs the clock offset periodically, which also keeps the HTTP connection alive."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.exchange.load_time_difference()
+            except Exception as e:
+                logger.warning(f"Keep-warm request failed: {e}")
 
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
+        wait=_retry_wait,
         retry=retry_if_exception_type(RETRYABLE_EXCEPTIONS),
         before_sleep=lambda retry_state: logger.warning(f"Retrying API call due to {retry_state.outcome.exception()}. Attempt #{retry_state.attempt_number}")
     )
@@ -35,23 +95,135 @@ class OrderExecutor:
         balance = await self.exchange.fetch_balance()
         return balance[currency]['free']
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
-        retry=retry_if_exception_type(RETRYABLE_EXCEPTIONS)
-    )
-    async def create_order(self, symbol, order_type, side, amount):
-        """Creates an order with retry logic."""
+    async def create_order(self, symbol, order_type, side, amount, price=None, client_order_id=None):
+        """
+        Creates an order with retry logic. The order carries
+        `client_order_id` (a random one if not given) on every attempt, and
+        a retry first looks the order up by that ID, so an attempt that
+        reached the exchange before failing is not placed twice.
+        """
+        client_order_id = client_order_id or make_client_order_id()
+        return await self._submit_order(symbol, order_type, side, amount, price, client_order_id)
+
+    async def create_orders(self, orders: list[dict]) -> list:
+        """
+        Places many orders at once. Each dict has symbol, type, side and
+        amount, and optionally price and client_order_id. Orders on markets
+        the exchange can batch go out in batch requests, the rest as
+        concurrent single requests. Returns the orders in input order, with
+        the exception in place of any order that failed.
+        """
+        orders = [dict(order, client_order_id=order.get('client_order_id') or make_client_order_id()) for order in orders]
+        batchable = [order for order in orders if self._batchable(order['symbol'])]
+        single = [order for order in orders if not self._batchable(order['symbol'])]
+        logger.info(f"Submitting {len(orders)} orders ({len(batchable)} batched)...")
+
+        batches = [batchable[i:i + BATCH_ORDER_LIMIT] for i in range(0, len(batchable), BATCH_ORDER_LIMIT)]
+        results = await asyncio.gather(
+            *(self._submit_batch(batch) for batch in batches),
+            *(self.create_order(o['symbol'], o['type'], o['side'], o['amount'], o.get('price'), o['client_order_id'])
+              for o in single),
+            return_exceptions=True,
+        )
+        by_id = {}
+        for batch, batch_result in zip(batches, results[:len(batches)]):
+            by_id.update(zip((order['client_order_id'] for order in batch), batch_result))
+        by_id.update(zip((order['client_order_id'] for order in single), results[len(batches):]))
+        return [by_id[order['client_order_id']] for order in orders]
+
+    def _batchable(self, symbol) -> bool:
+        # Binance only has batch order endpoints for derivatives
+        if not self.exchange.has.get('createOrders') or not self.exchange.markets:
+            return False
+        market = self.exchange.markets.get(symbol)
+        return market is not None and not market.get('spot', True)
+
+    async def _submit_batch(self, batch: list[dict]) -> list:
+        """Sends one batch request, falling back to single reconciled orders if it fails."""
+        try:
+            return await self.exchange.create_orders([{
+                'symbol': o['symbol'], 'type': o['type'], 'side': o['side'], 'amount': o['amount'],
+                'price': o.get('price'), 'params': {'clientOrderId': o['client_order_id']},
+            } for o in batch])
+        except Exception as e:
+            logger.warning(f"Batch order request failed ({e}); submitting {len(batch)} orders singly.")
+            return await asyncio.gather(*(self._resubmit(o) for o in batch), return_exceptions=True)
+
+    async def _resubmit(self, order: dict):
+        """Places one order of a failed batch, unless the batch request placed it before failing."""
+        placed = await self.find_order(order['symbol'], order['client_order_id'])
+        if placed is not None:
+            logger.info(f"Order {order['client_order_id']} was already placed: {placed['id']}")
+            return placed
+        return await self.create_order(order['symbol'], order['type'], order['side'], order['amount'],
+                                       order.get('price'), order['client_order_id'])
+
+    async def find_order(self, symbol, client_order_id):
+        """Returns the order with `client_order_id`, or None if the exchange has no such order."""
+        try:
+            return await self.exchange.fetch_order(None, symbol, {'clientOrderId': client_order_id})
+        except ccxt.OrderNotFound:
+            return None
+
+    async def _submit_order(self, symbol, order_type, side, amount, price, client_order_id):
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(3),
+            wait=_fast_wait if self.fast_path else _slow_wait,
+            retry=retry_if_exception_type(RETRYABLE_EXCEPTIONS),
+        )
+        async for attempt in retrying:
+            with attempt:
+                if attempt.retry_state.attempt_number > 1:
+                    # The failed attempt may have reached the exchange anyway
+                    order = await self.find_order(symbol, client_order_id)
+                    if order is not None:
+                        logger.info(f"Order {client_order_id} was already placed: {order['id']}")
+                        return order
+                return await self._send_order(symbol, order_type, side, amount, price, client_order_id)
+
+    async def _send_order(self, symbol, order_type, side, amount, price, client_order_id):
         logger.info(f"Creating {side} {order_type} order for {amount} {symbol}...")
+        if self.fast_path and self.exchange.markets:
+            amount = float(self.exchange.amount_to_precision(symbol, amount))
+        submit_ms = time.time() * 1000
+        started = time.perf_counter()
         try:
-            order = await self.exchange.create_order(symbol, order_type, side, amount)
+            order = await self.exchange.create_order(symbol, order_type, side, amount, price,
+                                                     {'clientOrderId': client_order_id})
+            ack_ms = (time.perf_counter() - started) * 1000
             logger.info(f"Successfully placed order: {order['id']}")
+            self.record_timing(symbol, side, order_type, submit_ms, ack_ms, order)
             return order
         except Exception as e:
-            logger.error(f"Failed to create order: {e}")
+            logger.error(f"Failed to create order after {(time.perf_counter() - started) * 1000:.0f}ms: {e}")
             raise # Re-raise the exception to allow tenacity to handle retries
 
+    def record_timing(self, symbol, side, order_type, submit_ms: float, ack_ms: float, order: dict) -> dict:
+        """
+        Stores the timing of one order: when it was submitted (local epoch
+        ms), how long the exchange took to acknowledge it, and how long
+        after submission it was filled by the exchange's clock, if known.
+        """
+        offset_ms = self.exchange.options.get('timeDifference', 0) if self.fast_path else 0
+        fill_ms = None
+        if order.get('status') == 'closed':
+            filled_at = order.get('lastTradeTimestamp') or order.get('timestamp')
+            if filled_at:
+                fill_ms = round(filled_at + offset_ms - submit_ms, 1)
+        timing = {
+            'order_id': order.get('id'),
+            'symbol': symbol,
+            'side': side,
+            'type': order_type,
+            'submit_ms': int(submit_ms),
+            'ack_ms': round(ack_ms, 1),
+            'fill_ms': fill_ms,
+        }
+        self.order_timings.append(timing)
+        logger.info(f"Order {timing['order_id']} timing: ack {timing['ack_ms']}ms, fill {fill_ms}ms")
+        return timing
+
     async def close_connection(self):
         """Closes the exchange connection."""
         await self.exchange.close()
-        logger.info("Exchange connection closed.")
\ No newline at end of file
+        logger.info("Exchange connection closed.")
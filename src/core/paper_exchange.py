@@ -0,0 +1,286 @@
+import time
+import random
+import asyncio
+import itertools
+import numpy as np
+import ccxt
+from logger import logger
+from data_fetch.order_book_state import OrderBookState
+
+# Defaults for the simulated fills
+PAPER_LATENCY_SECONDS = 0.0
+PAPER_SLIPPAGE_BPS = 2.0
+PAPER_FEE_RATE = 0.001
+PAPER_BALANCES = {'USDT': 10_000.0}
+AMOUNT_PRECISION = 1e-6
+
+class _BookReplay:
+    """Applies recorded tick messages to a book as the simulated clock passes them."""
+    def __init__(self, messages):
+        self.book = OrderBookState()
+        self._messages = iter(messages)
+        self._pending = next(self._messages, None)
+
+    def at(self, now_ms: int) -> OrderBookState:
+        while self._pending is not None and self._pending[1] <= now_ms:
+            message = self._pending
+            if message[0] == 's':
+                self.book.apply_snapshot(message[2], message[3])
+            elif message[0] == 'd':
+                for price, size in message[2]:
+                    self.book.apply_delta('bids', price, size)
+                for price, size in message[3]:
+                    self.book.apply_delta('asks', price, size)
+            self._pending = next(self._messages, None)
+        return self.book
+
+class PaperExchange:
+    """
+    Offline stand-in for the async ccxt exchange behind OrderExecutor, for
+    running TradeLoop end to end without an account or network.
+
+    It serves `fetch_ohlcv` from the candles it is given and fills orders
+    against them, or against order books rebuilt from tick recordings
+    where a symbol has one. Market time is `now_ms`: it follows the wall
+    clock unless `set_time` pins it, so a driver can step a replay
+    through history bar by bar.
+
+    - `candles`: {(symbol, timeframe): [[timestamp, open, high, low, close, volume], ...]}.
+    - `books`: {symbol: tick messages}, e.g. TickReader().messages('BTC').
+    - `latency`: seconds each request takes, plus up to `jitter` more.
+    - `slippage_bps`: adverse price move applied to every fill.
+    - `fee_rate`: taker fee charged in the quote currency.
+
+    A resting limit order moves its cost and fee (buys) or its amount
+    (sells) from `free` to `used` until it fills, so open orders can't
+    spend the same funds twice.
+    """
+    def __init__(self, candles: dict | None = None, books: dict | None = None,
+                 balances: dict | None = None, latency: float = PAPER_LATENCY_SECONDS,
+                 jitter: float = 0.0, slippage_bps: float = PAPER_SLIPPAGE_BPS,
+                 fee_rate: float = PAPER_FEE_RATE):
+        self.id = 'paper'
+        self.latency = latency
+        self.jitter = jitter
+        self.slippage_bps = slippage_bps
+        self.fee_rate = fee_rate
+        self.balances = {currency: {'free': float(amount), 'used': 0.0}
+                         for currency, amount in (balances if balances is not None else PAPER_BALANCES).items()}
+        self.has = {'fetchOHLCV': True, 'createOrders': False, 'fetchOrder': True}
+        self.options = {}
+        self.markets = {}
+        self.orders: dict[str, dict] = {}
+        self._by_client_id: dict[str, dict] = {}
+        # order id -> (currency, amount) held in `used` while the order rests
+        self._reserved: dict[str, tuple[str, float]] = {}
+        self._order_ids = itertools.count(1)
+        self._pinned_ms = None
+
+        self._candles = {}
+        # Each symbol's candle series, shortest timeframe first, for pricing fills
+        self._series_by_symbol: dict[str, list[tuple[int, np.ndarray]]] = {}
+        for (symbol, timeframe), rows in (candles or {}).items():
+            rows = self._candles[(symbol, timeframe)] = np.asarray(rows, dtype=float).reshape(-1, 6)
+            self._series_by_symbol.setdefault(symbol, []).append((self.parse_timeframe(timeframe) * 1000, rows))
+            self.markets.setdefault(symbol, self._market(symbol))
+        for series in self._series_by_symbol.values():
+            series.sort(key=lambda item: item[0])
+        self._books = {symbol: _BookReplay(messages) for symbol, messages in (books or {}).items()}
+        for symbol in self._books:
+            self.markets.setdefault(symbol, self._market(symbol))
+
+    @staticmethod
+    def _market(symbol: str) -> dict:
+        base, quote = symbol.split(':')[0].split('/')
+        return {'symbol': symbol, 'base': base, 'quote': quote, 'spot': True,
+                'precision': {'amount': AMOUNT_PRECISION}}
+
+    def now_ms(self) -> int:
+        return self._pinned_ms if self._pinned_ms is not None else int(time.time() * 1000)
+
+    def set_time(self, now_ms: int | None):
+        """Pins market time to `now_ms` (None follows the wall clock again) and fills resting orders."""
+        self._pinned_ms = now_ms
+        self._match_open_orders()
+
+    async def _request(self):
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+
+    async def load_markets(self, reload: bool = False):
+        await self._request()
+        return self.markets
+
+    async def load_time_difference(self, params=None):
+        await self._request()
+        self.options['timeDifference'] = 0
+        return 0
+
+    async def fetch_time(self, params=None):
+        await self._request()
+        return self.now_ms()
+
+    def parse_timeframe(self, timeframe: str) -> int:
+        return ccxt.Exchange.parse_timeframe(timeframe)
+
+    def amount_to_precision(self, symbol: str, amount: float) -> str:
+        step = self.markets[symbol]['precision']['amount']
+        return f"{int(amount / step + 1e-9) * step:.10g}"
+
+    async def fetch_ohlcv(self, symbol: str, timeframe: str = '1m', since: int | None = None,
+                          limit: int | None = None, params=None) -> list:
+        """Candles opened by market time, including the one still forming, like a live exchange."""
+        await self._request()
+        rows = self._candles.get((symbol, timeframe))
+        if rows is None:
+            raise ccxt.BadSymbol(f"paper exchange has no {symbol} {timeframe} candles")
+        end = np.searchsorted(rows[:, 0], self.now_ms(), side='right')
+        if since is not None:
+            start = np.searchsorted(rows[:, 0], since, side='left')
+            end = min(end, start + (limit or end))
+        else:
+            start = max(end - (limit or end), 0)
+        return [[int(row[0]), *row[1:]] for row in rows[start:end].tolist()]
+
+    async def fetch_balance(self, params=None) -> dict:
+        await self._request()
+        per_currency = {currency: {**b, 'total': b['free'] + b['used']} for currency, b in self.balances.items()}
+        totals = {key: {currency: b[key] for currency, b in per_currency.items()} for key in ('free', 'used', 'total')}
+        return per_currency | totals
+
+    def _reference_price(self, symbol: str) -> float | None:
+        """The last traded price by market time: the close of the latest candle of the shortest timeframe."""
+        now_ms = self.now_ms()
+        for step, rows in self._series_by_symbol.get(symbol, ()):
+            index = np.searchsorted(rows[:, 0], now_ms - step, side='right') - 1
+            if index >= 0:
+                return float(rows[index, 4])
+        return None
+
+    def _fill_price(self, symbol: str, side: str, amount: float) -> float | None:
+        """Average price for taking `amount`: walks the recorded book if there is one, else the last price."""
+        price = None
+        replay = self._books.get(symbol)
+        if replay is not None:
+            book = replay.at(self.now_ms())
+            levels = (book.asks if side == 'buy' else book.bids).levels()
+            remaining, cost = amount, 0.0
+            for level_price, size in levels:
+                taken = min(size, remaining)
+                cost += taken * level_price
+                remaining -= taken
+                if remaining <= 0:
+                    break
+            if levels:
+                # Whatever the book can't absorb fills at its worst level
+                price = (cost + max(remaining, 0) * levels[-1][0]) / amount
+        if price is None:
+            price = self._reference_price(symbol)
+        if price is None:
+            return None
+        slippage = self.slippage_bps / 10_000
+        return price * (1 + slippage if side == 'buy' else 1 - slippage)
+
+    def _settle(self, order: dict, price: float):
+        market = self.markets[order['symbol']]
+        cost = price * order['amount']
+        fee = cost * self.fee_rate
+        quote = self.balances.setdefault(market['quote'], {'free': 0.0, 'used': 0.0})
+        base = self.balances.setdefault(market['base'], {'free': 0.0, 'used': 0.0})
+        if order['side'] == 'buy':
+            if quote['free'] < cost + fee:
+                raise ccxt.InsufficientFunds(f"paper account has {quote['free']} {market['quote']}, needs {cost + fee}")
+            quote['free'] -= cost + fee
+            base['free'] += order['amount']
+        else:
+            if base['free'] < order['amount']:
+                raise ccxt.InsufficientFunds(f"paper account has {base['free']} {market['base']}, needs {order['amount']}")
+            base['free'] -= order['amount']
+            quote['free'] += cost - fee
+        order.update({
+            'status': 'closed', 'average': price, 'filled': order['amount'], 'remaining': 0.0,
+            'cost': cost, 'fee': {'cost': fee, 'currency': market['quote']},
+            'lastTradeTimestamp': int(time.time() * 1000),
+        })
+        if order['price'] is None:
+            order['price'] = price
+
+    def _reserve(self, order: dict):
+        """Moves a resting order's funds from free to used, or refuses the order."""
+        market = self.markets[order['symbol']]
+        if order['side'] == 'buy':
+            currency, amount = market['quote'], order['price'] * order['amount'] * (1 + self.fee_rate)
+        else:
+            currency, amount = market['base'], order['amount']
+        balance = self.balances.setdefault(currency, {'free': 0.0, 'used': 0.0})
+        if balance['free'] < amount:
+            raise ccxt.InsufficientFunds(f"paper account has {balance['free']} {currency} free, needs {amount}")
+        balance['free'] -= amount
+        balance['used'] += amount
+        self._reserved[order['id']] = (currency, amount)
+
+    def _release(self, order: dict):
+        currency, amount = self._reserved.pop(order['id'], (None, 0.0))
+        if currency is not None:
+            self.balances[currency]['free'] += amount
+            self.balances[currency]['used'] -= amount
+
+    def _match_open_orders(self):
+        for order in self.orders.values():
+            if order['status'] != 'open':
+                continue
+            price = self._fill_price(order['symbol'], order['side'], order['amount'])
+            if price is None:
+                continue
+            if (order['side'] == 'buy' and price <= order['price']) or (order['side'] == 'sell' and price >= order['price']):
+                self._release(order)
+                try:
+                    self._settle(order, order['price'])
+                except ccxt.InsufficientFunds as e:
+                    logger.warning(f"Paper order {order['id']} cancelled: {e}")
+                    order['status'] = 'canceled'
+
+    async def create_order(self, symbol: str, type: str, side: str, amount: float,
+                           price: float | None = None, params=None) -> dict:
+        """Fills market orders at once; limit orders fill when market time reaches their price."""
+        await self._request()
+        params = params or {}
+        if symbol not in self.markets:
+            raise ccxt.BadSymbol(f"paper exchange has no market {symbol}")
+        client_order_id = params.get('clientOrderId')
+        if client_order_id is not None and client_order_id in self._by_client_id:
+            # Binance's answer to a reused newClientOrderId
+            raise ccxt.InvalidOrder("Duplicate order sent.")
+
+        order = {
+            'id': str(next(self._order_ids)), 'clientOrderId': client_order_id,
+            'timestamp': int(time.time() * 1000), 'symbol': symbol, 'type': type, 'side': side,
+            'price': price, 'average': None, 'amount': float(amount), 'filled': 0.0,
+            'remaining': float(amount), 'cost': 0.0, 'status': 'open', 'fee': None,
+            'lastTradeTimestamp': None, 'trades': [], 'info': {'market_ms': self.now_ms()},
+        }
+        fill_price = self._fill_price(symbol, side, order['amount'])
+        if type == 'market':
+            if fill_price is None:
+                raise ccxt.ExchangeError(f"paper exchange has no price for {symbol} at {self.now_ms()}")
+            self._settle(order, fill_price)
+        elif fill_price is not None and ((side == 'buy' and fill_price <= price) or (side == 'sell' and fill_price >= price)):
+            self._settle(order, price)
+        else:
+            self._reserve(order)
+
+        self.orders[order['id']] = order
+        if client_order_id is not None:
+            self._by_client_id[client_order_id] = order
+        return dict(order)
+
+    async def fetch_order(self, id: str | None, symbol: str | None = None, params=None) -> dict:
+        await self._request()
+        client_order_id = (params or {}).get('clientOrderId')
+        order = self._by_client_id.get(client_order_id) if client_order_id else self.orders.get(id)
+        if order is None:
+            raise ccxt.OrderNotFound(f"paper order {id or client_order_id} does not exist")
+        return dict(order)
+
+    async def close(self):
+        pass
@@ -1,3 +1,4 @@
+import math
 from logger import logger
 import pandas as pd
 
@@ -10,8 +11,29 @@ class SignalParser:
         if self.model is None:
             logger.error("SignalParser initialized without a valid model.")
             raise ValueError("Model cannot be None.")
+        # The exception from the last prediction the model itself failed (raised, or gave a non-finite
+        # value); None after a good one, or when the input was incomplete and no prediction was made
+        self.last_error = None
 
-    def generate_signal(self, market_data: pd.DataFrame):
+    @staticmethod
+    def features(market_data: pd.DataFrame, live_features: dict | None = None, model=None) -> pd.DataFrame:
+        """
+        The model input for the latest candle. A model that records its
+        training columns in `feature_names_in_` gets exactly those, in
+        order, and can use `live_features` (realtime values from the
+        feature bus) next to the candle columns; other models get the
+        candle columns only.
+        """
+        features = market_data.drop(columns=['close_time'], errors='ignore').iloc[-1:]
+        expected = getattr(model, 'feature_names_in_', None)
+        if expected is None:
+            return features
+        if live_features:
+            features = features.assign(**{name: value for name, value in live_features.items()
+                                          if name not in features.columns})
+        return features[list(expected)]
+
+    def generate_signal(self, market_data: pd.DataFrame, live_features: dict | None = None):
         """
         Analyzes market data and returns a signal ('buy', 'sell', or 'hold').
         This is a placeholder for your actual signal generation logic.
@@ -33,8 +55,17 @@ class SignalParser:
         # Example: Using the loaded model
         try:
             # Assume model expects the last row of features
-            features = market_data.drop(columns=['close_time']).iloc[-1:]
+            features = self.features(market_data, live_features, self.model)
+        except KeyError as e:
+            logger.warning(f"Model input lacks the feature {e}; holding.")
+            self.last_error = None
+            return 'hold'
+
+        try:
             prediction = self.model.predict(features)[0]
+            if not math.isfinite(float(prediction)):
+                raise ValueError(f"model predicted {prediction!r}")
+            self.last_error = None
 
             if prediction == 1:
                 logger.info("Signal: BUY")
@@ -47,4 +78,5 @@ class SignalParser:
                 return 'hold'
         except Exception as e:
             logger.error(f"Error during model prediction: {e}")
+            self.last_error = e
             return 'hold' # Default to holding if prediction fails
\ No newline at end of file
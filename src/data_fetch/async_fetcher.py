@@ -0,0 +1,200 @@
+# src/data_fetch/async_fetcher.py
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+import ccxt
+import ccxt.async_support as ccxt_async
+import pandas as pd
+from .data_source import EXCHANGES_TO_TRY, PAGE_LIMIT, supports_timeframe, ohlcv_to_dataframe
+from .exchange_pool import create_exchange
+from .exchange_health import ExchangeHealth, health
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of in-flight requests against a single exchange
+PER_EXCHANGE_CONCURRENCY = 4
+
+@dataclass
+class FetchResult:
+    """Outcome and timing of one (symbol, timeframe) fetch job."""
+    symbol: str
+    timeframe: str
+    exchange: str | None = None
+    data: pd.DataFrame | None = None
+    requests: int = 0
+    seconds: float = 0.0
+    error: str | None = None
+
+    @property
+    def rows(self) -> int:
+        return 0 if self.data is None else len(self.data)
+
+class CircuitOpenError(Exception):
+    """An exchange's circuit opened while a job was queued for its lane."""
+
+class RateLimiter:
+    """
+    Token bucket shared by every job talking to one exchange, so the
+    combined request rate stays inside the exchange's budget no matter how
+    many jobs are running.
+    """
+    def __init__(self, requests_per_second: float, burst: int = 1):
+        self.rate = requests_per_second
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class _ExchangeLane:
+    """An async exchange client plus the concurrency and rate budget around it."""
+    def __init__(self, exchange, max_concurrency: int, requests_per_second: float):
+        self.exchange = exchange
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.limiter = RateLimiter(requests_per_second, burst=max_concurrency)
+
+    async def fetch_ohlcv(self, symbol_pair: str, timeframe: str, since_ms: int, is_open=None):
+        """
+        Fetches one page once a slot and a token are free. `is_open` is
+        checked again at that point: jobs queued behind a failing exchange
+        give up as soon as its circuit opens instead of each timing out.
+        """
+        async with self.semaphore:
+            await self.limiter.acquire()
+            if is_open is not None and is_open():
+                raise CircuitOpenError(f"circuit opened for {symbol_pair}")
+            return await self.exchange.fetch_ohlcv(symbol_pair, timeframe, since_ms, limit=PAGE_LIMIT)
+
+class AsyncFetchEngine:
+    """
+    Fetches many (symbol, timeframe) series concurrently with ccxt's asyncio
+    clients. Each exchange gets one client, a bounded number of in-flight
+    requests and a token-bucket rate limit shared by all jobs.
+    """
+    def __init__(self, exchanges: list[str] | None = None,
+                 max_concurrency: int = PER_EXCHANGE_CONCURRENCY,
+                 requests_per_second: float | None = None,
+                 exchange_health: ExchangeHealth | None = None,
+                 exchange_factory=None):
+        self.exchanges = exchanges or EXCHANGES_TO_TRY
+        self.health = exchange_health or health
+        # Builds the async client for an exchange id; overridable for offline runs
+        self.exchange_factory = exchange_factory or (
+            lambda ex_name: create_exchange(ex_name, ccxt_async, enableRateLimit=False)
+        )
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        self._lanes: dict[str, _ExchangeLane] = {}
+
+    def _lane(self, ex_name: str) -> _ExchangeLane:
+        if ex_name not in self._lanes:
+            # The lane's limiter replaces ccxt's per-instance throttle
+            exchange = self.exchange_factory(ex_name)
+            rate = self.requests_per_second or 1000 / max(exchange.rateLimit, 1)
+            self._lanes[ex_name] = _ExchangeLane(exchange, self.max_concurrency, rate)
+        return self._lanes[ex_name]
+
+    async def _paginate(self, lane: _ExchangeLane, symbol_pair: str, timeframe: str,
+                        since_ms: int, until_ms: int, result: FetchResult, is_open=None) -> list:
+        """Async counterpart of data_source.paginate_ohlcv."""
+        timeframe_ms = ccxt.Exchange.parse_timeframe(timeframe) * 1000
+        rows = []
+        cursor = since_ms
+
+        while cursor < until_ms:
+            page = await lane.fetch_ohlcv(symbol_pair, timeframe, cursor, is_open)
+            result.requests += 1
+            page = [row for row in page or [] if row[0] >= cursor]
+            if not page:
+                break
+
+            rows.extend(page)
+            next_cursor = page[-1][0] + timeframe_ms
+            if next_cursor <= cursor:
+                break
+            cursor = next_cursor
+
+        return [row for row in rows if row[0] < until_ms]
+
+    async def fetch(self, symbol: str, timeframe: str, since_ms: int, until_ms: int) -> FetchResult:
+        """Fetches one series, falling back through the exchanges healthiest first."""
+        symbol_pair = f"{symbol}/USDT"
+        result = FetchResult(symbol, timeframe)
+        started = time.perf_counter()
+
+        # With every circuit open, rank falls back to trying them all anyway
+        any_closed = any(not self.health.is_open(ex_name, symbol) for ex_name in self.exchanges)
+
+        for ex_name in self.health.rank(self.exchanges, symbol):
+            is_open = (lambda ex_name=ex_name: self.health.is_open(ex_name, symbol)) if any_closed else None
+            try:
+                lane = self._lane(ex_name)
+                if not supports_timeframe(lane.exchange, ex_name, timeframe):
+                    continue
+
+                requests_before = result.requests
+                attempt_started = time.perf_counter()
+                data = await self._paginate(lane, symbol_pair, timeframe, since_ms, until_ms, result, is_open)
+                if not data:
+                    logger.warning(f"⚠️ {ex_name} returned no data for {symbol_pair}.")
+                    self.health.record_failure(ex_name, symbol, exchange_wide=False)
+                    continue
+
+                attempt_requests = max(result.requests - requests_before, 1)
+                self.health.record_success(ex_name, symbol, (time.perf_counter() - attempt_started) / attempt_requests)
+                result.exchange = ex_name
+                result.data = ohlcv_to_dataframe(data)
+                break
+
+            except CircuitOpenError:
+                logger.info(f"{ex_name} circuit opened while {symbol_pair} was queued; moving on.")
+                continue
+            except Exception as e:
+                logger.warning(f"⚠️ {ex_name} failed for {symbol_pair}: {e}")
+                self.health.record_failure(ex_name, symbol)
+                result.error = str(e)
+                continue
+        else:
+            logger.error(f"❌ All data sources failed for {symbol_pair} on {timeframe}")
+
+        if result.data is not None:
+            result.error = None
+        result.seconds = time.perf_counter() - started
+        return result
+
+    async def fetch_matrix(self, jobs: list[tuple[str, str, int, int]]) -> list[FetchResult]:
+        """
+        Runs every (symbol, timeframe, since_ms, until_ms) job concurrently and
+        returns the results in job order.
+        """
+        return await asyncio.gather(*(self.fetch(*job) for job in jobs))
+
+    async def close(self):
+        """Closes every exchange client opened by the engine."""
+        for lane in self._lanes.values():
+            await lane.exchange.close()
+        self._lanes.clear()
+
+def log_timing_report(results: list[FetchResult], wall_seconds: float):
+    """Logs per-job timing for a matrix fetch, slowest first, plus the totals."""
+    for r in sorted(results, key=lambda r: r.seconds, reverse=True):
+        status = f"{r.rows} rows from {r.exchange}" if r.exchange else f"failed ({r.error})"
+        logger.info(f"⏱️ {r.symbol} {r.timeframe}: {r.seconds:.2f}s, {r.requests} requests, {status}")
+
+    busy = sum(r.seconds for r in results)
+    logger.info(
+        f"⏱️ Fetched {len(results)} series in {wall_seconds:.2f}s wall-clock "
+        f"({busy:.2f}s of job time, {sum(r.requests for r in results)} requests, "
+        f"{sum(r.rows for r in results)} rows)."
+    )
@@ -0,0 +1,212 @@
+# src/data_fetch/candle_builder.py
+"""
+Live OHLCV candles built from the public trade stream.
+
+Trades are folded into 1m bars, and closed 1m bars are rolled up into the
+requested higher timeframes. A bar closes as soon as a trade for a later
+minute arrives. If the market goes quiet, it closes when the clock passes
+its end plus CLOSE_GRACE_MS. Minutes without trades become flat,
+zero-volume bars, as on the exchange, so rollups are always complete.
+Bars already in progress when the builder started are never emitted,
+since it only saw part of their trades.
+
+This module has no package-relative imports so the trade loop can use it
+with only `src` on the path.
+"""
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+import ccxt
+
+logger = logging.getLogger(__name__)
+
+BASE_TIMEFRAME = "1m"
+BASE_MS = 60_000
+# How long after a bar's end a quiet market is given for late trades to arrive
+CLOSE_GRACE_MS = 250
+# How often CandleStream checks the clock for bars to close
+CLOCK_INTERVAL_SECONDS = 0.05
+
+@dataclass
+class Candle:
+    symbol: str
+    timeframe: str
+    timestamp: int  # bar open, ms
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float = 0.0
+    trades: int = 0
+
+    def as_ohlcv(self) -> list:
+        """The bar as a ccxt-style [timestamp, open, high, low, close, volume] row."""
+        return [self.timestamp, self.open, self.high, self.low, self.close, self.volume]
+
+    def _merge(self, bar: "Candle"):
+        self.high = max(self.high, bar.high)
+        self.low = min(self.low, bar.low)
+        self.close = bar.close
+        self.volume += bar.volume
+        self.trades += bar.trades
+
+class CandleBuilder:
+    """
+    Aggregates one symbol's trades into candles for several timeframes.
+    Every closed candle is passed to each `on_close` subscriber, 1m bars
+    before the higher-timeframe bars they complete.
+    """
+    def __init__(self, symbol: str, timeframes: list[str] = (BASE_TIMEFRAME,), grace_ms: int = CLOSE_GRACE_MS):
+        self.symbol = symbol
+        self.grace_ms = grace_ms
+        self.steps = {}
+        for tf in timeframes:
+            step = ccxt.Exchange.parse_timeframe(tf) * 1000
+            if step % BASE_MS:
+                raise ValueError(f"{tf} is not a whole number of minutes")
+            self.steps[tf] = step
+        self._bar: Candle | None = None  # open 1m bar
+        self._rollups: dict[str, Candle | None] = {tf: None for tf in self.steps if tf != BASE_TIMEFRAME}
+        self._subscribers = []
+        # Bars opening before this saw only part of their trades and are never emitted
+        self.first_full_ms: int | None = None
+        self.late_trades = 0
+
+    def subscribe(self, callback):
+        """Registers `callback(candle)` to be called for every closed candle."""
+        self._subscribers.append(callback)
+
+    def add_trade(self, timestamp_ms: int, price: float, amount: float) -> list[Candle]:
+        """Adds one trade; returns the candles it closed."""
+        minute = timestamp_ms // BASE_MS * BASE_MS
+        closed = []
+        if self._bar is not None:
+            if minute < self._bar.timestamp:
+                self.late_trades += 1  # its bar already closed
+                return closed
+            if minute > self._bar.timestamp:
+                closed = self._close_until(minute)
+
+        bar = self._bar
+        if self.first_full_ms is None:
+            self.first_full_ms = minute + BASE_MS if timestamp_ms > minute else minute
+        if bar is None:
+            self._bar = Candle(self.symbol, BASE_TIMEFRAME, minute, price, price, price, price, amount, 1)
+        elif bar.trades == 0:
+            # First trade of a minute the clock opened flat
+            bar.open = bar.high = bar.low = bar.close = price
+            bar.volume = amount
+            bar.trades = 1
+        else:
+            bar.high = max(bar.high, price)
+            bar.low = min(bar.low, price)
+            bar.close = price
+            bar.volume += amount
+            bar.trades += 1
+        return closed
+
+    def add_trades(self, trades: list) -> list[Candle]:
+        """Adds a batch of ccxt trades; returns the candles they closed."""
+        closed = []
+        for trade in trades:
+            closed += self.add_trade(trade['timestamp'], trade['price'], trade['amount'])
+        return closed
+
+    def advance(self, now_ms: int) -> list[Candle]:
+        """Closes every bar whose end is more than the grace period before `now_ms`."""
+        if self._bar is None:
+            return []
+        current_minute = (now_ms - self.grace_ms) // BASE_MS * BASE_MS
+        if current_minute <= self._bar.timestamp:
+            return []
+        last = self._bar.close
+        closed = self._close_until(current_minute)
+        # Keep a flat bar open at the last price so the next minute can close on the clock too
+        self._bar = Candle(self.symbol, BASE_TIMEFRAME, current_minute, last, last, last, last)
+        return closed
+
+    def _close_until(self, minute: int) -> list[Candle]:
+        """Closes the open 1m bar and fills flat bars up to (not including) `minute`."""
+        closed = []
+        bar = self._bar
+        while bar.timestamp < minute:
+            closed += self._emit(bar)
+            bar = Candle(self.symbol, BASE_TIMEFRAME, bar.timestamp + BASE_MS, bar.close, bar.close, bar.close, bar.close)
+        self._bar = None
+        return closed
+
+    def _emit(self, bar: Candle) -> list[Candle]:
+        closed = []
+        if BASE_TIMEFRAME in self.steps and bar.timestamp >= self.first_full_ms:
+            closed.append(bar)
+        bar_end = bar.timestamp + BASE_MS
+        for tf, rollup in self._rollups.items():
+            step = self.steps[tf]
+            bucket = bar.timestamp // step * step
+            if rollup is None or rollup.timestamp != bucket:
+                rollup = Candle(self.symbol, tf, bucket, bar.open, bar.high, bar.low, bar.close, bar.volume, bar.trades)
+            else:
+                rollup._merge(bar)
+            if bar_end == bucket + step:
+                if bucket >= self.first_full_ms:
+                    closed.append(rollup)
+                rollup = None
+            self._rollups[tf] = rollup
+        for candle in closed:
+            for callback in self._subscribers:
+                callback(candle)
+        return closed
+
+class CandleStream:
+    """
+    Async iterator of closed candles for one symbol, fed by ccxt.pro
+    `watch_trades`:
+
+        async for candle in CandleStream(exchange, "BTC/USDT", ["1h"]):
+            ...  # fires within milliseconds of the bar's close
+
+    Only candles of the requested timeframes are yielded.
+    """
+    def __init__(self, exchange, symbol: str, timeframes: list[str], clock_interval: float = CLOCK_INTERVAL_SECONDS):
+        self.exchange = exchange
+        self.symbol = symbol
+        self.timeframes = set(timeframes)
+        self.clock_interval = clock_interval
+        self.builder = CandleBuilder(symbol, sorted({BASE_TIMEFRAME, *timeframes}, key=ccxt.Exchange.parse_timeframe))
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self.builder.subscribe(self._on_close)
+        self._tasks: list[asyncio.Task] = []
+
+    def _on_close(self, candle: Candle):
+        if candle.timeframe in self.timeframes:
+            self._queue.put_nowait(candle)
+
+    async def _trades_loop(self):
+        while True:
+            try:
+                self.builder.add_trades(await self.exchange.watch_trades(self.symbol))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in candle trades stream for {self.symbol}: {e}", exc_info=True)
+                await asyncio.sleep(5)
+
+    async def _clock_loop(self):
+        while True:
+            await asyncio.sleep(self.clock_interval)
+            self.builder.advance(int(time.time() * 1000))
+
+    def __aiter__(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._trades_loop()), asyncio.create_task(self._clock_loop())]
+        return self
+
+    async def __anext__(self) -> Candle:
+        return await self._queue.get()
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
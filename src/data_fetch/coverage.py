@@ -0,0 +1,176 @@
+# src/data_fetch/coverage.py
+import os
+import json
+import time
+import logging
+from functools import partial
+import numpy as np
+import pandas as pd
+from .data_source import fetch_ohlcv_range
+from .derived_timeframes import timeframe_ms
+from .history_store import HistoryStore, store, HISTORY_STORE_PATH
+
+logger = logging.getLogger(__name__)
+
+COVERAGE_INDEX_PATH = f"{HISTORY_STORE_PATH}/coverage_index.json"
+GAP_REPORT_PATH = "/workspace/data/gap_report.json"
+# How long a hole is trusted before repair asks the exchanges again
+HOLE_RETRY_SECONDS = 7 * 24 * 3600
+
+def contiguous_ranges(timestamps: np.ndarray, step_ms: int) -> list[list[int]]:
+    """
+    Splits sorted epoch-ms candle times into [first, last] runs with no
+    missing candle, in one vectorized pass.
+    """
+    if len(timestamps) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(timestamps) > step_ms)
+    starts = np.concatenate(([timestamps[0]], timestamps[breaks + 1]))
+    ends = np.concatenate((timestamps[breaks], [timestamps[-1]]))
+    return [[int(s), int(e)] for s, e in zip(starts, ends)]
+
+def find_gaps(timestamps: np.ndarray, step_ms: int) -> list[list[int]]:
+    """Returns the missing [start, end) intervals between sorted epoch-ms candle times."""
+    ranges = contiguous_ranges(timestamps, step_ms)
+    return [[prev[1] + step_ms, nxt[0]] for prev, nxt in zip(ranges, ranges[1:])]
+
+def missing_within(timestamps: np.ndarray, start_ms: int, end_ms: int, step_ms: int) -> list[list[int]]:
+    """Returns the [start, end) intervals of [start_ms, end_ms) with no candle in sorted `timestamps`."""
+    inside = timestamps[(timestamps >= start_ms) & (timestamps < end_ms)]
+    bounds = np.concatenate(([start_ms - step_ms], inside, [end_ms]))
+    breaks = np.flatnonzero(np.diff(bounds) > step_ms)
+    return [[int(bounds[i] + step_ms), int(bounds[i + 1])] for i in breaks]
+
+class CoverageIndex:
+    """
+    Records, per series, the contiguous ranges of candles we hold and the
+    holes an exchange answered for but had no candles in (downtime,
+    delistings), so repair doesn't keep refetching them. Holes are stored
+    as [start, end, recorded_at] and retried after HOLE_RETRY_SECONDS;
+    fetch errors never make a hole. Stored as JSON next to the history
+    store.
+    """
+    def __init__(self, history: HistoryStore | None = None, path: str | None = COVERAGE_INDEX_PATH):
+        self.history = history or store
+        self.path = path
+        self._series: dict[str, dict] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self._series = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Could not load coverage index from {path}: {e}")
+
+    @staticmethod
+    def _key(symbol: str, timeframe: str) -> str:
+        return f"{symbol}:{timeframe}"
+
+    def entry(self, symbol: str, timeframe: str) -> dict:
+        return self._series.setdefault(self._key(symbol, timeframe), {"ranges": [], "holes": []})
+
+    def refresh(self, symbol: str, timeframe: str) -> dict:
+        """Rebuilds a series' ranges from the timestamps in the history store."""
+        entry = self.entry(symbol, timeframe)
+        entry["ranges"] = contiguous_ranges(self.history.timestamps(symbol, timeframe), timeframe_ms(timeframe))
+        entry["checked_at"] = int(time.time())
+        return entry
+
+    def gaps(self, symbol: str, timeframe: str) -> list[list[int]]:
+        """Missing intervals between held ranges, excluding holes that are still trusted."""
+        step = timeframe_ms(timeframe)
+        entry = self.entry(symbol, timeframe)
+        retry_before = time.time() - HOLE_RETRY_SECONDS
+        # Holes recorded before expiry existed have no time and are retried
+        holes = {(h[0], h[1]) for h in entry["holes"] if len(h) > 2 and h[2] > retry_before}
+        ranges = entry["ranges"]
+        return [
+            [prev[1] + step, nxt[0]] for prev, nxt in zip(ranges, ranges[1:])
+            if (prev[1] + step, nxt[0]) not in holes
+        ]
+
+    def repair(self, symbol: str, timeframe: str, fetch=partial(fetch_ohlcv_range, empty_ok=True)) -> int:
+        """
+        Fetches only the missing intervals of a series and stores them.
+        `fetch` returns None when every exchange failed, which leaves the
+        interval to the next run, and a DataFrame (possibly empty) when an
+        exchange answered; whatever that answer leaves missing is
+        remembered as a hole. Returns the number of candles added.
+        """
+        self.refresh(symbol, timeframe)
+        step = timeframe_ms(timeframe)
+        entry = self.entry(symbol, timeframe)
+        added = 0
+        for start_ms, end_ms in self.gaps(symbol, timeframe):
+            since = pd.Timestamp(start_ms, unit="ms").to_pydatetime()
+            until = pd.Timestamp(end_ms, unit="ms").to_pydatetime()
+            logger.info(f"🩹 Repairing {symbol} {timeframe} gap {since} → {until}.")
+            df = fetch(symbol, timeframe, since, until)
+            if df is None:
+                logger.warning(f"⚠️ Could not fetch {symbol} {timeframe} gap {since} → {until}; will retry.")
+                continue
+
+            filled = self.history.append(symbol, timeframe, df) if len(df) else 0
+            added += filled
+            # Narrow the gap to what the answer didn't cover, rather than refetching all of it next time
+            missing = [[start_ms, end_ms]]
+            if filled:
+                missing = missing_within(self.history.timestamps(symbol, timeframe), start_ms, end_ms, step)
+            entry["holes"] = [h for h in entry["holes"] if not (start_ms <= h[0] and h[1] <= end_ms)]
+            entry["holes"] += [[hole_start, hole_end, int(time.time())] for hole_start, hole_end in missing]
+
+        if added:
+            self.refresh(symbol, timeframe)
+        return added
+
+    def report(self, symbol: str, timeframe: str) -> dict:
+        """Summarizes a series' coverage for the pipeline's gap report."""
+        step = timeframe_ms(timeframe)
+        entry = self.entry(symbol, timeframe)
+        gaps = self.gaps(symbol, timeframe)
+        ranges = entry["ranges"]
+        return {
+            "symbol": symbol,
+            "timeframe": timeframe,
+            "first": ranges[0][0] if ranges else None,
+            "last": ranges[-1][1] if ranges else None,
+            "ranges": len(ranges),
+            "gaps": len(gaps),
+            "missing_bars": sum((end - start) // step for start, end in gaps),
+            "known_holes": len(entry["holes"]),
+        }
+
+    def save(self):
+        """Persists the index, replacing the file atomically."""
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._series, f)
+        os.replace(tmp_path, self.path)
+
+def repair_and_report(symbols: list[str], timeframes: list[str], index: CoverageIndex | None = None,
+                      report_path: str | None = GAP_REPORT_PATH) -> list[dict]:
+    """
+    Repairs gaps in every series and writes the resulting gap report as JSON.
+    Returns the report rows.
+    """
+    index = index or CoverageIndex()
+    rows = []
+    for symbol in symbols:
+        for timeframe in timeframes:
+            try:
+                index.repair(symbol, timeframe)
+            except Exception as e:
+                logger.error(f"❌ Gap repair failed for {symbol} {timeframe}: {e}")
+            row = index.report(symbol, timeframe)
+            if row["gaps"]:
+                logger.warning(f"🕳️ {symbol} {timeframe}: {row['gaps']} gaps, {row['missing_bars']} bars missing.")
+            rows.append(row)
+
+    index.save()
+    if report_path:
+        os.makedirs(os.path.dirname(report_path), exist_ok=True)
+        with open(report_path, "w") as f:
+            json.dump(rows, f, indent=4)
+    return rows
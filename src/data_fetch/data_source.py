@@ -1,59 +1,143 @@
 # data_fetch/data_source.py
-import os
+import time
 import ccxt
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 import pandas as pd
+from .exchange_pool import pool, MarketsUnavailableError
+from .exchange_health import health
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def fetch_ohlcv_data(symbol: str, timeframe: str, since: datetime) -> pd.DataFrame | None:
+OHLCV_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+PAGE_LIMIT = 1000
+EXCHANGES_TO_TRY = ["bybit", "binance", "okx", "kucoin"]
+
+def supports_timeframe(exchange, ex_name: str, timeframe: str) -> bool:
+    """Checks that an exchange can serve OHLCV candles for a timeframe."""
+    if not exchange.has.get("fetchOHLCV"):
+        logger.debug(f"Exchange {ex_name} does not support fetchOHLCV.")
+        return False
+
+    if timeframe not in exchange.timeframes:
+        logger.warning(f"{ex_name} does not support timeframe {timeframe}, skipping.")
+        return False
+
+    return True
+
+def ohlcv_to_dataframe(data: list) -> pd.DataFrame:
+    """Converts raw ccxt OHLCV rows into a DataFrame with parsed timestamps."""
+    df = pd.DataFrame(data, columns=OHLCV_COLUMNS)
+    df = df.drop_duplicates(subset="timestamp", keep="last").sort_values("timestamp")
+    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+    return df.reset_index(drop=True)
+
+def paginate_ohlcv(exchange, symbol_pair: str, timeframe: str, since_ms: int, until_ms: int,
+                   stats: dict | None = None) -> list:
     """
-    Fetches OHLCV data using ccxt, trying a list of exchanges as fallbacks.
+    Pages forward through an exchange's OHLCV history with `since` until
+    `until_ms` is reached or the exchange has nothing newer to return.
+    The number of requests issued is written to `stats["requests"]`.
+    """
+    stats = stats if stats is not None else {}
+    stats["requests"] = 0
+    timeframe_ms = ccxt.Exchange.parse_timeframe(timeframe) * 1000
+    rows = []
+    cursor = since_ms
+
+    while cursor < until_ms:
+        page = exchange.fetch_ohlcv(symbol_pair, timeframe, cursor, limit=PAGE_LIMIT)
+        stats["requests"] += 1
+        page = [row for row in page or [] if row[0] >= cursor]
+        if not page:
+            break
+
+        rows.extend(page)
+        next_cursor = page[-1][0] + timeframe_ms
+        if next_cursor <= cursor:
+            break
+        cursor = next_cursor
+
+    return [row for row in rows if row[0] < until_ms]
+
+def _fetch_with_fallback(symbol: str, timeframe: str, fetch, empty_ok: bool = False) -> pd.DataFrame | None:
+    """
+    Runs `fetch(exchange, symbol_pair, stats)` against each exchange, healthiest
+    and fastest first, and returns the first non-empty result as a DataFrame.
+    `fetch` may set `stats["requests"]` so latency is recorded per request.
+    With `empty_ok`, an empty DataFrame means some exchange answered but had
+    no candles; None always means every exchange failed.
     """
     symbol_pair = f"{symbol}/USDT"
-    since_ms = int(since.timestamp() * 1000)
-    exchanges_to_try = ["bybit", "binance", "okx", "kucoin"]
+    answered_empty = False
 
-    for ex_name in exchanges_to_try:
+    for ex_name in health.rank(EXCHANGES_TO_TRY, symbol):
+        stats = {"requests": 1}
         try:
-            exchange_class = getattr(ccxt, ex_name)
-            exchange_config = {"enableRateLimit": True}
-            
-            # Use API keys only for Bybit, as configured
-            if ex_name == "bybit":
-                exchange_config.update({
-                    "apiKey": os.getenv("BYBIT_API_KEY", ""),
-                    "secret": os.getenv("BYBIT_API_SECRET", ""),
-                })
-            
-            exchange = exchange_class(exchange_config)
-
-            if not exchange.has.get("fetchOHLCV"):
-                logger.debug(f"Exchange {ex_name} does not support fetchOHLCV.")
-                continue
+            exchange = pool.get(ex_name)
 
-            if timeframe not in exchange.timeframes:
-                logger.warning(f"{ex_name} does not support timeframe {timeframe}, skipping.")
+            if not supports_timeframe(exchange, ex_name, timeframe):
                 continue
 
             logger.info(f"🔄 Fetching {symbol_pair} @ {timeframe} from {ex_name}...")
-            data = exchange.fetch_ohlcv(symbol_pair, timeframe, since_ms, limit=1000)
-            
+            started = time.perf_counter()
+            data = fetch(exchange, symbol_pair, stats)
+
             if not data:
                 logger.warning(f"⚠️ {ex_name} returned no data for {symbol_pair}.")
+                health.record_failure(ex_name, symbol, exchange_wide=False)
+                answered_empty = True
                 continue
 
-            df = pd.DataFrame(data, columns=["timestamp", "open", "high", "low", "close", "volume"])
-            df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
-            
+            health.record_success(ex_name, symbol, (time.perf_counter() - started) / max(stats["requests"], 1))
+            df = ohlcv_to_dataframe(data)
+
             logger.info(f"✅ Successfully fetched {len(df)} rows from {ex_name}.")
             return df
 
+        except MarketsUnavailableError as e:
+            # Already counted against the exchange by the pool
+            logger.warning(f"⚠️ {ex_name} skipped for {symbol_pair}: {e}")
+            continue
         except Exception as e:
             logger.warning(f"⚠️ {ex_name} failed for {symbol_pair}: {e}")
+            health.record_failure(ex_name, symbol)
             continue
 
+    if empty_ok and answered_empty:
+        return ohlcv_to_dataframe([])
     logger.error(f"❌ All data sources failed for {symbol_pair} on {timeframe}")
-    return None
\ No newline at end of file
+    return None
+
+def to_ms(moment: datetime) -> int:
+    """Converts a datetime to epoch milliseconds, treating naive values as UTC."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp() * 1000)
+
+def fetch_ohlcv_data(symbol: str, timeframe: str, since: datetime) -> pd.DataFrame | None:
+    """
+    Fetches OHLCV data using ccxt, trying a list of exchanges as fallbacks.
+    """
+    since_ms = to_ms(since)
+    return _fetch_with_fallback(
+        symbol, timeframe,
+        lambda exchange, symbol_pair, stats: exchange.fetch_ohlcv(symbol_pair, timeframe, since_ms, limit=PAGE_LIMIT),
+    )
+
+def fetch_ohlcv_range(symbol: str, timeframe: str, since: datetime, until: datetime | None = None,
+                      empty_ok: bool = False) -> pd.DataFrame | None:
+    """
+    Fetches every candle between `since` and `until` (default: now), paging
+    through the history of the first exchange that can serve it. With
+    `empty_ok`, returns an empty DataFrame rather than None when exchanges
+    answered but none had candles in the range.
+    """
+    since_ms = to_ms(since)
+    until_ms = to_ms(until or datetime.now(timezone.utc))
+    return _fetch_with_fallback(
+        symbol, timeframe,
+        lambda exchange, symbol_pair, stats: paginate_ohlcv(exchange, symbol_pair, timeframe, since_ms, until_ms, stats),
+        empty_ok,
+    )
@@ -0,0 +1,84 @@
+# src/data_fetch/derived_timeframes.py
+import logging
+import ccxt
+import numpy as np
+import pandas as pd
+from .history_store import HistoryStore, store
+from ..shared.constants import DERIVED_TIMEFRAMES
+
+logger = logging.getLogger(__name__)
+
+# Weekly buckets start on Monday 00:00 UTC like exchange candles, not on the
+# Thursday the Unix epoch fell on
+WEEK_ORIGIN_MS = 4 * 86_400_000
+
+def timeframe_ms(timeframe: str) -> int:
+    return ccxt.Exchange.parse_timeframe(timeframe) * 1000
+
+def resample_ohlcv(base: pd.DataFrame, base_timeframe: str, timeframe: str,
+                   include_partial: bool = False) -> pd.DataFrame:
+    """
+    Aggregates a sorted base OHLCV series into `timeframe` buckets in one
+    vectorized pass. `timeframe` must be a whole multiple of `base_timeframe`.
+
+    Without `include_partial` the trailing bucket is dropped unless the base
+    series already reaches its final bar, so an unfinished 4h candle is
+    never stored as if it had closed.
+    """
+    base_ms, target_ms = timeframe_ms(base_timeframe), timeframe_ms(timeframe)
+    if target_ms <= base_ms or target_ms % base_ms:
+        raise ValueError(f"{timeframe} is not a multiple of {base_timeframe}")
+    if base.empty:
+        return base.iloc[0:0]
+
+    origin = WEEK_ORIGIN_MS if timeframe.endswith("w") else 0
+    ts = base["timestamp"].to_numpy(dtype="datetime64[ms]").astype(np.int64)
+    buckets = (ts - origin) // target_ms * target_ms + origin
+
+    bars = base.groupby(buckets, sort=True).agg(
+        open=("open", "first"), high=("high", "max"), low=("low", "min"),
+        close=("close", "last"), volume=("volume", "sum"),
+    )
+    if not include_partial and ts[-1] < bars.index[-1] + target_ms - base_ms:
+        bars = bars.iloc[:-1]
+
+    bars.index = pd.to_datetime(bars.index, unit="ms")
+    return bars.rename_axis("timestamp").reset_index()
+
+def build_derived_timeframes(symbol: str, targets: dict[str, str] | None = None,
+                             history: HistoryStore | None = None) -> dict[str, int]:
+    """
+    Brings every derived timeframe of a symbol up to date from its base
+    series (default: DERIVED_TIMEFRAMES).
+
+    Each target resumes from the start of its last stored bucket, which is
+    rebuilt because its newest base bars may have changed since. The base
+    series is read once per base timeframe, from the earliest resume point
+    its targets need. Returns the number of new bars per target.
+    """
+    history = history or store
+    targets = targets or DERIVED_TIMEFRAMES
+    added = {}
+
+    by_base: dict[str, list[str]] = {}
+    for timeframe, base_timeframe in targets.items():
+        by_base.setdefault(base_timeframe, []).append(timeframe)
+
+    for base_timeframe, timeframes in by_base.items():
+        resume = {tf: history.last_timestamp(symbol, tf) for tf in timeframes}
+        starts = list(resume.values())
+        start = None if any(s is None for s in starts) else min(starts)
+
+        base = history.read(symbol, base_timeframe, start=start)
+        if base.empty:
+            logger.warning(f"⚠️ Cannot derive {timeframes} for {symbol}, no {base_timeframe} data.")
+            continue
+
+        for timeframe in timeframes:
+            since = resume[timeframe]
+            series = base if since is None else base[base["timestamp"] >= since]
+            bars = resample_ohlcv(series, base_timeframe, timeframe)
+            added[timeframe] = history.append(symbol, timeframe, bars)
+            logger.info(f"🧪 {symbol} {timeframe}: {added[timeframe]} new bars derived from {base_timeframe}.")
+
+    return added
@@ -0,0 +1,135 @@
+# src/data_fetch/exchange_health.py
+import os
+import json
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Persisted so a fresh pipeline run doesn't rediscover the same outage
+HEALTH_STATE_PATH = "/workspace/data/exchange_health.json"
+# Consecutive failures that open an exchange's circuit
+FAILURE_THRESHOLD = 3
+# How long an open circuit keeps an exchange out of the fallback order
+CIRCUIT_OPEN_SECONDS = 900
+# Weight of the newest sample in the latency moving average
+LATENCY_ALPHA = 0.3
+
+# Key used for the exchange-wide record, next to the per-symbol ones
+ALL_SYMBOLS = "*"
+
+class ExchangeHealth:
+    """
+    Tracks latency and failures per exchange and per (exchange, symbol), and
+    uses them to order the exchange fallback list.
+
+    After FAILURE_THRESHOLD consecutive failures an exchange's circuit opens
+    and it is skipped for CIRCUIT_OPEN_SECONDS. A geo-block therefore costs a
+    few timeouts once, not one per series. Exchange-wide failures open the
+    circuit for every symbol. Healthy exchanges are tried fastest first.
+    """
+    def __init__(self, path: str | None = HEALTH_STATE_PATH,
+                 failure_threshold: int = FAILURE_THRESHOLD,
+                 open_seconds: float = CIRCUIT_OPEN_SECONDS):
+        self.path = path
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self._stats: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    @staticmethod
+    def _key(ex_name: str, symbol: str) -> str:
+        return f"{ex_name}:{symbol}"
+
+    def _entry(self, ex_name: str, symbol: str) -> dict:
+        return self._stats.setdefault(self._key(ex_name, symbol), {
+            "latency": None, "failures": 0, "successes": 0, "open_until": 0.0,
+        })
+
+    def record_success(self, ex_name: str, symbol: str, latency: float):
+        """Records a successful request and its latency in seconds."""
+        with self._lock:
+            for scope in (symbol, ALL_SYMBOLS):
+                entry = self._entry(ex_name, scope)
+                previous = entry["latency"]
+                entry["latency"] = latency if previous is None else (
+                    LATENCY_ALPHA * latency + (1 - LATENCY_ALPHA) * previous
+                )
+                entry["successes"] += 1
+                entry["failures"] = 0
+                entry["open_until"] = 0.0
+
+    def record_failure(self, ex_name: str, symbol: str, exchange_wide: bool = True):
+        """
+        Records a failed request. Errors count against the exchange as a
+        whole; pass `exchange_wide=False` for symbol-specific problems such
+        as an exchange not listing the pair.
+        """
+        with self._lock:
+            scopes = (symbol, ALL_SYMBOLS) if exchange_wide else (symbol,)
+            for scope in scopes:
+                entry = self._entry(ex_name, scope)
+                entry["failures"] += 1
+                if entry["failures"] >= self.failure_threshold:
+                    if entry["open_until"] <= time.time():
+                        logger.warning(f"🚧 Opening circuit for {ex_name} ({scope}) after {entry['failures']} failures.")
+                    entry["open_until"] = time.time() + self.open_seconds
+
+    def is_open(self, ex_name: str, symbol: str) -> bool:
+        """True while the exchange's circuit is open for this symbol or for all symbols."""
+        now = time.time()
+        return any(
+            self._stats.get(self._key(ex_name, scope), {}).get("open_until", 0.0) > now
+            for scope in (symbol, ALL_SYMBOLS)
+        )
+
+    def rank(self, exchanges: list[str], symbol: str) -> list[str]:
+        """
+        Orders exchanges for a symbol: closed circuits first, fastest average
+        latency first, untried exchanges after measured ones in their
+        configured order. Open circuits are dropped unless every exchange is
+        open, in which case the configured order is returned unchanged.
+        """
+        available = [ex for ex in exchanges if not self.is_open(ex, symbol)]
+        if not available:
+            return list(exchanges)
+
+        def latency(ex_name):
+            entry = self._stats.get(self._key(ex_name, symbol)) or self._stats.get(self._key(ex_name, ALL_SYMBOLS))
+            value = entry and entry["latency"]
+            return float("inf") if value is None else value
+
+        return sorted(available, key=latency)
+
+    def load(self):
+        """Loads persisted state, ignoring a missing or unreadable file."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                self._stats = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Could not load exchange health from {self.path}: {e}")
+
+    def save(self):
+        """Persists the current state, replacing the file atomically."""
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with self._lock, open(tmp_path, "w") as f:
+                json.dump(self._stats, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not save exchange health to {self.path}: {e}")
+
+    def reset(self):
+        """Forgets all recorded history."""
+        with self._lock:
+            self._stats.clear()
+
+# Shared by every fetch in the process
+health = ExchangeHealth()
@@ -0,0 +1,114 @@
+# src/data_fetch/exchange_pool.py
+import os
+import time
+import threading
+import logging
+import ccxt
+from .exchange_health import ExchangeHealth, health, ALL_SYMBOLS
+
+logger = logging.getLogger(__name__)
+
+# How long loaded markets are trusted before they are refreshed from the exchange
+MARKETS_TTL_SECONDS = 3600
+# After a failed markets load, how long to wait before asking that exchange again
+MARKETS_RETRY_SECONDS = 60
+
+class MarketsUnavailableError(Exception):
+    """An exchange's markets could not be loaded, now or on a recent attempt."""
+
+def create_exchange(ex_name: str, ccxt_module=ccxt, **overrides):
+    """
+    Builds a ccxt exchange client for the given exchange id. Pass
+    `ccxt.async_support` as `ccxt_module` to get an asyncio client.
+    """
+    exchange_class = getattr(ccxt_module, ex_name)
+    exchange_config = {"enableRateLimit": True, **overrides}
+
+    # Use API keys only for Bybit, as configured
+    if ex_name == "bybit":
+        exchange_config.update({
+            "apiKey": os.getenv("BYBIT_API_KEY", ""),
+            "secret": os.getenv("BYBIT_API_SECRET", ""),
+        })
+
+    return exchange_class(exchange_config)
+
+class ExchangePool:
+    """
+    Process-wide registry of synchronous ccxt clients.
+
+    Each exchange is built once and reused for every fetch, which keeps its
+    HTTP session (and keep-alive connections) and its loaded markets alive.
+    Markets are loaded on first use and refreshed once they are older than
+    `markets_ttl` seconds. Each exchange loads under its own lock, so a slow
+    exchange only holds up its own callers. A failed load counts against
+    the exchange in `exchange_health` and is not retried for
+    `retry_seconds`; a failed refresh keeps the markets already loaded.
+    """
+    def __init__(self, markets_ttl: float = MARKETS_TTL_SECONDS, retry_seconds: float = MARKETS_RETRY_SECONDS,
+                 exchange_health: ExchangeHealth | None = None):
+        self.markets_ttl = markets_ttl
+        self.retry_seconds = retry_seconds
+        self.health = exchange_health or health
+        self._clients = {}
+        self._markets_loaded_at = {}
+        self._markets_failed_at = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _exchange_lock(self, ex_name: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(ex_name, threading.Lock())
+
+    def get(self, ex_name: str):
+        """Returns the shared client for an exchange, with markets loaded."""
+        with self._exchange_lock(ex_name):
+            exchange = self._clients.get(ex_name)
+            if exchange is None:
+                exchange = create_exchange(ex_name)
+                self._clients[ex_name] = exchange
+                logger.debug(f"Created pooled client for {ex_name}.")
+
+            loaded_at = self._markets_loaded_at.get(ex_name)
+            if loaded_at is None or time.monotonic() - loaded_at > self.markets_ttl:
+                self._load_markets(ex_name, exchange, loaded_at)
+
+        return exchange
+
+    def _load_markets(self, ex_name: str, exchange, loaded_at: float | None):
+        failed_at = self._markets_failed_at.get(ex_name)
+        if failed_at is not None and time.monotonic() - failed_at < self.retry_seconds:
+            if loaded_at is None:
+                raise MarketsUnavailableError(f"{ex_name} markets failed to load {time.monotonic() - failed_at:.0f}s ago.")
+            return
+        try:
+            exchange.load_markets(reload=loaded_at is not None)
+        except Exception as e:
+            self._markets_failed_at[ex_name] = time.monotonic()
+            self.health.record_failure(ex_name, ALL_SYMBOLS, exchange_wide=False)
+            if loaded_at is None:
+                raise MarketsUnavailableError(f"{ex_name} markets failed to load: {e}") from e
+            logger.warning(f"⚠️ Refreshing {ex_name} markets failed, keeping the loaded ones: {e}")
+            return
+        self._markets_failed_at.pop(ex_name, None)
+        self._markets_loaded_at[ex_name] = time.monotonic()
+
+    def register(self, ex_name: str, exchange, markets_loaded: bool = True):
+        """Installs a pre-built client, e.g. one configured differently or a stand-in."""
+        with self._exchange_lock(ex_name):
+            self._clients[ex_name] = exchange
+            self._markets_failed_at.pop(ex_name, None)
+            if markets_loaded:
+                self._markets_loaded_at[ex_name] = time.monotonic()
+            else:
+                self._markets_loaded_at.pop(ex_name, None)
+
+    def clear(self):
+        """Drops every pooled client so the next `get` builds a fresh one."""
+        with self._lock:
+            self._clients.clear()
+            self._markets_loaded_at.clear()
+            self._markets_failed_at.clear()
+
+# Shared by every synchronous fetch in the process
+pool = ExchangePool()
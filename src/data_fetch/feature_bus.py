@@ -0,0 +1,239 @@
+# src/data_fetch/feature_bus.py
+"""
+Shared-memory feature table for realtime features.
+
+The realtime manager publishes every feature update into a fixed-layout,
+memory-mapped file. The predictor and trade loop read it directly, so
+they see features within microseconds, with no JSON parsing and no
+half-written files.
+
+Layout (little-endian):
+    header   64 bytes   magic, version, n_symbols, n_features, name size
+    symbols  n_symbols  x NAME_SIZE bytes, NUL-padded ASCII
+    features n_features x NAME_SIZE bytes, NUL-padded ASCII
+    rows     n_symbols  x (seq u64, values f64[n_features], updated_at f64[n_features])
+
+Each row is a seqlock. The writer makes `seq` odd, writes, then makes it
+even again. A reader retries while `seq` is odd or changed during its
+copy, so it always gets a consistent snapshot of a symbol. Rows are
+independent, so separate processes may write disjoint sets of symbols.
+Unset values are NaN; `updated_at` is epoch seconds.
+"""
+import os
+import math
+import mmap
+import time
+import struct
+import logging
+
+logger = logging.getLogger(__name__)
+
+FEATURE_BUS_PATH = "/dev/shm/hodl_realtime_features" if os.path.isdir("/dev/shm") else "/workspace/data/realtime_features.bus"
+
+MAGIC = b"HODLFBUS"
+VERSION = 1
+NAME_SIZE = 32
+HEADER = struct.Struct("<8sIIII")
+HEADER_SIZE = 64
+SEQ = struct.Struct("<Q")
+# How often a reader checks whether the writer replaced the file
+REATTACH_CHECK_SECONDS = 1.0
+# Reads give up after this many torn copies in a row (the writer died mid-write)
+MAX_READ_RETRIES = 1000
+
+class _Layout:
+    """Offsets for a given symbol and feature list."""
+    def __init__(self, symbols: list[str], features: list[str]):
+        self.symbols = list(symbols)
+        self.features = list(features)
+        self.symbol_index = {s: i for i, s in enumerate(self.symbols)}
+        self.feature_index = {f: i for i, f in enumerate(self.features)}
+        self.rows_offset = HEADER_SIZE + NAME_SIZE * (len(self.symbols) + len(self.features))
+        self.row_size = SEQ.size + 16 * len(self.features)
+        self.size = self.rows_offset + self.row_size * len(self.symbols)
+        self.values = struct.Struct(f"<{len(self.features)}d")
+        # Values then update stamps: a whole row after its seq
+        self.row = struct.Struct(f"<{2 * len(self.features)}d")
+
+    def row_offset(self, symbol: str) -> int:
+        return self.rows_offset + self.row_size * self.symbol_index[symbol]
+
+    def encode_header(self) -> bytes:
+        names = b"".join(_encode_name(n) for n in self.symbols + self.features)
+        header = HEADER.pack(MAGIC, VERSION, len(self.symbols), len(self.features), NAME_SIZE)
+        return header.ljust(HEADER_SIZE, b"\0") + names
+
+    @classmethod
+    def decode(cls, buffer) -> "_Layout":
+        magic, version, n_symbols, n_features, name_size = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION or name_size != NAME_SIZE:
+            raise ValueError("Not a feature bus file, or an incompatible version")
+        names = [
+            bytes(buffer[HEADER_SIZE + i * NAME_SIZE:HEADER_SIZE + (i + 1) * NAME_SIZE]).rstrip(b"\0").decode()
+            for i in range(n_symbols + n_features)
+        ]
+        return cls(names[:n_symbols], names[n_symbols:])
+
+def _encode_name(name: str) -> bytes:
+    encoded = name.encode()
+    if len(encoded) > NAME_SIZE:
+        raise ValueError(f"Name too long for the feature bus: {name}")
+    return encoded.ljust(NAME_SIZE, b"\0")
+
+class FeatureBusWriter:
+    """
+    Publishes feature values for a set of symbols. An existing file with
+    the same layout is reused, so readers stay attached across restarts.
+    Otherwise the file is recreated.
+    """
+    def __init__(self, symbols: list[str], features: list[str], path: str = FEATURE_BUS_PATH):
+        self.path = path
+        self.layout = _Layout(symbols, features)
+        header = self.layout.encode_header()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if not self._matches(path, header):
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(header)
+                empty_row = SEQ.pack(0) + self.layout.values.pack(*[math.nan] * len(features)) \
+                    + self.layout.values.pack(*[0.0] * len(features))
+                f.write(empty_row * len(symbols))
+            os.replace(tmp_path, path)
+
+        self._file = open(path, "r+b")
+        self._mm = mmap.mmap(self._file.fileno(), self.layout.size)
+        # Each published symbol's values and stamps, so a publish packs its row in one call
+        self._rows: dict[str, list[float]] = {}
+
+    def _matches(self, path: str, header: bytes) -> bool:
+        if not os.path.exists(path) or os.path.getsize(path) != self.layout.size:
+            return False
+        with open(path, "rb") as f:
+            return f.read(len(header)) == header
+
+    def publish(self, symbol: str, values: dict, timestamp: float | None = None):
+        """Writes the given features for a symbol; features not named keep their value."""
+        layout = self.layout
+        offset = layout.row_offset(symbol)
+        stamp = time.time() if timestamp is None else timestamp
+        mm = self._mm
+        row = self._rows.get(symbol)
+        if row is None:
+            # Start from the file, so a restarted writer keeps the values it hasn't republished yet
+            row = self._rows[symbol] = list(layout.row.unpack_from(mm, offset + SEQ.size))
+
+        n_features = len(layout.features)
+        feature_index = layout.feature_index
+        for name, value in values.items():
+            index = feature_index.get(name)
+            if index is not None:
+                row[index] = value
+                row[n_features + index] = stamp
+
+        # Round up to even in case a previous writer died mid-write
+        seq = SEQ.unpack_from(mm, offset)[0]
+        seq += seq & 1
+        SEQ.pack_into(mm, offset, seq + 1)  # odd: write in progress
+        layout.row.pack_into(mm, offset + SEQ.size, *row)
+        SEQ.pack_into(mm, offset, seq + 2)  # even: consistent again
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+class FeatureBusReader:
+    """
+    Small read-only client for the predictor and trade loop.
+
+        bus = FeatureBusReader()
+        bus.get("BTC")            # {'order_book_imbalance': 0.12, ...}
+        bus.age("BTC", "order_book_imbalance")  # seconds since last update
+
+    The file is attached on first use and re-attached if the writer
+    replaced it, e.g. after a restart with a different feature list.
+    """
+    def __init__(self, path: str = FEATURE_BUS_PATH):
+        self.path = path
+        self._mm = None
+        self._inode = None
+        self._checked_at = 0.0
+        self.layout: _Layout | None = None
+
+    def _attach(self):
+        if self._mm is not None:
+            self._mm.close()
+        with open(self.path, "rb") as f:
+            self._inode = os.fstat(f.fileno()).st_ino
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.layout = _Layout.decode(self._mm)
+
+    def _ensure_attached(self) -> bool:
+        now = time.monotonic()
+        try:
+            if self._mm is None:
+                self._attach()
+            elif now - self._checked_at > REATTACH_CHECK_SECONDS:
+                self._checked_at = now
+                if os.stat(self.path).st_ino != self._inode:
+                    self._attach()
+        except (OSError, ValueError) as e:
+            logger.debug(f"Feature bus not available at {self.path}: {e}")
+            return False
+        return True
+
+    def _read_row(self, symbol: str) -> tuple[tuple, tuple] | None:
+        if not self._ensure_attached() or symbol not in self.layout.symbol_index:
+            return None
+        layout = self.layout
+        offset = layout.row_offset(symbol)
+        for _ in range(MAX_READ_RETRIES):
+            before = SEQ.unpack_from(self._mm, offset)[0]
+            if before % 2:
+                continue
+            row = self._mm[offset:offset + layout.row_size]
+            if SEQ.unpack_from(self._mm, offset)[0] == before:
+                values = layout.values.unpack_from(row, SEQ.size)
+                stamps = layout.values.unpack_from(row, SEQ.size + 8 * len(layout.features))
+                return values, stamps
+        logger.warning(f"Gave up reading a consistent feature row for {symbol}.")
+        return None
+
+    def get(self, symbol: str, max_age: float | None = None) -> dict:
+        """
+        Returns the symbol's set features as {name: value}; with `max_age`,
+        only those published within the last `max_age` seconds.
+        """
+        row = self._read_row(symbol)
+        if row is None:
+            return {}
+        values, stamps = row
+        oldest = 0.0 if max_age is None else time.time() - max_age
+        return {
+            name: value for name, value, stamp in zip(self.layout.features, values, stamps)
+            if not math.isnan(value) and stamp >= oldest
+        }
+
+    def updated_at(self, symbol: str) -> dict:
+        """Returns when each set feature of the symbol was last published (epoch seconds)."""
+        row = self._read_row(symbol)
+        if row is None:
+            return {}
+        _, stamps = row
+        return {name: stamp for name, stamp in zip(self.layout.features, stamps) if stamp > 0}
+
+    def age(self, symbol: str, feature: str) -> float | None:
+        """Seconds since a feature was last published, or None if it never was."""
+        stamp = self.updated_at(symbol).get(feature)
+        return None if stamp is None else time.time() - stamp
+
+    def snapshot(self) -> dict:
+        """Returns {symbol: {feature: value}} for every symbol on the bus."""
+        if not self._ensure_attached():
+            return {}
+        return {symbol: self.get(symbol) for symbol in self.layout.symbols}
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
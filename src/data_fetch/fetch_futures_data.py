@@ -1,57 +1,135 @@
 # src/data_fetch/fetch_futures_data.py
 import os
+import time
+import asyncio
 import logging
+import argparse
 import pandas as pd
-from datetime import datetime, timedelta
-from .data_source import fetch_ohlcv_data
+from datetime import datetime, timedelta, timezone
+from .data_source import fetch_ohlcv_range, to_ms
+from .async_fetcher import AsyncFetchEngine, FetchResult, log_timing_report
+from .exchange_health import health
+from .history_store import HistoryStore, store
+from .derived_timeframes import build_derived_timeframes
+from .coverage import repair_and_report
 from ..shared.constants import SYMBOLS, NATIVE_TIMEFRAMES
 
-# Define a persistent base path for data, aligning with the single volume strategy
+# Legacy per-symbol CSV history, imported into the history store on first use
 DATA_BASE_PATH = "/workspace/data/history"
+# How far back to backfill a symbol/timeframe that has no stored history yet
+DEFAULT_LOOKBACK_DAYS = 30
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-os.makedirs(DATA_BASE_PATH, exist_ok=True)
 
 def get_csv_path(symbol: str, timeframe: str) -> str:
     """Helper function to get the full, consistent path for CSV files."""
     return f"{DATA_BASE_PATH}/{symbol}USDT_{timeframe}.csv"
 
-def fetch_and_store(symbol: str, timeframe: str):
-    now = datetime.utcnow()
-    start_date = now - timedelta(days=30) 
-    df = fetch_ohlcv_data(symbol, timeframe, start_date)
-    
-    if df is not None and not df.empty:
-        df.to_csv(get_csv_path(symbol, timeframe), index=False)
-    else:
+def _resume_point(symbol: str, timeframe: str, full_refresh: bool,
+                  history: HistoryStore | None = None) -> tuple[pd.Timestamp | None, datetime]:
+    """Returns the last stored candle (if any) and the time to fetch from."""
+    history = history or store
+    if not full_refresh and not history.exists(symbol, timeframe) and os.path.exists(get_csv_path(symbol, timeframe)):
+        history.import_csv(symbol, timeframe, get_csv_path(symbol, timeframe))
+
+    last_ts = None if full_refresh else history.last_timestamp(symbol, timeframe)
+    since = last_ts if last_ts is not None else datetime.utcnow() - timedelta(days=DEFAULT_LOOKBACK_DAYS)
+    return last_ts, since
+
+def store_candles(symbol: str, timeframe: str, df: pd.DataFrame | None, last_ts: pd.Timestamp | None,
+                  history: HistoryStore | None = None) -> int:
+    """
+    Writes freshly fetched candles to the history store. With a `last_ts`
+    only bars from that candle onward are written, and the stored copy of
+    that candle is replaced since it may have been saved before it closed.
+    Returns the number of new candles.
+    """
+    if df is None or df.empty:
         logging.error(f"❌ No data for {symbol} on {timeframe}.")
+        return 0
+
+    if last_ts is not None:
+        df = df[df['timestamp'] >= last_ts]
+
+    added = (history or store).append(symbol, timeframe, df)
+    if added:
+        logging.info(f"💾 Stored {added} new rows for {symbol} on {timeframe}.")
+    else:
+        logging.info(f"✔️ {symbol} on {timeframe} is already up to date.")
+    return added
+
+def fetch_and_store(symbol: str, timeframe: str, full_refresh: bool = False,
+                    history: HistoryStore | None = None) -> int:
+    """
+    Brings the stored history for a symbol/timeframe up to date.
+
+    By default this resumes from the last stored candle and pages forward
+    until caught up, appending only the new bars. Returns the number of
+    rows written.
+    """
+    last_ts, since = _resume_point(symbol, timeframe, full_refresh, history)
+    df = fetch_ohlcv_range(symbol, timeframe, since)
+    return store_candles(symbol, timeframe, df, last_ts, history)
 
-def simulate_10m(symbol: str):
+async def fetch_all_async(full_refresh: bool = False, symbols: list[str] = SYMBOLS,
+                          timeframes: list[str] = NATIVE_TIMEFRAMES, history: HistoryStore | None = None,
+                          engine: AsyncFetchEngine | None = None) -> list[FetchResult]:
+    """
+    Fetches the whole symbols x timeframes matrix concurrently and stores
+    each series as it would be by `fetch_and_store`.
+    """
+    started = time.perf_counter()
+    until_ms = to_ms(datetime.now(timezone.utc))
+    resume, jobs = {}, []
+    for symbol in symbols:
+        for tf in timeframes:
+            last_ts, since = _resume_point(symbol, tf, full_refresh, history)
+            resume[(symbol, tf)] = last_ts
+            jobs.append((symbol, tf, to_ms(since), until_ms))
+
+    engine = engine or AsyncFetchEngine()
     try:
-        path_1m = get_csv_path(symbol, '1m')
-        if not os.path.exists(path_1m):
-            logging.warning(f"⚠️ Cannot simulate 10m for {symbol}, 1m data missing at {path_1m}.")
-            return
-            
-        df_1m = pd.read_csv(path_1m, parse_dates=['timestamp'])
-        df_1m = df_1m.set_index('timestamp')
-        
-        resampled_df = df_1m.resample('10T').agg({
-            'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'
-        }).dropna().reset_index()
-        
-        resampled_df.to_csv(get_csv_path(symbol, '10m'), index=False)
-        logging.info(f"🧪 {symbol} 10m timeframe simulated and saved.")
-    except Exception as e:
-        logging.error(f"❌ Failed to simulate 10m for {symbol}: {e}")
-
-def main():
+        results = await engine.fetch_matrix(jobs)
+    finally:
+        await engine.close()
+
+    for result in results:
+        store_candles(result.symbol, result.timeframe, result.data, resume[(result.symbol, result.timeframe)], history)
+
+    log_timing_report(results, time.perf_counter() - started)
+    return results
+
+def main(full_refresh: bool = False, serial: bool = False):
     logging.info("--- Fetching All Futures Data ---")
+    if serial:
+        for symbol in SYMBOLS:
+            for tf in NATIVE_TIMEFRAMES:
+                fetch_and_store(symbol, tf, full_refresh=full_refresh)
+    else:
+        asyncio.run(fetch_all_async(full_refresh=full_refresh))
+
+    repair_and_report(SYMBOLS, NATIVE_TIMEFRAMES)
+    health.save()
+
     for symbol in SYMBOLS:
-        for tf in NATIVE_TIMEFRAMES:
-            fetch_and_store(symbol, tf)
-        simulate_10m(symbol)
+        try:
+            build_derived_timeframes(symbol)
+        except Exception as e:
+            logging.error(f"❌ Failed to derive timeframes for {symbol}: {e}")
     logging.info("--- Data Fetching Complete ---")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Fetch futures OHLCV history for all symbols and timeframes.")
+    parser.add_argument(
+        "--full-refresh",
+        action="store_true",
+        help="Ignore stored history and refetch the full lookback window."
+    )
+    parser.add_argument(
+        "--serial",
+        action="store_true",
+        help="Fetch one series at a time instead of the whole matrix concurrently."
+    )
+    args = parser.parse_args()
+
+    main(full_refresh=args.full_refresh, serial=args.serial)
@@ -0,0 +1,150 @@
+# src/data_fetch/history_store.py
+import os
+import glob
+import logging
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+# Root of the columnar history, one directory per symbol and timeframe
+HISTORY_STORE_PATH = "/workspace/data/history_store"
+# Rows per Parquet row group; range reads skip row groups outside the range
+ROW_GROUP_SIZE = 10_000
+
+OHLCV_SCHEMA = pa.schema([
+    ("timestamp", pa.timestamp("ms")),
+    ("open", pa.float64()),
+    ("high", pa.float64()),
+    ("low", pa.float64()),
+    ("close", pa.float64()),
+    ("volume", pa.float64()),
+])
+
+class HistoryStore:
+    """
+    Typed, columnar OHLCV history stored as Parquet files partitioned by
+    symbol, timeframe and month:
+
+        {root}/{symbol}USDT/{timeframe}/{YYYY-MM}.parquet
+
+    Timestamps are naive UTC. Appends rewrite only the months they touch.
+    Range reads open only the months that overlap the range and skip row
+    groups outside it, so neither path scans the whole history.
+    """
+    def __init__(self, root: str = HISTORY_STORE_PATH):
+        self.root = root
+
+    def series_dir(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.root, f"{symbol}USDT", timeframe)
+
+    def partition_path(self, symbol: str, timeframe: str, month: str) -> str:
+        return os.path.join(self.series_dir(symbol, timeframe), f"{month}.parquet")
+
+    def months(self, symbol: str, timeframe: str) -> list[str]:
+        """Returns the stored month partitions ('YYYY-MM') in chronological order."""
+        paths = glob.glob(os.path.join(self.series_dir(symbol, timeframe), "*.parquet"))
+        return sorted(os.path.basename(p)[:-len(".parquet")] for p in paths)
+
+    def exists(self, symbol: str, timeframe: str) -> bool:
+        return bool(self.months(symbol, timeframe))
+
+    def last_timestamp(self, symbol: str, timeframe: str) -> pd.Timestamp | None:
+        """Returns the newest stored candle time, reading only the last partition's timestamps."""
+        months = self.months(symbol, timeframe)
+        if not months:
+            return None
+        table = pq.read_table(self.partition_path(symbol, timeframe, months[-1]), columns=["timestamp"])
+        if table.num_rows == 0:
+            return None
+        return pd.Timestamp(pc.max(table["timestamp"]).as_py())
+
+    def timestamps(self, symbol: str, timeframe: str) -> np.ndarray:
+        """Returns every stored candle time as sorted epoch milliseconds, reading only that column."""
+        columns = [
+            pq.read_table(self.partition_path(symbol, timeframe, month), columns=["timestamp"])["timestamp"]
+            for month in self.months(symbol, timeframe)
+        ]
+        if not columns:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([c.cast(pa.int64()).to_numpy() for c in columns])
+
+    def _read_partition(self, path: str, filters=None) -> pd.DataFrame:
+        return pq.read_table(path, schema=OHLCV_SCHEMA, filters=filters).to_pandas()
+
+    def _write_partition(self, path: str, df: pd.DataFrame):
+        """Writes one month atomically so readers never see a half-written file."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        table = pa.Table.from_pandas(df[OHLCV_SCHEMA.names], schema=OHLCV_SCHEMA, preserve_index=False)
+        tmp_path = f"{path}.tmp"
+        pq.write_table(table, tmp_path, row_group_size=ROW_GROUP_SIZE)
+        os.replace(tmp_path, path)
+
+    def append(self, symbol: str, timeframe: str, df: pd.DataFrame) -> int:
+        """
+        Merges candles into the store. Rows whose timestamp is already stored
+        replace the stored row, so re-fetching a candle that was saved before
+        it closed is safe. Returns the number of new timestamps added.
+        """
+        if df is None or df.empty:
+            return 0
+
+        df = df.copy()
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        added = 0
+        for month, chunk in df.groupby(df["timestamp"].dt.strftime("%Y-%m")):
+            path = self.partition_path(symbol, timeframe, month)
+            if os.path.exists(path):
+                existing = self._read_partition(path)
+                merged = pd.concat([existing, chunk[OHLCV_SCHEMA.names]], ignore_index=True)
+            else:
+                existing = None
+                merged = chunk[OHLCV_SCHEMA.names]
+
+            merged = merged.drop_duplicates(subset="timestamp", keep="last").sort_values("timestamp")
+            added += len(merged) - (0 if existing is None else len(existing))
+            self._write_partition(path, merged)
+
+        return added
+
+    def read(self, symbol: str, timeframe: str,
+             start: datetime | None = None, end: datetime | None = None) -> pd.DataFrame:
+        """
+        Returns the candles with `start <= timestamp < end` (either bound may
+        be omitted), sorted by time. Only overlapping months are opened.
+        """
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+        first_month = start.strftime("%Y-%m") if start is not None else None
+        last_month = end.strftime("%Y-%m") if end is not None else None
+
+        filters = []
+        if start is not None:
+            filters.append(("timestamp", ">=", start.to_pydatetime()))
+        if end is not None:
+            filters.append(("timestamp", "<", end.to_pydatetime()))
+
+        frames = [
+            self._read_partition(self.partition_path(symbol, timeframe, month), filters or None)
+            for month in self.months(symbol, timeframe)
+            if (first_month is None or month >= first_month) and (last_month is None or month <= last_month)
+        ]
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame({name: pd.Series(dtype=OHLCV_SCHEMA.field(name).type.to_pandas_dtype())
+                                 for name in OHLCV_SCHEMA.names})
+        return pd.concat(frames, ignore_index=True)
+
+    def import_csv(self, symbol: str, timeframe: str, csv_path: str) -> int:
+        """Loads a legacy `{symbol}USDT_{tf}.csv` history file into the store."""
+        df = pd.read_csv(csv_path, parse_dates=["timestamp"])
+        added = self.append(symbol, timeframe, df)
+        logger.info(f"📦 Imported {added} rows for {symbol} on {timeframe} from {csv_path}.")
+        return added
+
+# Shared store at the default location
+store = HistoryStore()
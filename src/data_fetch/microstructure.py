@@ -0,0 +1,63 @@
+# src/data_fetch/microstructure.py
+"""
+Order book feature kernel.
+
+The book is turned into two NumPy arrays once per update. The whole
+feature vector is then computed with a handful of array operations, so
+adding a metric costs one more vector op rather than another Python pass
+over the levels.
+"""
+import numpy as np
+
+# Bands around the mid, in basis points, for cumulative depth (±0.1%, ±0.5%, ±1%)
+DEPTH_BANDS_BPS = (10, 50, 100)
+
+BOOK_FEATURE_NAMES = (
+    ["mid_price", "spread_bps", "microprice", "depth_weighted_mid"]
+    + [f"bid_depth_{b}bps" for b in DEPTH_BANDS_BPS]
+    + [f"ask_depth_{b}bps" for b in DEPTH_BANDS_BPS]
+)
+
+_BANDS = np.array(DEPTH_BANDS_BPS, dtype=np.float64)[:, None] / 10_000
+_N_BANDS = len(DEPTH_BANDS_BPS)
+
+def book_feature_vector(bids, asks, out: np.ndarray | None = None) -> np.ndarray:
+    """
+    Computes BOOK_FEATURE_NAMES, in order, from best-first [price, size]
+    levels (lists or arrays).
+
+    - microprice: best bid and ask weighted by the opposite side's size.
+    - depth_weighted_mid: size-weighted mean price of every level on both sides.
+    - bid/ask_depth_{b}bps: resting notional within b bps of the mid.
+
+    Every value is NaN when either side is empty.
+    """
+    if out is None:
+        out = np.empty(len(BOOK_FEATURE_NAMES), dtype=np.float64)
+    bids = np.asarray(bids, dtype=np.float64)
+    asks = np.asarray(asks, dtype=np.float64)
+    if not len(bids) or not len(asks):
+        out.fill(np.nan)
+        return out
+
+    bid_price, bid_size = bids[:, 0], bids[:, 1]
+    ask_price, ask_size = asks[:, 0], asks[:, 1]
+    best_bid, best_ask = bid_price[0], ask_price[0]
+    mid = (best_bid + best_ask) / 2
+
+    out[0] = mid
+    out[1] = (best_ask - best_bid) / mid * 10_000
+    out[2] = (best_bid * ask_size[0] + best_ask * bid_size[0]) / (bid_size[0] + ask_size[0])
+
+    bid_notional = bid_price * bid_size
+    ask_notional = ask_price * ask_size
+    out[3] = (bid_notional.sum() + ask_notional.sum()) / (bid_size.sum() + ask_size.sum())
+
+    # One (bands x levels) mask per side, reduced against the notionals in a single product
+    out[4:4 + _N_BANDS] = (bid_price >= mid * (1 - _BANDS)) @ bid_notional
+    out[4 + _N_BANDS:] = (ask_price <= mid * (1 + _BANDS)) @ ask_notional
+    return out
+
+def book_features(bids, asks) -> dict:
+    """book_feature_vector as a {name: value} dict."""
+    return dict(zip(BOOK_FEATURE_NAMES, book_feature_vector(bids, asks).tolist()))
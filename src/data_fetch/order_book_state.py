@@ -0,0 +1,192 @@
+# src/data_fetch/order_book_state.py
+from bisect import bisect_left
+from itertools import chain
+import numpy as np
+
+# Depths (number of price levels per side) imbalance is tracked at
+IMBALANCE_DEPTHS = (5, 10, 25, 50)
+# Recompute the running totals from scratch this often to shed float drift
+RESYNC_EVERY_UPDATES = 10_000
+
+class BookSide:
+    """
+    One side of an order book, kept sorted best-first, with the running
+    notional (price * size) of the best N levels for every tracked depth N.
+
+    A full snapshot, which is what ccxt's `watch_order_book` delivers, is
+    kept as a NumPy array and the totals are read off its cumulative
+    notional, with no per-level Python work. A single level change adjusts
+    each total by its delta. An insert or removal also swaps the one level
+    that crosses each depth boundary. An update therefore costs
+    O(len(depths)) plus a bisect, not a rescan of the book.
+    """
+    def __init__(self, descending: bool, depths: tuple[int, ...] = IMBALANCE_DEPTHS):
+        self.descending = descending
+        self.depths = depths
+        self.totals = {depth: 0.0 for depth in depths}
+        self._depths = np.array(depths)
+        self._depth_indexes: dict[int, np.ndarray] = {}
+        self._keys: list[float] = []  # sort keys, best level first
+        self._sizes: dict[float, float] = {}
+        # The last snapshot as [price, size] rows, until a level change needs the sorted keys
+        self._array: np.ndarray | None = None
+
+    def __len__(self):
+        return len(self._array) if self._array is not None else len(self._keys)
+
+    def _materialize(self):
+        """Moves a snapshot array into the sorted keys and sizes that level changes work on."""
+        if self._array is not None:
+            prices, sizes = self._array[:, 0].tolist(), self._array[:, 1].tolist()
+            self._keys = [self._key(price) for price in prices]
+            self._sizes = dict(zip(prices, sizes))
+            self._array = None
+
+    def _key(self, price: float) -> float:
+        return -price if self.descending else price
+
+    def _notional_at(self, index: int) -> float:
+        price = abs(self._keys[index])
+        return price * self._sizes[price]
+
+    def update(self, price: float, size: float):
+        """Sets the size resting at a price; a size of 0 removes the level."""
+        self._materialize()
+        old = self._sizes.get(price)
+        key = self._key(price)
+
+        if size == 0:
+            if old is None:
+                return
+            index = bisect_left(self._keys, key)
+            removed = price * old
+            del self._keys[index]
+            del self._sizes[price]
+            for depth in self.depths:
+                if index < depth:
+                    self.totals[depth] -= removed
+                    if len(self._keys) >= depth:
+                        # The level that was just outside now moves into the top `depth`
+                        self.totals[depth] += self._notional_at(depth - 1)
+
+        elif old is None:
+            index = bisect_left(self._keys, key)
+            self._keys.insert(index, key)
+            self._sizes[price] = size
+            added = price * size
+            for depth in self.depths:
+                if index < depth:
+                    self.totals[depth] += added
+                    if len(self._keys) > depth:
+                        # The previous last level of the top `depth` is pushed out
+                        self.totals[depth] -= self._notional_at(depth)
+
+        elif size != old:
+            index = bisect_left(self._keys, key)
+            self._sizes[price] = size
+            delta = price * (size - old)
+            for depth in self.depths:
+                if index < depth:
+                    self.totals[depth] += delta
+
+    def replace(self, levels):
+        """
+        Replaces the side with a full list of best-first [price, size]
+        levels, as delivered by ccxt's `watch_order_book`, and recomputes
+        every total from the cumulative notional.
+        """
+        if len(levels) and len(levels[0]) == 2:
+            # Several times faster than np.asarray on a short list of pairs
+            array = np.fromiter(chain.from_iterable(levels), np.float64, 2 * len(levels)).reshape(-1, 2)
+        else:
+            array = np.asarray(levels, dtype=np.float64).reshape(len(levels), -1)[:, :2]
+        self._array = array
+        if len(array):
+            cumulative = np.add.accumulate(array[:, 0] * array[:, 1])
+            self.totals = dict(zip(self.depths, cumulative.take(self._depth_index(len(array))).tolist()))
+        else:
+            self.totals = {depth: 0.0 for depth in self.depths}
+
+    def _depth_index(self, length: int) -> np.ndarray:
+        """Index of the last level inside each depth, for a side `length` levels long."""
+        index = self._depth_indexes.get(length)
+        if index is None:
+            index = self._depth_indexes[length] = np.minimum(self._depths, length) - 1
+        return index
+
+    def changes(self, levels) -> list[tuple[float, float]]:
+        """The (price, size) changes that turn this side into `levels`; a size of 0 is a removed level."""
+        current = dict(self.levels())
+        incoming = {level[0]: level[1] for level in levels}
+        changes = [(price, 0) for price in current if price not in incoming]
+        changes += [(price, size) for price, size in incoming.items() if current.get(price) != size]
+        return changes
+
+    def resync(self):
+        """Recomputes every total exactly from the stored levels."""
+        if self._array is not None:
+            # Snapshot totals are computed exactly
+            return
+        for depth in self.depths:
+            self.totals[depth] = sum(self._notional_at(i) for i in range(min(depth, len(self._keys))))
+
+    def levels(self) -> list[list[float]]:
+        """Returns [price, size] pairs, best first."""
+        if self._array is not None:
+            return self._array.tolist()
+        return [[abs(key), self._sizes[abs(key)]] for key in self._keys]
+
+    def array(self) -> np.ndarray:
+        """The levels as a (levels x 2) float array, best first."""
+        if self._array is not None:
+            return self._array
+        return np.array(self.levels(), dtype=np.float64).reshape(-1, 2)
+
+class OrderBookState:
+    """Both sides of a symbol's book plus the imbalance features derived from them."""
+    def __init__(self, depths: tuple[int, ...] = IMBALANCE_DEPTHS):
+        self.depths = depths
+        self.bids = BookSide(descending=True, depths=depths)
+        self.asks = BookSide(descending=False, depths=depths)
+        self._updates = 0
+
+    def _count(self, updates: int = 1):
+        self._updates += updates
+        if self._updates >= RESYNC_EVERY_UPDATES:
+            self.bids.resync()
+            self.asks.resync()
+            self._updates = 0
+
+    def apply_delta(self, side: str, price: float, size: float):
+        """Applies one level change; `side` is 'bids' or 'asks'."""
+        (self.bids if side == "bids" else self.asks).update(price, size)
+        self._count()
+
+    def apply_snapshot(self, bids: list, asks: list, diff: bool = False) -> tuple[list, list] | None:
+        """
+        Replaces both sides with a full book as returned by ccxt. With
+        `diff`, first works out and returns the (bid, ask) level changes
+        from the previous book, e.g. for the tick recorder; that costs a
+        Python pass over the levels, so the live path only asks for it
+        while recording.
+        """
+        changes = (self.bids.changes(bids), self.asks.changes(asks)) if diff else None
+        self.bids.replace(bids)
+        self.asks.replace(asks)
+        # The totals are exact again
+        self._updates = 0
+        return changes
+
+    def imbalance(self, depth: int) -> float:
+        """
+        Order Book Imbalance over the best `depth` levels per side, in [-1, 1].
+        A value > 0 means more buy pressure; < 0 means more sell pressure.
+        """
+        bid_total = self.bids.totals[depth]
+        ask_total = self.asks.totals[depth]
+        total = bid_total + ask_total
+        return (bid_total - ask_total) / total if total > 0 else 0.0
+
+    def features(self) -> dict:
+        """Imbalance at every tracked depth, keyed `order_book_imbalance_{depth}`."""
+        return {f"order_book_imbalance_{depth}": round(self.imbalance(depth), 4) for depth in self.depths}
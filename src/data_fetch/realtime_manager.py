@@ -1,18 +1,32 @@
 # src/data_fetch/realtime_manager.py
 import ccxt.pro
+import time
 import asyncio
 import logging
-import json
-import os
-from collections import deque
+import argparse
 from datetime import datetime, timezone
 from ..shared.constants import SYMBOLS # Using your existing symbols
+from .order_book_state import OrderBookState
+from .rolling_window import RollingTakerVolume
+from .microstructure import BOOK_FEATURE_NAMES, book_features as microstructure_features
+from .feature_bus import FeatureBusWriter, FeatureBusReader, FEATURE_BUS_PATH
+from .tick_recorder import TickRecorder, TickReader, FLUSH_SECONDS
+from .realtime_metrics import RealtimeMetrics, REALTIME_METRICS_PATH, loop_lag_probe, metrics_loop
 
 # --- Configuration ---
-REALTIME_FEATURES_PATH = "/workspace/data/realtime_features.json"
 # CORRECTED: Changed depth from 25 to 50, which is a valid limit for Bybit's API.
 ORDER_BOOK_DEPTH = 50 
 TAKER_TRADE_WINDOW_SECONDS = 60 # Analyze taker trades over the last minute
+# All taker windows tracked; TAKER_TRADE_WINDOW_SECONDS feeds 'taker_buy_sell_ratio'
+TAKER_WINDOWS_SECONDS = (10, TAKER_TRADE_WINDOW_SECONDS, 300)
+# Most symbols per multiplexed book/trades subscription
+SUBSCRIPTION_BATCH_SIZE = 50
+# Every feature published on the shared-memory feature bus
+REALTIME_FEATURE_NAMES = (
+    ['order_book_imbalance'] + list(OrderBookState().features()) + BOOK_FEATURE_NAMES
+    + ['taker_buy_sell_ratio'] + list(RollingTakerVolume(TAKER_WINDOWS_SECONDS).features())
+    + list(RollingTakerVolume(TAKER_WINDOWS_SECONDS).vwap_features())
+)
 
 # --- Logging Setup ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(name)s] %(levelname)s: %(message)s')
@@ -21,37 +35,71 @@ logger = logging.getLogger("RealtimeManager")
 # --- Global State (In-memory) ---
 # This will hold the latest calculated features for all symbols
 realtime_features = {symbol: {} for symbol in SYMBOLS}
+# Set in main(); consumers read it through feature_bus.FeatureBusReader
+feature_bus: FeatureBusWriter | None = None
+# Set in main() when raw messages are captured for replay
+tick_recorder: TickRecorder | None = None
+# Set in main(); message rates, latency and loop lag
+metrics: RealtimeMetrics | None = None
+
+def publish_features(symbol: str, values: dict):
+    """Updates the in-memory state and pushes the values onto the feature bus."""
+    realtime_features.setdefault(symbol, {}).update(values)
+    if feature_bus is not None:
+        feature_bus.publish(symbol, values)
 
 # --- Feature Calculation Logic ---
 
+def book_features(book: OrderBookState) -> dict:
+    """Imbalance from the book's totals plus the vectorized microstructure features of its level arrays."""
+    return {
+        'order_book_imbalance': round(book.imbalance(ORDER_BOOK_DEPTH), 4),
+        **book.features(),
+        **microstructure_features(book.bids.array(), book.asks.array()),
+    }
+
+def taker_features(taker_volume: RollingTakerVolume) -> dict:
+    return {
+        'taker_buy_sell_ratio': round(taker_volume.ratio(TAKER_TRADE_WINDOW_SECONDS), 4),
+        **taker_volume.features(),
+        **taker_volume.vwap_features(),
+    }
+
+def handle_order_book(symbol: str, book: OrderBookState, orderbook: dict):
+    """Applies one order book update for a symbol and publishes its book features."""
+    bids = orderbook['bids']
+    asks = orderbook['asks']
+    if not bids or not asks:
+        return
+
+    changes = book.apply_snapshot(bids, asks, diff=tick_recorder is not None)
+    if tick_recorder is not None:
+        tick_recorder.record_book(symbol, book, *changes)
+    publish_features(symbol, book_features(book))
+    if metrics is not None:
+        metrics.observe(symbol, 'book', orderbook.get('timestamp'))
+    realtime_features[symbol]['last_update_utc'] = datetime.now(timezone.utc).isoformat()
+
+def handle_trades(symbol: str, taker_volume: RollingTakerVolume, trades: list):
+    """Adds a batch of public trades for a symbol and publishes its taker volume features."""
+    for trade in trades:
+        taker_volume.add(trade['timestamp'], trade['side'], trade['cost'], trade['amount'])
+
+    if tick_recorder is not None:
+        tick_recorder.record_trades(symbol, trades)
+    publish_features(symbol, taker_features(taker_volume))
+    if metrics is not None and trades:
+        metrics.observe(symbol, 'trades', trades[-1]['timestamp'])
+
 async def order_book_loop(exchange, symbol):
     """Continuously processes order book data to calculate imbalance."""
     logger.info(f"Starting order book loop for {symbol}...")
+    # Running per-depth notional totals, updated only from the levels that change
+    book = OrderBookState()
     while True:
         try:
             orderbook = await exchange.watch_order_book(symbol + 'USDT', ORDER_BOOK_DEPTH)
-            bids = orderbook['bids']
-            asks = orderbook['asks']
-
-            if not bids or not asks:
-                continue
-
-            # Calculate total volume for bids and asks
-            total_bid_volume = sum([price * size for price, size in bids])
-            total_ask_volume = sum([price * size for price, size in asks])
-            
-            # Calculate Order Book Imbalance (OBI)
-            # A value > 0 means more buy pressure; < 0 means more sell pressure
-            total_volume = total_bid_volume + total_ask_volume
-            if total_volume > 0:
-                imbalance = (total_bid_volume - total_ask_volume) / total_volume
-            else:
-                imbalance = 0.0
-            
-            # Update the global features state
-            realtime_features[symbol]['order_book_imbalance'] = round(imbalance, 4)
-            realtime_features[symbol]['last_update_utc'] = datetime.now(timezone.utc).isoformat()
-
+            handle_order_book(symbol, book, orderbook)
         except Exception as e:
             logger.error(f"Error in order book loop for {symbol}: {e}", exc_info=True)
             await asyncio.sleep(5) # Wait before retrying
@@ -59,70 +107,191 @@ async def order_book_loop(exchange, symbol):
 async def trades_loop(exchange, symbol):
     """Continuously processes public trades to calculate taker volume ratio."""
     logger.info(f"Starting trades loop for {symbol}...")
-    # Use a deque to store recent trades efficiently
-    recent_trades = deque()
+    # Running buy/sell sums per window, evicted on exchange trade time
+    taker_volume = RollingTakerVolume(TAKER_WINDOWS_SECONDS)
 
     while True:
         try:
             trades = await exchange.watch_trades(symbol + 'USDT')
-            now = datetime.now(timezone.utc)
-            
-            for trade in trades:
-                trade['timestamp_dt'] = now
-                recent_trades.append(trade)
-
-            # Remove old trades that are outside our time window
-            while recent_trades and (now - recent_trades[0]['timestamp_dt']).total_seconds() > TAKER_TRADE_WINDOW_SECONDS:
-                recent_trades.popleft()
+            handle_trades(symbol, taker_volume, trades)
+        except Exception as e:
+            logger.error(f"Error in trades loop for {symbol}: {e}", exc_info=True)
+            await asyncio.sleep(5)
 
-            # Calculate taker buy/sell volume
-            taker_buy_volume = sum(t['cost'] for t in recent_trades if t['side'] == 'buy')
-            taker_sell_volume = sum(t['cost'] for t in recent_trades if t['side'] == 'sell')
+# --- Multiplexed Subscriptions ---
 
-            # Calculate Taker Buy/Sell Ratio
-            # A value > 1 means more aggressive buying; < 1 means more aggressive selling
-            if taker_sell_volume > 0:
-                taker_ratio = taker_buy_volume / taker_sell_volume
-            else:
-                taker_ratio = taker_buy_volume # Avoid division by zero
+def supports_multiplexing(exchange) -> bool:
+    """True if the exchange can stream books and trades for many symbols per subscription."""
+    return bool(exchange.has.get('watchOrderBookForSymbols') and exchange.has.get('watchTradesForSymbols'))
 
-            # Update the global features state
-            realtime_features[symbol]['taker_buy_sell_ratio'] = round(taker_ratio, 4)
+async def _symbol_lookup(exchange, symbols: list[str]) -> dict:
+    """Maps the market symbols ccxt puts on updates (e.g. 'BTC/USDT:USDT') back to our coins."""
+    await exchange.load_markets()
+    lookup = {}
+    for symbol in symbols:
+        pair = symbol + 'USDT'
+        lookup[pair] = symbol
+        if pair in exchange.markets_by_id or pair in exchange.markets:
+            lookup[exchange.market(pair)['symbol']] = symbol
+    return lookup
 
+async def order_book_dispatch_loop(exchange, symbols: list[str]):
+    """Streams the books of many symbols over one subscription and routes each update."""
+    logger.info(f"Starting multiplexed order book loop for {len(symbols)} symbols...")
+    lookup = await _symbol_lookup(exchange, symbols)
+    books = {symbol: OrderBookState() for symbol in symbols}
+    pairs = [symbol + 'USDT' for symbol in symbols]
+    while True:
+        try:
+            orderbook = await exchange.watch_order_book_for_symbols(pairs, ORDER_BOOK_DEPTH)
+            symbol = lookup.get(orderbook['symbol'])
+            if symbol is None:
+                logger.warning(f"Order book update for unexpected market {orderbook['symbol']}")
+                continue
+            handle_order_book(symbol, books[symbol], orderbook)
         except Exception as e:
-            logger.error(f"Error in trades loop for {symbol}: {e}", exc_info=True)
+            logger.error(f"Error in multiplexed order book loop: {e}", exc_info=True)
             await asyncio.sleep(5)
 
-async def save_features_loop():
-    """Periodically saves the calculated features to a file."""
-    logger.info(f"Starting feature save loop. Output file: {REALTIME_FEATURES_PATH}")
+async def trades_dispatch_loop(exchange, symbols: list[str]):
+    """Streams the trades of many symbols over one subscription and routes each batch."""
+    logger.info(f"Starting multiplexed trades loop for {len(symbols)} symbols...")
+    lookup = await _symbol_lookup(exchange, symbols)
+    volumes = {symbol: RollingTakerVolume(TAKER_WINDOWS_SECONDS) for symbol in symbols}
+    pairs = [symbol + 'USDT' for symbol in symbols]
     while True:
-        await asyncio.sleep(10) # Save every 10 seconds
         try:
-            # Ensure the directory exists
-            os.makedirs(os.path.dirname(REALTIME_FEATURES_PATH), exist_ok=True)
-            with open(REALTIME_FEATURES_PATH, 'w') as f:
-                json.dump(realtime_features, f, indent=4)
+            trades = await exchange.watch_trades_for_symbols(pairs)
+            by_symbol = {}
+            for trade in trades:
+                by_symbol.setdefault(lookup.get(trade['symbol']), []).append(trade)
+            for symbol, batch in by_symbol.items():
+                if symbol is None:
+                    logger.warning(f"Trades for unexpected market {batch[0]['symbol']}")
+                    continue
+                handle_trades(symbol, volumes[symbol], batch)
         except Exception as e:
-            logger.error(f"Failed to save features to file: {e}")
+            logger.error(f"Error in multiplexed trades loop: {e}", exc_info=True)
+            await asyncio.sleep(5)
+
+async def tick_flush_loop():
+    """Pushes recorded messages of symbols that went quiet to disk."""
+    while True:
+        await asyncio.sleep(FLUSH_SECONDS)
+        tick_recorder.flush_stale()
+
+# --- Replay ---
+
+def replay_ticks(symbol: str, start=None, end=None, reader: TickReader | None = None, speed: float | None = None):
+    """
+    Feeds recorded messages for a symbol back through the live feature code.
+    Yields (recv_ms, features) after every message, where `features` holds
+    the latest value of every feature, as the live manager would have
+    published it. `speed=None` replays as fast as possible; `speed=10`
+    paces messages at ten times real time.
+    """
+    book = OrderBookState()
+    taker_volume = RollingTakerVolume(TAKER_WINDOWS_SECONDS)
+    features = {}
+    first_recv_ms = started = None
+
+    for message in (reader or TickReader()).messages(symbol, start, end):
+        kind, recv_ms = message[0], message[1]
+        if speed:
+            if first_recv_ms is None:
+                first_recv_ms, started = recv_ms, time.monotonic()
+            wait = (recv_ms - first_recv_ms) / 1000 / speed - (time.monotonic() - started)
+            if wait > 0:
+                time.sleep(wait)
+
+        if kind == 's':
+            book.apply_snapshot(message[2], message[3])
+            features.update(book_features(book))
+        elif kind == 'd':
+            for price, size in message[2]:
+                book.apply_delta('bids', price, size)
+            for price, size in message[3]:
+                book.apply_delta('asks', price, size)
+            features.update(book_features(book))
+        elif kind == 't':
+            for timestamp, side, _price, amount, cost in message[2]:
+                taker_volume.add(timestamp, side, cost, amount)
+            features.update(taker_features(taker_volume))
+        yield recv_ms, dict(features)
 
-async def main():
-    """Main function to initialize exchange and start all loops."""
+def build_tasks(exchange, symbols: list[str], mode: str = 'auto') -> list:
+    """
+    Creates the stream coroutines for a set of symbols.
+
+    'per-symbol' opens a book and a trades subscription for every symbol.
+    'multiplexed' opens one of each per SUBSCRIPTION_BATCH_SIZE symbols.
+    'auto' multiplexes when the exchange supports it.
+    """
+    if mode == 'auto':
+        mode = 'multiplexed' if supports_multiplexing(exchange) else 'per-symbol'
+
+    if mode == 'per-symbol':
+        tasks = []
+        for symbol in symbols:
+            tasks.append(order_book_loop(exchange, symbol))
+            tasks.append(trades_loop(exchange, symbol))
+        return tasks
+
+    tasks = []
+    for i in range(0, len(symbols), SUBSCRIPTION_BATCH_SIZE):
+        batch = symbols[i:i + SUBSCRIPTION_BATCH_SIZE]
+        tasks.append(order_book_dispatch_loop(exchange, batch))
+        tasks.append(trades_dispatch_loop(exchange, batch))
+    return tasks
+
+async def main(symbols: list[str] = SYMBOLS, mode: str = 'auto', bus_symbols: list[str] | None = None,
+               record: bool = False, metrics_path: str = REALTIME_METRICS_PATH, bus_path: str = FEATURE_BUS_PATH):
+    """
+    Main function to initialize exchange and start all loops.
+
+    `bus_symbols` is the full symbol list of a shared feature bus when this
+    process only streams a shard of it (see realtime_supervisor). With
+    `record`, raw book deltas and trades are captured for replay_ticks.
+    Stream and loop health is written to `metrics_path`, features to the
+    bus at `bus_path`.
+    """
+    global feature_bus, tick_recorder, metrics
     exchange = ccxt.pro.bybit({'options': {'defaultType': 'swap'}})
-    
-    tasks = [save_features_loop()]
-    for symbol in SYMBOLS:
-        tasks.append(order_book_loop(exchange, symbol))
-        tasks.append(trades_loop(exchange, symbol))
-        
-    logger.info(f"Starting real-time feature manager for symbols: {SYMBOLS}")
-    await asyncio.gather(*tasks)
-    
-    # This part is important for proper shutdown
-    await exchange.close()
+    feature_bus = FeatureBusWriter(bus_symbols or symbols, REALTIME_FEATURE_NAMES, path=bus_path)
+    logger.info(f"Publishing realtime features to {bus_path}")
+
+    metrics = RealtimeMetrics()
+    # Feature ages come from the bus's own per-feature publish stamps
+    bus_reader = FeatureBusReader(bus_path)
+
+    def feature_updated_at():
+        return {symbol: bus_reader.updated_at(symbol) for symbol in symbols}
+
+    tasks = build_tasks(exchange, symbols, mode)
+    tasks += [loop_lag_probe(metrics), metrics_loop(metrics, metrics_path, feature_updated_at)]
+    if record:
+        tick_recorder = TickRecorder()
+        tasks.append(tick_flush_loop())
+        logger.info(f"Recording raw ticks to {tick_recorder.root}")
+    logger.info(f"Starting real-time feature manager ({len(tasks)} streams) for symbols: {symbols}")
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        # This part is important for proper shutdown
+        await exchange.close()
+        feature_bus.close()
+        bus_reader.close()
+        if tick_recorder is not None:
+            tick_recorder.close()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream realtime microstructure features.")
+    parser.add_argument("--mode", choices=["auto", "multiplexed", "per-symbol"], default="auto",
+                        help="Subscription layout. 'auto' multiplexes when the exchange supports it.")
+    parser.add_argument("--symbols", nargs="+", default=SYMBOLS)
+    parser.add_argument("--record", action="store_true", help="Capture raw book deltas and trades for replay.")
+    args = parser.parse_args()
     try:
-        asyncio.run(main())
+        asyncio.run(main(args.symbols, args.mode, record=args.record))
     except KeyboardInterrupt:
-        logger.info("Shutdown signal received. Exiting.")
\ No newline at end of file
+        logger.info("Shutdown signal received. Exiting.")
@@ -0,0 +1,164 @@
+# src/data_fetch/realtime_metrics.py
+"""
+Health metrics for the realtime feature manager.
+
+- Per symbol and stream ('book', 'trades'): message counts and rate, and a
+  histogram of exchange-timestamp-to-processed latency.
+- Event loop lag: how late a periodic probe wakes up compared to schedule.
+- Feature staleness: seconds since each feature was last published.
+
+Recording is a few integer updates per message. Everything is summarised
+and written atomically to a JSON file, one per process, for dashboards and
+for deciding when to shard or drop symbols.
+"""
+import os
+import json
+import time
+import asyncio
+import logging
+from bisect import bisect_left
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+REALTIME_METRICS_PATH = "/workspace/data/realtime_metrics.json"
+METRICS_INTERVAL_SECONDS = 10.0
+LOOP_LAG_PROBE_SECONDS = 0.25
+# Upper bounds of the latency histogram buckets, in ms; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of millisecond values."""
+    def __init__(self, buckets_ms: tuple = LATENCY_BUCKETS_MS):
+        self.bounds = buckets_ms
+        self.counts = [0] * (len(buckets_ms) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value_ms: float):
+        # Exchange clocks can run slightly ahead of ours; count that as zero latency
+        value_ms = max(value_ms, 0.0)
+        self.counts[bisect_left(self.bounds, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        if value_ms > self.max:
+            self.max = value_ms
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bound of the bucket holding the q-quantile (the max for the open bucket)."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return float(self.bounds[i]) if i < len(self.bounds) else self.max
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 3) if self.count else None,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "max": round(self.max, 3),
+            "buckets": {f"le_{b}": c for b, c in zip(self.bounds, self.counts)} | {"inf": self.counts[-1]},
+        }
+
+class _StreamStats:
+    def __init__(self):
+        self.messages = 0
+        self.latency = LatencyHistogram()
+        self.last_seen_ms = None
+        self._reported_messages = 0
+
+class RealtimeMetrics:
+    """Collects stream and event loop metrics for one realtime manager process."""
+    def __init__(self):
+        self.started = time.monotonic()
+        self._streams: dict[tuple[str, str], _StreamStats] = {}
+        self.loop_lag = LatencyHistogram()
+        self.last_loop_lag_ms = 0.0
+        self._reported_at = self.started
+
+    def observe(self, symbol: str, stream: str, exchange_ms: int | None, now_ms: int | None = None):
+        """Counts one processed message; `exchange_ms` is the exchange's timestamp for it, if any."""
+        stats = self._streams.get((symbol, stream))
+        if stats is None:
+            stats = self._streams[(symbol, stream)] = _StreamStats()
+        stats.messages += 1
+        now_ms = now_ms or time.time() * 1000
+        stats.last_seen_ms = now_ms
+        if exchange_ms:
+            stats.latency.observe(now_ms - exchange_ms)
+
+    def observe_loop_lag(self, lag_ms: float):
+        self.last_loop_lag_ms = lag_ms
+        self.loop_lag.observe(lag_ms)
+
+    def snapshot(self, feature_updated_at: dict | None = None, now: float | None = None) -> dict:
+        """
+        Summarises everything recorded so far. Message rates cover the time
+        since the previous snapshot. `feature_updated_at` maps symbol ->
+        {feature: epoch seconds} and becomes per-feature ages.
+        """
+        now = now or time.time()
+        monotonic_now = time.monotonic()
+        elapsed = max(monotonic_now - self._reported_at, 1e-9)
+        self._reported_at = monotonic_now
+
+        symbols = {}
+        for (symbol, stream), stats in sorted(self._streams.items()):
+            rate = (stats.messages - stats._reported_messages) / elapsed
+            stats._reported_messages = stats.messages
+            symbols.setdefault(symbol, {})[stream] = {
+                "messages": stats.messages,
+                "messages_per_second": round(rate, 2),
+                "seconds_since_last_message": round(now - stats.last_seen_ms / 1000, 3),
+                "latency_ms": stats.latency.summary(),
+            }
+        for symbol, stamps in (feature_updated_at or {}).items():
+            symbols.setdefault(symbol, {})["feature_age_seconds"] = {
+                name: round(now - stamp, 3) for name, stamp in stamps.items()
+            }
+
+        return {
+            "generated_at": datetime.fromtimestamp(now, tz=timezone.utc).isoformat(),
+            "uptime_seconds": round(monotonic_now - self.started, 1),
+            "loop_lag_ms": {"last": round(self.last_loop_lag_ms, 3), **self.loop_lag.summary()},
+            "symbols": symbols,
+        }
+
+    def write(self, path: str, feature_updated_at: dict | None = None):
+        """Writes a snapshot to `path` atomically."""
+        snapshot = self.snapshot(feature_updated_at)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f, indent=4)
+        os.replace(tmp_path, path)
+
+async def loop_lag_probe(metrics: RealtimeMetrics, interval: float = LOOP_LAG_PROBE_SECONDS):
+    """Sleeps for `interval` repeatedly and records how late each wake-up is."""
+    loop = asyncio.get_running_loop()
+    while True:
+        scheduled = loop.time() + interval
+        await asyncio.sleep(interval)
+        metrics.observe_loop_lag((loop.time() - scheduled) * 1000)
+
+async def metrics_loop(metrics: RealtimeMetrics, path: str = REALTIME_METRICS_PATH,
+                       feature_updated_at=None, interval: float = METRICS_INTERVAL_SECONDS):
+    """
+    Writes the metrics file every `interval` seconds. `feature_updated_at`
+    is an optional callable returning {symbol: {feature: epoch seconds}}.
+    """
+    logger.info(f"Writing realtime metrics to {path} every {interval:.0f}s")
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            metrics.write(path, feature_updated_at() if feature_updated_at else None)
+        except Exception as e:
+            logger.error(f"Failed to write realtime metrics: {e}")
@@ -0,0 +1,157 @@
+# src/data_fetch/realtime_supervisor.py
+"""
+Runs the realtime feature manager as several worker processes.
+
+SYMBOLS is split into shards. Each shard runs `realtime_manager.main` in
+its own process, with its own exchange connection and event loop. Every
+worker publishes into the same feature bus, which the supervisor creates
+up front with the full symbol list. Bus rows are per symbol, so the
+shards never write the same memory. Crashed workers are restarted with
+exponential backoff.
+
+    python -m src.data_fetch.realtime_supervisor --shards 4
+"""
+import os
+import time
+import signal
+import asyncio
+import logging
+import argparse
+import multiprocessing
+from ..shared.constants import SYMBOLS
+from .feature_bus import FeatureBusWriter, FEATURE_BUS_PATH
+from .realtime_metrics import REALTIME_METRICS_PATH
+from . import realtime_manager
+
+logger = logging.getLogger("RealtimeSupervisor")
+
+# Seconds between liveness checks
+CHECK_INTERVAL_SECONDS = 2.0
+# Restart delay doubles per consecutive crash, up to the maximum
+RESTART_BACKOFF_SECONDS = 1.0
+MAX_RESTART_BACKOFF_SECONDS = 60.0
+# A worker that stayed up this long is considered healthy again
+STABLE_RUN_SECONDS = 300.0
+
+def shard_symbols(symbols: list[str], shards: int) -> list[list[str]]:
+    """Splits symbols round-robin into at most `shards` non-empty groups."""
+    shards = max(1, min(shards, len(symbols)))
+    return [symbols[i::shards] for i in range(shards)]
+
+def shard_metrics_path(index: int) -> str:
+    """Each shard writes its own metrics file next to the single-process one."""
+    root, ext = os.path.splitext(REALTIME_METRICS_PATH)
+    return f"{root}_shard{index}{ext}"
+
+def run_shard(symbols: list[str], mode: str, bus_symbols: list[str], record: bool = False,
+              metrics_path: str = REALTIME_METRICS_PATH, bus_path: str = FEATURE_BUS_PATH):
+    """Worker process entry point: streams one shard until stopped."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the supervisor handles Ctrl+C
+    asyncio.run(_run_until_terminated(realtime_manager.main(symbols, mode, bus_symbols=bus_symbols, record=record,
+                                                            metrics_path=metrics_path, bus_path=bus_path)))
+
+async def _run_until_terminated(coro):
+    """
+    Runs `coro` until it returns or SIGTERM arrives. The signal cancels it,
+    so its cleanup (closing the exchange, the bus and the tick recorder,
+    which flushes buffered ticks) runs before the process exits.
+    """
+    task = asyncio.ensure_future(coro)
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+    try:
+        await task
+    except asyncio.CancelledError:
+        logger.info("Shard stopped.")
+
+class _Shard:
+    def __init__(self, index: int, symbols: list[str]):
+        self.index = index
+        self.symbols = symbols
+        self.process: multiprocessing.Process | None = None
+        self.started_at = 0.0
+        self.restarts = 0
+        self.crashes = 0  # consecutive, reset after a stable run
+        self.restart_at = 0.0
+
+class RealtimeSupervisor:
+    """Starts, watches and restarts the shard worker processes."""
+    def __init__(self, symbols: list[str] = SYMBOLS, shards: int | None = None, mode: str = 'auto',
+                 bus_path: str = FEATURE_BUS_PATH, record: bool = False, target=run_shard):
+        self.symbols = list(symbols)
+        self.mode = mode
+        self.record = record
+        self.bus_path = bus_path
+        self.target = target
+        self.shards = [_Shard(i, group) for i, group in enumerate(shard_symbols(self.symbols, shards or os.cpu_count() or 1))]
+        self._stopping = False
+
+    def _spawn(self, shard: _Shard):
+        shard.process = multiprocessing.Process(
+            target=self.target,
+            args=(shard.symbols, self.mode, self.symbols, self.record, shard_metrics_path(shard.index), self.bus_path),
+            name=f"realtime-shard-{shard.index}", daemon=True,
+        )
+        shard.process.start()
+        shard.started_at = time.monotonic()
+        logger.info(f"Started shard {shard.index} (pid {shard.process.pid}) for {shard.symbols}")
+
+    def start(self):
+        # Create the bus with every symbol first, so the workers attach to it instead of replacing it
+        FeatureBusWriter(self.symbols, realtime_manager.REALTIME_FEATURE_NAMES, path=self.bus_path).close()
+        for shard in self.shards:
+            self._spawn(shard)
+
+    def check(self):
+        """Restarts any worker that exited, once its backoff has elapsed."""
+        now = time.monotonic()
+        for shard in self.shards:
+            process = shard.process
+            if process is None or process.is_alive():
+                continue
+
+            if shard.restart_at == 0.0:
+                ran_for = now - shard.started_at
+                shard.crashes = 1 if ran_for >= STABLE_RUN_SECONDS else shard.crashes + 1
+                delay = min(RESTART_BACKOFF_SECONDS * 2 ** (shard.crashes - 1), MAX_RESTART_BACKOFF_SECONDS)
+                shard.restart_at = now + delay
+                logger.error(f"Shard {shard.index} exited with code {process.exitcode} after {ran_for:.0f}s; "
+                             f"restarting in {delay:.0f}s.")
+
+            if now >= shard.restart_at:
+                shard.restart_at = 0.0
+                shard.restarts += 1
+                self._spawn(shard)
+
+    def stop(self, timeout: float = 10.0):
+        self._stopping = True
+        for shard in self.shards:
+            if shard.process is not None and shard.process.is_alive():
+                shard.process.terminate()
+        for shard in self.shards:
+            if shard.process is not None:
+                shard.process.join(timeout)
+                if shard.process.is_alive():
+                    shard.process.kill()
+        logger.info("All shards stopped.")
+
+    def run(self):
+        """Runs until SIGINT/SIGTERM, restarting crashed shards."""
+        signal.signal(signal.SIGTERM, lambda *_: setattr(self, "_stopping", True))
+        self.start()
+        try:
+            while not self._stopping:
+                time.sleep(CHECK_INTERVAL_SECONDS)
+                self.check()
+        except KeyboardInterrupt:
+            logger.info("Shutdown signal received.")
+        finally:
+            self.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the realtime feature manager across worker processes.")
+    parser.add_argument("--shards", type=int, default=os.cpu_count(), help="Number of worker processes.")
+    parser.add_argument("--mode", choices=["auto", "multiplexed", "per-symbol"], default="auto")
+    parser.add_argument("--symbols", nargs="+", default=SYMBOLS)
+    parser.add_argument("--record", action="store_true", help="Capture raw book deltas and trades for replay.")
+    args = parser.parse_args()
+    RealtimeSupervisor(args.symbols, args.shards, args.mode, record=args.record).run()
@@ -0,0 +1,88 @@
+# src/data_fetch/rolling_window.py
+import math
+from bisect import bisect_right
+from collections import deque
+
+class RollingTakerVolume:
+    """
+    Taker buy/sell cost and traded amount over several trailing time windows
+    at once.
+
+    Each window keeps its trades in a deque plus running buy, sell and amount sums.
+    The sums are adjusted when a trade is appended and when it is evicted,
+    so every update is O(1) amortized however many trades a window holds.
+    Eviction is keyed on exchange trade time, not on when a message was
+    received, so network jitter doesn't stretch or shrink the windows. A
+    trade that arrives out of order is inserted in time order, so it is
+    evicted on time rather than held back by newer trades ahead of it.
+    """
+    def __init__(self, windows_seconds: tuple[int, ...] = (60,)):
+        self.windows = tuple(sorted(windows_seconds))
+        self._trades = {w: deque() for w in self.windows}
+        self._buy = {w: 0.0 for w in self.windows}
+        self._sell = {w: 0.0 for w in self.windows}
+        self._amount = {w: 0.0 for w in self.windows}
+        self.latest_ms = 0
+
+    def add(self, timestamp_ms: int, side: str, cost: float, amount: float = 0.0):
+        """Adds one trade; `side` is the taker side, 'buy' or 'sell'."""
+        self.latest_ms = max(self.latest_ms, timestamp_ms)
+        entry = (timestamp_ms, side == "buy", cost, amount)
+        for window in self.windows:
+            # A late trade that already fell outside this window is not counted
+            if timestamp_ms < self.latest_ms - window * 1000:
+                continue
+            trades = self._trades[window]
+            if trades and timestamp_ms < trades[-1][0]:
+                # Late trades land near the tail, so this rarely moves much
+                trades.insert(bisect_right(trades, timestamp_ms, key=lambda trade: trade[0]), entry)
+            else:
+                trades.append(entry)
+            if entry[1]:
+                self._buy[window] += cost
+            else:
+                self._sell[window] += cost
+            self._amount[window] += amount
+        self._evict()
+
+    def _evict(self):
+        for window in self.windows:
+            trades = self._trades[window]
+            cutoff = self.latest_ms - window * 1000
+            while trades and trades[0][0] < cutoff:
+                _, is_buy, cost, amount = trades.popleft()
+                if is_buy:
+                    self._buy[window] -= cost
+                else:
+                    self._sell[window] -= cost
+                self._amount[window] -= amount
+            if not trades:
+                # Reset exactly so float error can't build up over quiet periods
+                self._buy[window] = self._sell[window] = self._amount[window] = 0.0
+
+    def buy_volume(self, window: int) -> float:
+        return self._buy[window]
+
+    def sell_volume(self, window: int) -> float:
+        return self._sell[window]
+
+    def ratio(self, window: int) -> float:
+        """
+        Taker Buy/Sell Ratio. A value > 1 means more aggressive buying;
+        < 1 means more aggressive selling.
+        """
+        buy, sell = self._buy[window], self._sell[window]
+        return buy / sell if sell > 0 else buy  # Avoid division by zero
+
+    def vwap(self, window: int) -> float:
+        """Volume-weighted average trade price over the window; NaN if nothing traded."""
+        amount = self._amount[window]
+        return (self._buy[window] + self._sell[window]) / amount if amount > 0 else math.nan
+
+    def vwap_features(self) -> dict:
+        """The VWAP for every window, keyed `vwap_{window}s`."""
+        return {f"vwap_{w}s": self.vwap(w) for w in self.windows}
+
+    def features(self) -> dict:
+        """The ratio for every window, keyed `taker_buy_sell_ratio_{window}s`."""
+        return {f"taker_buy_sell_ratio_{w}s": round(self.ratio(w), 4) for w in self.windows}
@@ -0,0 +1,218 @@
+# src/data_fetch/tick_recorder.py
+"""
+Append-only capture of the raw realtime stream, for rebuilding features
+historically.
+
+Messages are kept one file per symbol per UTC hour:
+
+    {root}/{symbol}USDT/{YYYY-MM-DD}/{HH}.ticks
+
+A file is a sequence of chunks: a 4-byte little-endian length, then a
+zlib-compressed block of newline-separated JSON messages. A crash can only
+lose or truncate the last chunk, and readers stop cleanly at a truncated
+tail. Each message is a list whose first two items are the kind and the
+local receive time in ms:
+
+    ["s", recv_ms, bids, asks]           full book (first message of a file)
+    ["d", recv_ms, bid_changes, ask_changes]   book deltas, size 0 = removed
+    ["t", recv_ms, [[timestamp, side, price, amount, cost], ...]]   trades
+
+The event loop only encodes and buffers messages. Compression and disk I/O
+run on a background thread, so recording never blocks the stream.
+"""
+import os
+import json
+import time
+import zlib
+import queue
+import struct
+import logging
+import threading
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+TICK_CAPTURE_PATH = "/workspace/data/ticks"
+# A chunk is compressed and handed to the writer at this many raw bytes...
+CHUNK_BYTES = 256 * 1024
+# ...or when its oldest message is this old, whichever comes first
+FLUSH_SECONDS = 5.0
+COMPRESSION_LEVEL = 3
+CHUNK_HEADER = struct.Struct("<I")
+HOUR_MS = 3_600_000
+
+def _hour_key(ms: int) -> tuple[str, str]:
+    moment = datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+    return moment.strftime("%Y-%m-%d"), moment.strftime("%H")
+
+def _to_ms(value) -> int | None:
+    if value is None or isinstance(value, int):
+        return value
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+class _Buffer:
+    def __init__(self, path: str):
+        self.path = path
+        self.lines: list[bytes] = []
+        self.size = 0
+        self.opened_at = time.monotonic()
+
+class TickRecorder:
+    """
+    Buffers stream messages per symbol and hour and writes them as
+    compressed chunks from a background thread.
+
+        recorder = TickRecorder()
+        recorder.record_book("BTC", book, bid_changes, ask_changes)
+        recorder.record_trades("BTC", trades)
+        recorder.close()  # flushes everything still buffered
+    """
+    def __init__(self, root: str = TICK_CAPTURE_PATH, chunk_bytes: int = CHUNK_BYTES,
+                 flush_seconds: float = FLUSH_SECONDS):
+        self.root = root
+        self.chunk_bytes = chunk_bytes
+        self.flush_seconds = flush_seconds
+        self._buffers: dict[str, _Buffer] = {}
+        self._paths: dict[str, tuple[int, str]] = {}  # last hour file per symbol
+        self._snapshot_path: dict[str, str] = {}  # file each symbol's last book snapshot went to
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._writer, name="tick-recorder", daemon=True)
+        self._thread.start()
+        self.messages = 0
+
+    def path(self, symbol: str, ms: int) -> str:
+        hour_index = ms // HOUR_MS
+        cached = self._paths.get(symbol)
+        if cached is None or cached[0] != hour_index:
+            day, hour = _hour_key(ms)
+            cached = self._paths[symbol] = (hour_index, os.path.join(self.root, f"{symbol}USDT", day, f"{hour}.ticks"))
+        return cached[1]
+
+    def _append(self, symbol: str, message: list, recv_ms: int):
+        path = self.path(symbol, recv_ms)
+        buffer = self._buffers.get(symbol)
+        if buffer is not None and buffer.path != path:
+            self._flush(symbol)
+            buffer = None
+        if buffer is None:
+            buffer = self._buffers[symbol] = _Buffer(path)
+
+        line = json.dumps(message, separators=(",", ":")).encode()
+        buffer.lines.append(line)
+        buffer.size += len(line) + 1
+        self.messages += 1
+        if buffer.size >= self.chunk_bytes or time.monotonic() - buffer.opened_at >= self.flush_seconds:
+            self._flush(symbol)
+
+    def _flush(self, symbol: str):
+        buffer = self._buffers.pop(symbol, None)
+        if buffer is not None and buffer.lines:
+            self._queue.put((buffer.path, buffer.lines))
+
+    def record_book(self, symbol: str, book, bid_changes: list, ask_changes: list, recv_ms: int | None = None):
+        """
+        Records one order book update. The first book message of every hour
+        file is a full snapshot of `book` (an OrderBookState), so any file
+        can be replayed on its own.
+        """
+        recv_ms = recv_ms or int(time.time() * 1000)
+        path = self.path(symbol, recv_ms)
+        if self._snapshot_path.get(symbol) != path:
+            self._snapshot_path[symbol] = path
+            self._append(symbol, ["s", recv_ms, book.bids.levels(), book.asks.levels()], recv_ms)
+        elif bid_changes or ask_changes:
+            self._append(symbol, ["d", recv_ms, bid_changes, ask_changes], recv_ms)
+
+    def record_trades(self, symbol: str, trades: list, recv_ms: int | None = None):
+        """Records a batch of ccxt trades."""
+        if not trades:
+            return
+        recv_ms = recv_ms or int(time.time() * 1000)
+        rows = [[t['timestamp'], t['side'], t['price'], t['amount'], t['cost']] for t in trades]
+        self._append(symbol, ["t", recv_ms, rows], recv_ms)
+
+    def _writer(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                path, lines = item
+                chunk = zlib.compress(b"\n".join(lines), COMPRESSION_LEVEL)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "ab") as f:
+                    f.write(CHUNK_HEADER.pack(len(chunk)) + chunk)
+            except Exception as e:
+                logger.error(f"Failed to write tick chunk to {path}: {e}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    def flush_stale(self):
+        """Hands buffers older than `flush_seconds` to the writer, for symbols that went quiet."""
+        now = time.monotonic()
+        for symbol, buffer in list(self._buffers.items()):
+            if now - buffer.opened_at >= self.flush_seconds:
+                self._flush(symbol)
+
+    def flush(self):
+        """Hands every buffered message to the writer and waits until it is on disk."""
+        for symbol in list(self._buffers):
+            self._flush(symbol)
+        self._queue.join()
+
+    def close(self):
+        for symbol in list(self._buffers):
+            self._flush(symbol)
+        self._queue.put(None)
+        self._thread.join()
+
+class TickReader:
+    """Reads recorded messages back in order."""
+    def __init__(self, root: str = TICK_CAPTURE_PATH):
+        self.root = root
+
+    def files(self, symbol: str) -> list[str]:
+        series_dir = os.path.join(self.root, f"{symbol}USDT")
+        if not os.path.isdir(series_dir):
+            return []
+        return sorted(
+            os.path.join(series_dir, day, name)
+            for day in os.listdir(series_dir)
+            for name in os.listdir(os.path.join(series_dir, day))
+            if name.endswith(".ticks")
+        )
+
+    @staticmethod
+    def read_file(path: str):
+        """Yields the messages of one hour file, stopping at a truncated last chunk."""
+        with open(path, "rb") as f:
+            data = f.read()
+        offset = 0
+        while offset + CHUNK_HEADER.size <= len(data):
+            (length,) = CHUNK_HEADER.unpack_from(data, offset)
+            offset += CHUNK_HEADER.size
+            if offset + length > len(data):
+                logger.warning(f"Truncated tick chunk at the end of {path}; skipping it.")
+                return
+            for line in zlib.decompress(data[offset:offset + length]).split(b"\n"):
+                yield json.loads(line)
+            offset += length
+
+    def messages(self, symbol: str, start=None, end=None):
+        """Yields the symbol's messages with receive time in [start, end] (datetimes or ms)."""
+        start_ms, end_ms = _to_ms(start), _to_ms(end)
+        for path in self.files(symbol):
+            day, hour = path.split(os.sep)[-2], path.split(os.sep)[-1][:2]
+            hour_start = int(datetime.strptime(f"{day} {hour}", "%Y-%m-%d %H")
+                             .replace(tzinfo=timezone.utc).timestamp() * 1000)
+            if (start_ms is not None and hour_start + HOUR_MS <= start_ms) or (end_ms is not None and hour_start > end_ms):
+                continue
+            for message in self.read_file(path):
+                recv_ms = message[1]
+                if start_ms is not None and recv_ms < start_ms:
+                    continue
+                if end_ms is not None and recv_ms > end_ms:
+                    return
+                yield message
@@ -9,9 +9,9 @@ import argparse
 # --- Assuming these modules are in the python path when running from the root ---
 from src.shared.constants import SYMBOLS, ALL_TIMEFRAMES
 from src.utils.indicators import compute_indicators
+from src.data_fetch.history_store import store
 
 # --- Configuration ---
-HISTORY_DATA_PATH = "/workspace/data/history"
 FINETUNE_OUTPUT_PATH = "/workspace/data/finetuning"
 os.makedirs(FINETUNE_OUTPUT_PATH, exist_ok=True)
 
@@ -72,17 +72,13 @@ def create_finetune_dataset(days: int):
 
     for symbol in SYMBOLS:
         for tf in ALL_TIMEFRAMES:
-            path = f"{HISTORY_DATA_PATH}/{symbol}USDT_{tf}.csv"
-            if not os.path.exists(path):
-                logging.warning(f"File not found, skipping: {path}")
+            if not store.exists(symbol, tf):
+                logging.warning(f"No stored history for {symbol}-{tf}, skipping.")
                 continue
 
             try:
-                df = pd.read_csv(path)
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-                
-                # Filter for the requested date range
-                df_filtered = df[df['timestamp'] >= start_date].copy()
+                # Only the partitions covering the requested date range are read
+                df_filtered = store.read(symbol, tf, start=start_date)
 
                 if len(df_filtered) < 50:
                     logging.warning(f"Insufficient data for {symbol}-{tf} in the last {days} days. Skipping.")
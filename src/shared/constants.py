@@ -13,5 +13,9 @@ FUTURES_PERPETUAL_COINS = SYMBOLS
 # Timeframes to fetch directly from the exchange
 NATIVE_TIMEFRAMES = ["1m", "5m", "15m", "30m", "1h", "1d"]
 
+# Timeframes built locally from a finer native series instead of being fetched,
+# mapped to the series they are derived from
+DERIVED_TIMEFRAMES = {"10m": "1m"}
+
 # All timeframes to be used in the model, including simulated ones
 ALL_TIMEFRAMES = ["1m", "5m", "10m", "15m", "30m", "1h", "1d"]
\ No newline at end of file
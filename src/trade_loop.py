@@ -1,72 +1,326 @@
+import os
+import time
 import asyncio
+import threading
+import ccxt.pro
+import pandas as pd
 from logger import logger
 from config import config
-from db_manager import DBManager
-from model_validator import load_model
-from order_executor import OrderExecutor
-from signal_parser import SignalParser
+from core.db_manager import DBManager
+from core.order_executor import OrderExecutor, make_client_order_id
+from core.signal_parser import SignalParser
+from core.model_registry import ModelRegistry
+from core.model_watcher import ModelWatcher
+from core.candle_scheduler import CandleCloseScheduler
+from core.candle_buffer import CandleBuffer
+from data_fetch.candle_builder import CandleStream
+from data_fetch.feature_bus import FeatureBusReader, FEATURE_BUS_PATH
+
+# Closed candles kept for the signal parser
+MARKET_DATA_BARS = 500
+# In 'poll' mode, a candle the exchange hasn't published yet is re-polled after this delay, doubling each time,
+POLL_RETRY_SECONDS = 0.5
+# until this many seconds have passed; then that close is skipped
+POLL_DEADLINE_SECONDS = 10.0
+# Realtime features older than this are left out of the model input
+LIVE_FEATURE_MAX_AGE_SECONDS = 30.0
+
+class PairStrategy:
+    """Signal and position state for one (symbol, timeframe) pair."""
+    def __init__(self, symbol: str, timeframe: str):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        # Built around the pair's model on its first signal
+        self.signal_parser: SignalParser | None = None
+        self.in_position = False
+        # Closed candles and their indicators; `market_data` is the frame handed to the model
+        self.buffer = CandleBuffer(MARKET_DATA_BARS)
+        self.market_data: pd.DataFrame | None = None
+        # Closed candles routed from the symbol's trade stream
+        self.candles: asyncio.Queue = asyncio.Queue()
+
+    @property
+    def name(self) -> str:
+        return f"{self.symbol} {self.timeframe}"
+
+    def parser_for(self, model) -> SignalParser:
+        """The signal parser for `model`, rebuilt only when the model object changes."""
+        if self.signal_parser is None or self.signal_parser.model is not model:
+            self.signal_parser = SignalParser(model)
+        return self.signal_parser
 
 class TradeLoop:
-    def __init__(self):
+    """
+    Runs one strategy task per (symbol, timeframe) pair. The tasks share the
+    order executor, one trade stream per symbol and the DB writer; each
+    tracks its own position. Pass a PaperExchange as `exchange` to trade
+    against simulated fills instead of Binance.
+
+    Without `pairs`, one pair is traded per model in `models_dir`. Models
+    trained on realtime features get the latest values from the feature
+    bus at `feature_bus_path`, as published by realtime_manager.
+    """
+    def __init__(self, pairs: list[tuple] | None = None, exchange=None, db_path: str = config.DB_PATH,
+                 models_dir: str = config.MODELS_DIR, feature_bus_path: str = FEATURE_BUS_PATH):
         self.is_running = False
-        # Load model with fallback
-        self.model = load_model(config.MODEL_PATH, config.BACKUP_MODEL_PATH)
         # Initialize components
-        self.db_manager = DBManager(config.DB_PATH)
+        self.db_manager = DBManager(db_path)
         self.db_manager.create_trades_table()
-        self.order_executor = OrderExecutor(config.API_KEY, config.API_SECRET)
-        self.signal_parser = SignalParser(self.model)
-        # State
-        self.in_position = False
+        self.order_executor = OrderExecutor(config.API_KEY, config.API_SECRET, fast_path=config.ORDER_FAST_PATH,
+                                            exchange=exchange)
+        # Public trade stream the candles are built from
+        self.stream_exchange = ccxt.pro.binance({'options': {'defaultType': 'spot'}})
+        # Wakes REST-polling pairs at candle close in 'poll' mode
+        self.scheduler = CandleCloseScheduler()
+        # Attached on first read; no bus just means no realtime features
+        self.feature_bus = FeatureBusReader(feature_bus_path)
+        # Readers aren't thread-safe: model validation runs in worker threads with its own, one at a time
+        self.canary_bus = FeatureBusReader(feature_bus_path)
+        self._canary_lock = threading.Lock()
 
-    async def run(self):
-        """The main trading loop."""
-        self.is_running = True
-        logger.info("Trading bot started. Press Ctrl+C to stop.")
+        # Models are indexed here and unpickled on each pair's first signal
+        self.models = ModelRegistry(models_dir)
+        if pairs is None:
+            pairs = self.models.pairs()
+        else:
+            for symbol, timeframe, model_path in pairs:
+                if os.path.exists(model_path):
+                    self.models.register(symbol, timeframe, model_path)
+                else:
+                    logger.error(f"Skipping {symbol} {timeframe}: no model at {model_path}.")
+        self.strategies: dict[tuple[str, str], PairStrategy] = {
+            (symbol, timeframe): PairStrategy(symbol, timeframe)
+            for symbol, timeframe, *_ in pairs if self.models.lookup(symbol, timeframe)
+        }
+
+        if not self.strategies:
+            # No per-pair models: trade the configured single pair, with the backup model fallback
+            self.models.register(config.SYMBOL, config.TIMEFRAME, config.MODEL_PATH, config.BACKUP_MODEL_PATH)
+            # Fail fast if neither can be loaded
+            self.models.get(config.SYMBOL, config.TIMEFRAME)
+            self.strategies[(config.SYMBOL, config.TIMEFRAME)] = PairStrategy(config.SYMBOL, config.TIMEFRAME)
+        # Swaps retrained models in while running, validated on each pair's latest features
+        self.model_watcher = ModelWatcher(self.models, canary=self.canary_features)
+        logger.info(f"Trading {len(self.strategies)} pairs: {', '.join(s.name for s in self.strategies.values())}")
+
+    def live_features(self, symbol: str, reader: FeatureBusReader | None = None) -> dict:
+        """The symbol's fresh realtime features from the feature bus, keyed by coin there."""
+        return (reader or self.feature_bus).get(symbol.split('/')[0], max_age=LIVE_FEATURE_MAX_AGE_SECONDS)
+
+    def canary_features(self, symbol: str, timeframe: str | None, model=None):
+        """The latest input for `model` of a pair served by the (symbol, timeframe) model, if it has traded yet."""
+        for strategy in self.strategies.values():
+            if strategy.symbol == symbol and timeframe in (None, strategy.timeframe) \
+                    and strategy.market_data is not None and not strategy.market_data.empty:
+                with self._canary_lock:
+                    live_features = self.live_features(symbol, self.canary_bus)
+                return SignalParser.features(strategy.market_data, live_features, model)
+        return None
+
+    async def fetch_market_data(self, strategy: PairStrategy, until_ms: int):
+        """
+        Brings the pair's buffer up to the bar opening at `until_ms` over
+        REST. A buffer that is already loaded only fetches the bars after
+        its newest one; an empty one is loaded with the full window.
+        """
+        buffer = strategy.buffer
+        step_ms = self.stream_exchange.parse_timeframe(strategy.timeframe) * 1000
+        if buffer.last_timestamp is not None and buffer.last_timestamp >= until_ms:
+            return
+        if buffer.last_timestamp is not None and (until_ms - buffer.last_timestamp) // step_ms < MARKET_DATA_BARS:
+            since = buffer.last_timestamp + step_ms
+            limit = (until_ms - buffer.last_timestamp) // step_ms + 1
+        else:
+            logger.info(f"Fetching market data for {strategy.name}...")
+            buffer.clear()
+            since, limit = None, MARKET_DATA_BARS
+        ohlcv = await self.order_executor.exchange.fetch_ohlcv(strategy.symbol, strategy.timeframe, since=since, limit=limit)
+        newest = buffer.last_timestamp if buffer.last_timestamp is not None else -1
+        # The exchange also returns the bar that is still forming
+        buffer.extend(bar for bar in ohlcv if newest < bar[0] <= until_ms)
+
+    async def model_for(self, strategy: PairStrategy):
+        """The pair's model; one that isn't cached is unpickled off the event loop."""
+        key = self.models.lookup(strategy.symbol, strategy.timeframe)
+        if key is not None and self.models.active(key) is not None:
+            return self.models.get(strategy.symbol, strategy.timeframe)
+        return await asyncio.to_thread(self.models.get, strategy.symbol, strategy.timeframe)
+
+    async def load_models(self):
+        """Loads every pair's model concurrently, so the first candle close doesn't wait on unpickling."""
+        started = time.perf_counter()
+        results = await asyncio.gather(*(self.model_for(strategy) for strategy in self.strategies.values()),
+                                       return_exceptions=True)
+        for strategy, result in zip(self.strategies.values(), results):
+            if isinstance(result, Exception):
+                logger.error(f"Could not load the model for {strategy.name}: {result}")
+        logger.info(f"Loaded {len(results)} models in {time.perf_counter() - started:.1f}s; {self.models.stats()}")
 
+    async def on_market_data(self, strategy: PairStrategy):
+        """Generates a signal from the pair's latest closed candles and executes it."""
+        model = await self.model_for(strategy)
+        parser = strategy.parser_for(model)
+        live_features = self.live_features(strategy.symbol)
+        signal = parser.generate_signal(strategy.market_data, live_features)
+        if parser.last_error is not None \
+                and self.model_watcher.rollback(self.models.lookup(strategy.symbol, strategy.timeframe)):
+            # A model swapped in during probation failed on live data; decide with the previous one
+            parser = strategy.parser_for(await self.model_for(strategy))
+            signal = parser.generate_signal(strategy.market_data, live_features)
+
+        if signal == 'buy' and not strategy.in_position:
+            logger.info(f"Buy signal received for {strategy.name}. Executing trade.")
+            order = await self.order_executor.create_order(
+                strategy.symbol, 'market', 'buy', config.AMOUNT,
+                client_order_id=make_client_order_id(strategy.symbol, strategy.timeframe, 'buy', strategy.buffer.last_timestamp)
+            )
+            self.db_manager.log_trade(strategy.symbol, 'buy', order['price'], config.AMOUNT, 'filled')
+            strategy.in_position = True
+
+        elif signal == 'sell' and strategy.in_position:
+            logger.info(f"Sell signal received for {strategy.name}. Executing trade.")
+            order = await self.order_executor.create_order(
+                strategy.symbol, 'market', 'sell', config.AMOUNT,
+                client_order_id=make_client_order_id(strategy.symbol, strategy.timeframe, 'sell', strategy.buffer.last_timestamp)
+            )
+            self.db_manager.log_trade(strategy.symbol, 'sell', order['price'], config.AMOUNT, 'filled')
+            strategy.in_position = False
+
+        else: # hold
+            logger.info(f"Hold signal received for {strategy.name}. No action taken.")
+
+    async def run_strategy(self, strategy: PairStrategy):
+        """Acts on each closed candle of one pair; errors only affect this pair's cycle."""
+        step_ms = self.stream_exchange.parse_timeframe(strategy.timeframe) * 1000
         while self.is_running:
+            candle = await strategy.candles.get()
             try:
-                # 1. Fetch data (this part needs to be implemented)
-                # For example, using the exchange object from the order executor
-                logger.info(f"Fetching market data for {config.SYMBOL}...")
-                ohlcv = await self.order_executor.exchange.fetch_ohlcv(config.SYMBOL, config.TIMEFRAME)
-                # Create a pandas DataFrame
-                import pandas as pd
-                market_data = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-
-                # 2. Generate signal
-                signal = self.signal_parser.generate_signal(market_data)
-
-                # 3. Execute trade based on signal
-                if signal == 'buy' and not self.in_position:
-                    logger.info("Buy signal received. Executing trade.")
-                    order = await self.order_executor.create_order(
-                        config.SYMBOL, 'market', 'buy', config.AMOUNT
-                    )
-                    self.db_manager.log_trade(config.SYMBOL, 'buy', order['price'], config.AMOUNT, 'filled')
-                    self.in_position = True
-
-                elif signal == 'sell' and self.in_position:
-                    logger.info("Sell signal received. Executing trade.")
-                    order = await self.order_executor.create_order(
-                        config.SYMBOL, 'market', 'sell', config.AMOUNT
-                    )
-                    self.db_manager.log_trade(config.SYMBOL, 'sell', order['price'], config.AMOUNT, 'filled')
-                    self.in_position = False
-
-                else: # hold
-                    logger.info("Hold signal received. No action taken.")
-
-                # Wait for the next candle
-                await asyncio.sleep(3600) # Wait for 1 hour for the next 1h candle
-
-            except asyncio.CancelledError:
-                logger.info("Trade loop cancelled.")
-                self.is_running = False
+                if strategy.buffer.last_timestamp == candle.timestamp - step_ms:
+                    strategy.buffer.append(candle.as_ohlcv())
+                else:
+                    # First candle or a gap in the stream: fill in over REST
+                    await self.fetch_market_data(strategy, candle.timestamp)
+                strategy.market_data = strategy.buffer.frame()
+                await self.on_market_data(strategy)
             except Exception as e:
-                logger.error(f"An error occurred in the trade loop: {e}", exc_info=True)
-                # Decide on a cool-down period before retrying
-                await asyncio.sleep(60)
+                logger.error(f"An error occurred in the trade loop for {strategy.name}: {e}", exc_info=True)
+
+    async def poll_cycle(self, strategy: PairStrategy, closed_ms: int, deadline_seconds: float = POLL_DEADLINE_SECONDS):
+        """
+        Fetches the candle opening at `closed_ms` over REST and acts on it.
+        If the exchange hasn't published it yet, polls again with backoff
+        for up to `deadline_seconds`; no decision is made on a stale bar.
+        """
+        try:
+            deadline = time.monotonic() + deadline_seconds
+            delay = POLL_RETRY_SECONDS
+            await self.fetch_market_data(strategy, closed_ms)
+            while strategy.buffer.last_timestamp != closed_ms:
+                if time.monotonic() + delay > deadline:
+                    logger.warning(f"Exchange did not publish the {strategy.name} candle at {closed_ms}; skipping this close.")
+                    return
+                await asyncio.sleep(delay)
+                delay *= 2
+                await self.fetch_market_data(strategy, closed_ms)
+            strategy.market_data = strategy.buffer.frame()
+            await self.on_market_data(strategy)
+        except Exception as e:
+            # No cool-down sleep: the next wake-up is simply the next candle close
+            logger.error(f"An error occurred in the trade loop for {strategy.name}: {e}", exc_info=True)
+
+    async def poll_strategy(self, strategy: PairStrategy):
+        """Fetches and acts on each candle of one pair over REST, woken at candle close."""
+        while self.is_running:
+            closed_ms = await self.scheduler.wait_for_close(strategy.timeframe)
+            await self.poll_cycle(strategy, closed_ms)
+
+    async def replay(self, start_ms: int, end_ms: int) -> dict:
+        """
+        Steps a PaperExchange's market time through every candle close in
+        [start_ms, end_ms) and runs the pairs whose candle closed there
+        concurrently, as the poll scheduler would. Returns the wall time
+        per close and, for the orders placed, the time to acknowledgement
+        and the decision-to-fill latency of those that filled.
+        """
+        exchange = self.order_executor.exchange
+        steps = {tf: self.stream_exchange.parse_timeframe(tf) * 1000 for _, tf in self.strategies}
+        step = min(steps.values())
+        close_seconds = []
+        for close_ms in range(-(-start_ms // step) * step, end_ms, step):
+            exchange.set_time(close_ms)
+            due = [(s, close_ms - steps[s.timeframe]) for s in self.strategies.values() if close_ms % steps[s.timeframe] == 0]
+            started = time.perf_counter()
+            # Market time is pinned, so re-polling for a missing bar can't help
+            await asyncio.gather(*(self.poll_cycle(strategy, closed_ms, deadline_seconds=0) for strategy, closed_ms in due))
+            close_seconds.append(time.perf_counter() - started)
+
+        timings = list(self.order_executor.order_timings)
+        close_ms_sorted = sorted(seconds * 1000 for seconds in close_seconds)
+        ack_ms = sorted(t['ack_ms'] for t in timings)
+        fill_ms = sorted(t['fill_ms'] for t in timings if t['fill_ms'] is not None)
+        return {
+            'pairs': len(self.strategies),
+            'closes': len(close_seconds),
+            'close_ms_p50': close_ms_sorted[len(close_ms_sorted) // 2] if close_ms_sorted else None,
+            'close_ms_max': close_ms_sorted[-1] if close_ms_sorted else None,
+            'orders': len(timings),
+            'ack_ms_p50': ack_ms[len(ack_ms) // 2] if ack_ms else None,
+            'ack_ms_max': ack_ms[-1] if ack_ms else None,
+            'filled': len(fill_ms),
+            'fill_ms_p50': fill_ms[len(fill_ms) // 2] if fill_ms else None,
+            'fill_ms_max': fill_ms[-1] if fill_ms else None,
+        }
+
+    async def route_candles(self, stream: CandleStream):
+        """Hands each closed candle of a symbol's stream to the pair that trades that timeframe."""
+        try:
+            async for candle in stream:
+                self.strategies[(stream.symbol, candle.timeframe)].candles.put_nowait(candle)
+        finally:
+            await stream.close()
+
+    async def run(self, candle_source: str = config.CANDLE_SOURCE):
+        """
+        The main trading loop. With the 'stream' source, candles are built
+        from the live trade stream, so a decision is made as soon as each bar
+        closes; REST is only used to load history at start-up and to refill
+        a gap in the stream. With 'poll', each pair fetches over REST when
+        the scheduler wakes it at candle close plus a settle delay.
+        """
+        self.is_running = True
+        logger.info(f"Trading bot started ({candle_source} candles). Press Ctrl+C to stop.")
+
+        tasks = [asyncio.create_task(self.model_watcher.watch_loop())]
+        try:
+            await self.load_models()
+            # Inside the try, so a failed warm-up or clock sync still cancels the tasks already started
+            if self.order_executor.fast_path:
+                await self.order_executor.warm_up()
+                tasks.append(asyncio.create_task(self.order_executor.keep_warm_loop()))
+            if candle_source == 'poll':
+                # The first wake-up must already be on the exchange's clock
+                try:
+                    await self.scheduler.sync_clock(self.order_executor.exchange)
+                except Exception as e:
+                    logger.warning(f"Exchange clock sync failed; waking on the local clock until the next sync: {e}")
+                tasks.append(asyncio.create_task(self.scheduler.clock_sync_loop(self.order_executor.exchange)))
+                tasks += [asyncio.create_task(self.poll_strategy(strategy)) for strategy in self.strategies.values()]
+            else:
+                timeframes_by_symbol = {}
+                for symbol, timeframe in self.strategies:
+                    timeframes_by_symbol.setdefault(symbol, []).append(timeframe)
+                tasks += [asyncio.create_task(self.route_candles(CandleStream(self.stream_exchange, symbol, timeframes)))
+                          for symbol, timeframes in timeframes_by_symbol.items()]
+                tasks += [asyncio.create_task(self.run_strategy(strategy)) for strategy in self.strategies.values()]
+
+            await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            logger.info("Trade loop cancelled.")
+        finally:
+            self.is_running = False
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
 
     async def stop(self):
         """Stops the trading loop gracefully."""
@@ -74,6 +328,9 @@ class TradeLoop:
         self.is_running = False
         # Close connections
         await self.order_executor.close_connection()
+        await self.stream_exchange.close()
+        self.feature_bus.close()
+        self.canary_bus.close()
         self.db_manager.close()
         logger.info("Bot has been shut down gracefully.")
 
@@ -87,4 +344,4 @@ async def main():
         await loop.stop()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""
+Technical indicators shared by training and live trading.
+
+`compute_indicators` is the batch version used to build training data.
+`StreamingIndicators` keeps the same indicators as running state, so a
+live series can be updated one bar at a time in O(1) and still produce
+the values `compute_indicators` would give for the same closes.
+
+Definitions follow the `ta` package defaults:
+- rsi:  Wilder's RSI, smoothed with an EWM of alpha 1/RSI_WINDOW. The
+        first bar counts as no change, as in ta's RSIIndicator.
+- ema:  EMA of the close, span EMA_WINDOW.
+- macd: the MACD histogram, i.e. the MACD line (EMA fast - EMA slow)
+        minus its signal line; positive means above the signal line.
+Each is NaN until it has seen its full window.
+"""
+import numpy as np
+import pandas as pd
+
+RSI_WINDOW = 14
+EMA_WINDOW = 20
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+INDICATOR_COLUMNS = ['rsi', 'ema', 'macd']
+
+def _ewm(series: pd.Series, span: int | None = None, alpha: float | None = None) -> pd.Series:
+    window = span if span is not None else round(1 / alpha)
+    return series.ewm(span=span, alpha=alpha, min_periods=window, adjust=False).mean()
+
+def compute_indicators(df: pd.DataFrame) -> pd.DataFrame:
+    """Returns a copy of an OHLCV frame with the rsi, ema and macd columns added."""
+    df = df.copy()
+    close = df['close'].astype(float)
+
+    diff = close.diff()
+    up = _ewm(diff.where(diff > 0, 0.0), alpha=1 / RSI_WINDOW)
+    down = _ewm(-diff.where(diff < 0, 0.0), alpha=1 / RSI_WINDOW)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = np.where(down == 0, 100.0, 100 - 100 / (1 + up / down))
+    df['rsi'] = np.where(up.isna(), np.nan, rsi)
+
+    df['ema'] = _ewm(close, span=EMA_WINDOW)
+
+    macd_line = _ewm(close, span=MACD_FAST) - _ewm(close, span=MACD_SLOW)
+    df['macd'] = macd_line - _ewm(macd_line, span=MACD_SIGNAL)
+    return df
+
+class _EMA:
+    """Running EMA with pandas' adjust=False recursion, NaN until `window` values."""
+    __slots__ = ('alpha', 'window', 'count', 'value')
+
+    def __init__(self, window: int, alpha: float | None = None):
+        self.alpha = alpha if alpha is not None else 2 / (window + 1)
+        self.window = window
+        self.count = 0
+        self.value = 0.0
+
+    def update(self, x: float) -> float:
+        self.value = x if self.count == 0 else self.value + self.alpha * (x - self.value)
+        self.count += 1
+        return self.value if self.count >= self.window else np.nan
+
+class StreamingIndicators:
+    """Incremental rsi/ema/macd for one series; `update` takes each new close."""
+    def __init__(self):
+        self.prev_close = None
+        self.up = _EMA(RSI_WINDOW, alpha=1 / RSI_WINDOW)
+        self.down = _EMA(RSI_WINDOW, alpha=1 / RSI_WINDOW)
+        self.ema = _EMA(EMA_WINDOW)
+        self.fast = _EMA(MACD_FAST)
+        self.slow = _EMA(MACD_SLOW)
+        self.signal = _EMA(MACD_SIGNAL)
+
+    def update(self, close: float) -> tuple[float, float, float]:
+        """Returns (rsi, ema, macd) after `close`."""
+        rsi = np.nan
+        change = close - self.prev_close if self.prev_close is not None else 0.0
+        up = self.up.update(max(change, 0.0))
+        down = self.down.update(max(-change, 0.0))
+        if not np.isnan(up):
+            rsi = 100.0 if down == 0 else 100 - 100 / (1 + up / down)
+        self.prev_close = close
+
+        ema = self.ema.update(close)
+
+        macd_line = self.fast.update(close) - self.slow.update(close)
+        # The signal line starts at the first complete MACD value, as pandas skips leading NaNs
+        macd = macd_line - self.signal.update(macd_line) if not np.isnan(macd_line) else np.nan
+        return rsi, ema, macd
@@ -0,0 +1,43 @@
+# tests/core/test_candle_buffer.py
+import numpy as np
+import pandas as pd
+from src.core.candle_buffer import CandleBuffer, OHLCV_COLUMNS
+from src.utils.indicators import compute_indicators, INDICATOR_COLUMNS
+
+def bars(n: int, seed: int = 3) -> list[list]:
+    close = 100 + np.cumsum(np.random.default_rng(seed).normal(0, 1, n))
+    return [[i * 60_000, c, c + 1, c - 1, c, 2.0] for i, c in enumerate(close)]
+
+def test_buffer_keeps_last_bars_in_order():
+    """Tests that the buffer rolls over to the newest `capacity` bars across compactions."""
+    # Arrange
+    buffer = CandleBuffer(capacity=10)
+
+    # Act
+    buffer.extend(bars(47))
+
+    # Assert
+    frame = buffer.frame()
+    assert len(buffer) == 10
+    assert frame['timestamp'].tolist() == [i * 60_000 for i in range(37, 47)]
+    assert buffer.last_timestamp == 46 * 60_000
+    assert list(frame.columns) == OHLCV_COLUMNS + INDICATOR_COLUMNS
+
+def test_indicators_match_batch_over_full_history():
+    """Tests that rolled-over rows still carry the indicators of the whole series."""
+    history = bars(120)
+    buffer = CandleBuffer(capacity=50)
+    buffer.extend(history)
+
+    expected = compute_indicators(pd.DataFrame(history, columns=OHLCV_COLUMNS)).iloc[-50:]
+    np.testing.assert_allclose(buffer.frame()[INDICATOR_COLUMNS].to_numpy(), expected[INDICATOR_COLUMNS].to_numpy())
+
+def test_clear_resets_indicator_state():
+    """Tests that a cleared buffer starts its indicators over."""
+    buffer = CandleBuffer(capacity=50)
+    buffer.extend(bars(40))
+    buffer.clear()
+    buffer.append(bars(1)[0])
+
+    assert len(buffer) == 1
+    assert np.isnan(buffer.frame()['ema'].iloc[0])
@@ -0,0 +1,65 @@
+# tests/core/test_candle_scheduler.py
+import time
+import asyncio
+import pytest
+from src.core.candle_scheduler import CandleCloseScheduler
+
+FIVE_MIN_BOUNDARY = 1_700_000_100  # seconds, a multiple of 300
+
+def clock_near(boundary_seconds: float, lead: float):
+    """A wall clock that reads `lead` seconds before `boundary_seconds` when created."""
+    started = time.monotonic()
+    return lambda: boundary_seconds - lead + (time.monotonic() - started)
+
+@pytest.mark.asyncio
+async def test_wakes_after_close_plus_settle():
+    """Tests that a waiter wakes after the close plus settle delay and gets the closed candle's open time."""
+    # Arrange
+    scheduler = CandleCloseScheduler(settle_seconds=0.05, clock=clock_near(FIVE_MIN_BOUNDARY, 0.05))
+
+    # Act
+    closed_ms = await asyncio.wait_for(scheduler.wait_for_close("1m"), timeout=2)
+
+    # Assert
+    assert closed_ms == FIVE_MIN_BOUNDARY * 1000 - 60_000
+    assert scheduler.now_ms() >= FIVE_MIN_BOUNDARY * 1000 + 50
+
+@pytest.mark.asyncio
+async def test_shared_boundary_is_coalesced():
+    """Tests that timeframes closing at the same moment share one timer and future."""
+    scheduler = CandleCloseScheduler(settle_seconds=0.05, clock=clock_near(FIVE_MIN_BOUNDARY, 0.05))
+
+    waits = [asyncio.create_task(scheduler.wait_for_close(tf)) for tf in ("1m", "5m", "5m")]
+    await asyncio.sleep(0)
+    assert list(scheduler._waiters) == [FIVE_MIN_BOUNDARY * 1000]
+
+    results = await asyncio.wait_for(asyncio.gather(*waits), timeout=2)
+    assert results == [FIVE_MIN_BOUNDARY * 1000 - 60_000] + [FIVE_MIN_BOUNDARY * 1000 - 300_000] * 2
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_others():
+    """Tests that cancelling one task leaves the shared wake-up intact for the rest."""
+    scheduler = CandleCloseScheduler(settle_seconds=0.05, clock=clock_near(FIVE_MIN_BOUNDARY, 0.05))
+    first = asyncio.create_task(scheduler.wait_for_close("1m"))
+    second = asyncio.create_task(scheduler.wait_for_close("1m"))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await asyncio.wait_for(second, timeout=2) == FIVE_MIN_BOUNDARY * 1000 - 60_000
+
+@pytest.mark.asyncio
+async def test_clock_sync_offset_delays_wake_up():
+    """Tests that a local clock running ahead of the exchange does not wake tasks early."""
+    local = clock_near(FIVE_MIN_BOUNDARY, 0.02)
+
+    class ExchangeBehind:
+        async def fetch_time(self):
+            return int(local() * 1000) - 100  # exchange is 100ms behind us
+
+    scheduler = CandleCloseScheduler(settle_seconds=0.02, clock=local)
+    await scheduler.sync_clock(ExchangeBehind())
+    assert -110 <= scheduler.offset_ms <= -90
+
+    started = time.monotonic()
+    await asyncio.wait_for(scheduler.wait_for_close("1m"), timeout=2)
+    assert time.monotonic() - started >= 0.1
@@ -0,0 +1,128 @@
+# tests/core/test_model_registry.py
+import pickle
+import threading
+import pytest
+from src.core import model_registry
+from src.core.model_registry import ModelRegistry
+
+def write_model(directory, name: str, payload_bytes: int = 100) -> str:
+    path = directory / name
+    path.write_bytes(pickle.dumps({"name": name, "weights": b"x" * payload_bytes}))
+    return str(path)
+
+@pytest.fixture
+def models_dir(tmp_path):
+    write_model(tmp_path, "BTCUSDT_1h_model.pkl")
+    write_model(tmp_path, "BTCUSDT_5m_model.pkl")
+    write_model(tmp_path, "ETHUSDT_1h_model.pkl")
+    write_model(tmp_path, "sol_model.pkl")
+    (tmp_path / "xrp_model.pkl").write_bytes(b"")  # empty placeholder
+    (tmp_path / "notes.txt").write_text("not a model")
+    return tmp_path
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Counts the unpickles the registry performs."""
+    calls = []
+    real_load = model_registry.load_model
+    def counting_load(path, backup_path=None):
+        calls.append(path)
+        return real_load(path, backup_path)
+    monkeypatch.setattr(model_registry, "load_model", counting_load)
+    return calls
+
+def test_index_is_built_without_unpickling(models_dir, loads):
+    """Tests that indexing lists pairs and the legacy fallback but loads nothing."""
+    # Act
+    registry = ModelRegistry(str(models_dir), memory_budget=10**6)
+
+    # Assert
+    assert loads == []
+    assert registry.pairs(["5m", "1h"]) == [("BTC/USDT", "1h"), ("BTC/USDT", "5m"), ("ETH/USDT", "1h")]
+    assert registry.lookup("SOL/USDT", "15m") == ("SOL/USDT", None)
+    assert registry.lookup("XRP/USDT", "1h") is None
+
+def test_get_unpickles_once(models_dir, loads):
+    """Tests that repeated lookups are served from the cache."""
+    registry = ModelRegistry(str(models_dir), memory_budget=10**6)
+
+    first = registry.get("BTC/USDT", "1h")
+    second = registry.get("BTC/USDT", "1h")
+
+    assert first is second and first["name"] == "BTCUSDT_1h_model.pkl"
+    assert len(loads) == 1
+    assert registry.stats()["hits"] == 1 and registry.stats()["misses"] == 1
+    with pytest.raises(FileNotFoundError):
+        registry.get("XRP/USDT", "1h")
+
+def test_least_recently_used_model_is_dropped_over_budget(models_dir, loads):
+    """Tests that the cache keeps within its memory budget by dropping the oldest model."""
+    registry = ModelRegistry(str(models_dir), memory_budget=350)  # room for two ~160 byte pickles
+
+    registry.get("BTC/USDT", "1h")
+    registry.get("BTC/USDT", "5m")
+    registry.get("BTC/USDT", "1h")  # now the most recently used
+    registry.get("ETH/USDT", "1h")
+
+    assert registry.stats()["evictions"] == 1
+    registry.get("BTC/USDT", "1h")
+    assert len(loads) == 3  # BTC 1h stayed cached
+    registry.get("BTC/USDT", "5m")
+    assert len(loads) == 4
+
+def test_refresh_picks_up_new_files_and_drops_removed_ones(models_dir, loads):
+    registry = ModelRegistry(str(models_dir), memory_budget=10**6)
+    registry.get("ETH/USDT", "1h")
+
+    (models_dir / "ETHUSDT_1h_model.pkl").unlink()
+    write_model(models_dir, "DOGEUSDT_15m_model.pkl")
+    registry.refresh()
+
+    assert registry.lookup("ETH/USDT", "1h") is None
+    assert registry.stats()["cached"] == 0
+    assert ("DOGE/USDT", "15m") in registry.pairs(["15m"])
+
+def test_cached_models_are_served_while_another_loads(models_dir, monkeypatch):
+    """Tests that a slow unpickle only holds up callers of that model."""
+    # Arrange
+    registry = ModelRegistry(str(models_dir), memory_budget=10**6)
+    btc = registry.get("BTC/USDT", "1h")
+    loading, release = threading.Event(), threading.Event()
+    real_load = model_registry.load_model
+    def slow_load(path, backup_path=None):
+        loading.set()
+        release.wait(5)
+        return real_load(path, backup_path)
+    monkeypatch.setattr(model_registry, "load_model", slow_load)
+    waiter = threading.Thread(target=registry.get, args=("ETH/USDT", "1h"))
+
+    # Act
+    waiter.start()
+    loading.wait(5)
+    served = registry.get("BTC/USDT", "1h")
+    eth_still_loading = waiter.is_alive()
+    release.set()
+    waiter.join()
+
+    # Assert
+    assert served is btc and eth_still_loading
+    assert registry.active(("ETH/USDT", "1h")) is not None
+
+def test_rollback_copy_counts_against_budget(models_dir, loads):
+    """Tests that the model a swap replaced is counted, and dropped before live models when over budget."""
+    # Arrange
+    registry = ModelRegistry(str(models_dir), memory_budget=10**6)
+    registry.get("BTC/USDT", "1h")
+    entry = registry.index[("BTC/USDT", "1h")]
+    replacement = model_registry.ModelEntry(entry.path, entry.size, entry.mtime + 1)
+
+    # Act
+    registry.swap(("BTC/USDT", "1h"), {"name": "new"}, replacement)
+    with_copy = registry.stats()
+    registry.memory_budget = 2 * entry.size
+    registry.get("ETH/USDT", "1h")
+
+    # Assert
+    assert with_copy["cached_bytes"] == 2 * entry.size and with_copy["rollback_copies"] == 1
+    assert registry.stats()["rollback_copies"] == 0 and registry.stats()["cached"] == 2
+    assert not registry.rollback(("BTC/USDT", "1h"))
@@ -0,0 +1,156 @@
+# tests/core/test_model_watcher.py
+import os
+import pickle
+import hashlib
+import pandas as pd
+import pytest
+from src.core.model_registry import ModelRegistry
+from src.core.model_watcher import ModelWatcher
+
+class ConstantModel:
+    """A picklable stand-in for a trained model."""
+    def __init__(self, value, version):
+        self.value = value
+        self.version = version
+        self.n_features_in_ = 2
+
+    def predict(self, features):
+        return [self.value] * len(features)
+
+CANARY = pd.DataFrame({"close": [100.0], "rsi": [55.0]})
+
+def save(path, model, mtime):
+    path.write_bytes(pickle.dumps(model))
+    os.utime(path, (mtime, mtime))
+
+@pytest.fixture
+def setup(tmp_path):
+    path = tmp_path / "BTCUSDT_1h_model.pkl"
+    save(path, ConstantModel(1, version=1), mtime=1_000)
+    registry = ModelRegistry(str(tmp_path), memory_budget=10**6)
+    registry.get("BTC/USDT", "1h")
+    watcher = ModelWatcher(registry, canary=lambda symbol, timeframe, model: CANARY)
+    return path, registry, watcher
+
+def test_valid_new_model_is_swapped_in_and_can_be_rolled_back(setup):
+    """Tests the swap of a retrained model, then rollback and that the bad version is not retried."""
+    # Arrange
+    path, registry, watcher = setup
+    save(path, ConstantModel(-1, version=2), mtime=2_000)
+
+    # Act
+    swapped = watcher.check()
+
+    # Assert
+    assert swapped == [("BTC/USDT", "1h")]
+    assert registry.get("BTC/USDT", "1h").version == 2
+
+    assert watcher.rollback(("BTC/USDT", "1h"))
+    assert registry.get("BTC/USDT", "1h").version == 1
+    assert watcher.check() == []
+    assert registry.get("BTC/USDT", "1h").version == 1
+
+def test_corrupt_artifact_keeps_current_model(setup):
+    """Tests that a half-written pickle is rejected once and retried only when the file changes."""
+    path, registry, watcher = setup
+    path.write_bytes(pickle.dumps(ConstantModel(1, version=2))[:20])
+    os.utime(path, (2_000, 2_000))
+
+    assert watcher.check() == []
+    assert watcher.check() == []
+    assert watcher.failures == 1
+    assert registry.get("BTC/USDT", "1h").version == 1
+
+    save(path, ConstantModel(1, version=3), mtime=3_000)
+    assert watcher.check() == [("BTC/USDT", "1h")]
+
+def test_checksum_sidecar_must_match(setup, tmp_path):
+    """Tests that a model whose bytes don't match its .sha256 file is not used."""
+    path, registry, watcher = setup
+    save(path, ConstantModel(1, version=2), mtime=2_000)
+    (tmp_path / "BTCUSDT_1h_model.pkl.sha256").write_text(hashlib.sha256(b"other bytes").hexdigest())
+
+    assert watcher.check() == []
+    assert registry.get("BTC/USDT", "1h").version == 1
+
+def test_canary_prediction_must_be_one_finite_value(setup):
+    """Tests that a model predicting NaN on the live features is rejected."""
+    path, registry, watcher = setup
+    save(path, ConstantModel(float("nan"), version=2), mtime=2_000)
+
+    assert watcher.check() == []
+    assert registry.get("BTC/USDT", "1h").version == 1
+
+def test_models_not_loaded_are_left_to_lazy_loading(tmp_path):
+    """Tests that the watcher doesn't unpickle models nobody has asked for."""
+    path = tmp_path / "ETHUSDT_1h_model.pkl"
+    save(path, ConstantModel(1, version=1), mtime=1_000)
+    registry = ModelRegistry(str(tmp_path), memory_budget=10**6)
+    watcher = ModelWatcher(registry)
+    save(path, ConstantModel(1, version=2), mtime=2_000)
+
+    assert watcher.check() == []
+    assert registry.stats()["cached"] == 0
+    assert registry.get("ETH/USDT", "1h").version == 2
+
+def test_evicted_model_reloads_only_through_validation(setup):
+    """Tests that a changed file is validated on reload after eviction, and a rejected one is never loaded."""
+    # Arrange: the cached model's file is replaced by one that predicts NaN
+    path, registry, watcher = setup
+    save(path, ConstantModel(float("nan"), version=2), mtime=2_000)
+    registry.refresh()
+
+    # Act: the old model stays pinned over budget until dropped by hand
+    registry.memory_budget = 0
+    registry.get("BTC/USDT", "1h")
+    pinned = registry.stats()["cached"]
+    registry._evict(("BTC/USDT", "1h"))
+
+    # Assert
+    assert pinned == 1
+    with pytest.raises(FileNotFoundError, match="rejected"):
+        registry.get("BTC/USDT", "1h")
+    assert watcher.failures == 1
+    with pytest.raises(FileNotFoundError, match="rejected"):
+        ModelRegistry(registry.models_dir).get("BTC/USDT", "1h")
+
+    save(path, ConstantModel(1, version=3), mtime=3_000)
+    registry.refresh()
+    assert registry.get("BTC/USDT", "1h").version == 3
+
+def test_rollback_is_refused_after_probation(setup):
+    """Tests that a model past its probation is kept, and the model it replaced is released."""
+    # Arrange
+    path, registry, watcher = setup
+    save(path, ConstantModel(-1, version=2), mtime=2_000)
+    watcher.check()
+
+    # Act
+    watcher.probation = 0
+    rolled_back = watcher.rollback(("BTC/USDT", "1h"))
+
+    # Assert
+    assert not rolled_back
+    assert registry.get("BTC/USDT", "1h").version == 2
+    assert registry.stats()["rollback_copies"] == 0
+    assert not registry.rejected
+
+def test_incomplete_live_input_defers_validation(setup):
+    """Tests that a model is neither swapped in nor rejected while the canary lacks one of its features."""
+    # Arrange: the live feature is stale on the first check
+    path, registry, watcher = setup
+    live = {}
+    def canary(symbol, timeframe, model):
+        return CANARY.assign(**live)[["close", "rsi", "order_book_imbalance"]]
+    watcher.canary = canary
+    save(path, ConstantModel(-1, version=2), mtime=2_000)
+
+    # Act
+    deferred = watcher.check()
+    live["order_book_imbalance"] = 0.1
+    swapped = watcher.check()
+
+    # Assert
+    assert deferred == [] and not registry.rejected and watcher.failures == 0
+    assert swapped == [("BTC/USDT", "1h")]
+    assert registry.get("BTC/USDT", "1h").version == 2
@@ -1,7 +1,8 @@
 # tests/core/test_order_executor.py
+import time
 import pytest
-from unittest.mock import AsyncMock, patch
-from src.core.order_executor import OrderExecutor
+from unittest.mock import ANY, AsyncMock, patch
+from src.core.order_executor import OrderExecutor, make_client_order_id
 import ccxt.async_support as ccxt
 
 @pytest.fixture
@@ -40,11 +41,13 @@ async def test_create_order_success(mock_binance, mock_exchange):
     executor = OrderExecutor(api_key="key", api_secret="secret")
     
     # Act
-    order = await executor.create_order(symbol="BTC/USDT", order_type="market", side="buy", amount=0.01)
+    order = await executor.create_order(symbol="BTC/USDT", order_type="market", side="buy", amount=0.01,
+                                        client_order_id="hodl-abc")
     
     # Assert
     assert order['id'] == '12345'
-    mock_exchange.create_order.assert_called_once_with("BTC/USDT", "market", "buy", 0.01)
+    mock_exchange.create_order.assert_called_once_with("BTC/USDT", "market", "buy", 0.01, None,
+                                                       {'clientOrderId': "hodl-abc"})
 
 @pytest.mark.asyncio
 @patch('src.core.order_executor.ccxt.binance')
@@ -59,6 +62,8 @@ async def test_create_order_network_error_retry(mock_binance, mock_exchange):
         ccxt.NetworkError("Connection failed"), 
         {'id': '12345', 'price': 51000.0, 'amount': 0.01}
     ]
+    # The failed attempt never reached the exchange
+    mock_exchange.fetch_order.side_effect = ccxt.OrderNotFound("Order does not exist")
     mock_binance.return_value = mock_exchange
     executor = OrderExecutor(api_key="key", api_secret="secret")
 
@@ -68,4 +73,125 @@ async def test_create_order_network_error_retry(mock_binance, mock_exchange):
     # Assert
     assert order is not None
     # Check that create_order was called twice (initial attempt + 1 retry)
-    assert mock_exchange.create_order.call_count == 2
\ No newline at end of file
+    assert mock_exchange.create_order.call_count == 2
+
+
+@pytest.mark.asyncio
+@patch('src.core.order_executor.ccxt.binance')
+async def test_fast_path_retries_quickly_and_records_timing(mock_binance, mock_exchange):
+    """Tests that the fast path rounds to market precision, retries in well under a second and records timing."""
+    # Arrange
+    mock_exchange.markets = {'BTC/USDT': {}}
+    mock_exchange.options = {'timeDifference': 0}
+    mock_exchange.amount_to_precision.return_value = '0.012'
+    mock_exchange.fetch_order.side_effect = ccxt.OrderNotFound("Order does not exist")
+    mock_exchange.create_order.side_effect = [
+        ccxt.NetworkError("Connection reset"),
+        {'id': '12345', 'price': 51000.0, 'amount': 0.012, 'status': 'closed', 'timestamp': None},
+    ]
+    mock_binance.return_value = mock_exchange
+    executor = OrderExecutor(api_key="key", api_secret="secret", fast_path=True)
+
+    # Act
+    started = time.perf_counter()
+    order = await executor.create_order("BTC/USDT", "market", "buy", 0.0123)
+    elapsed = time.perf_counter() - started
+
+    # Assert
+    assert order['id'] == '12345'
+    assert elapsed < 1
+    mock_exchange.create_order.assert_called_with("BTC/USDT", "market", "buy", 0.012, None, {'clientOrderId': ANY})
+    timing = executor.order_timings[-1]
+    assert timing['order_id'] == '12345' and timing['ack_ms'] >= 0 and timing['fill_ms'] is None
+
+@pytest.mark.asyncio
+@patch('src.core.order_executor.ccxt.binance')
+async def test_warm_up_loads_markets_and_clock(mock_binance, mock_exchange):
+    """Tests that warming up loads markets and the clock offset."""
+    mock_exchange.markets = {}
+    mock_exchange.options = {}
+    mock_binance.return_value = mock_exchange
+    executor = OrderExecutor(api_key="key", api_secret="secret", fast_path=True)
+
+    await executor.warm_up()
+
+    mock_exchange.load_markets.assert_awaited_once()
+    mock_exchange.load_time_difference.assert_awaited_once()
+    assert mock_exchange.options['adjustForTimeDifference'] is True
+
+@pytest.mark.asyncio
+@patch('src.core.order_executor.ccxt.binance')
+async def test_retry_reconciles_instead_of_duplicating(mock_binance, mock_exchange):
+    """Tests that a retry finds the order a timed-out attempt placed rather than placing it again."""
+    # Arrange
+    mock_exchange.create_order.side_effect = ccxt.RequestTimeout("Read timed out")
+    mock_exchange.fetch_order.return_value = {'id': '777', 'clientOrderId': 'hodl-abc'}
+    mock_binance.return_value = mock_exchange
+    executor = OrderExecutor(api_key="key", api_secret="secret", fast_path=True)
+    mock_exchange.markets = {}
+
+    # Act
+    order = await executor.create_order("BTC/USDT", "market", "buy", 0.01, client_order_id="hodl-abc")
+
+    # Assert
+    assert order['id'] == '777'
+    assert mock_exchange.create_order.call_count == 1
+    mock_exchange.fetch_order.assert_awaited_once_with(None, "BTC/USDT", {'clientOrderId': "hodl-abc"})
+
+def test_client_order_ids_are_deterministic():
+    """Tests that the same decision maps to the same valid ID and others do not."""
+    first = make_client_order_id("BTC/USDT", "1h", "buy", 1_700_000_000_000)
+    assert first == make_client_order_id("BTC/USDT", "1h", "buy", 1_700_000_000_000)
+    assert first != make_client_order_id("BTC/USDT", "1h", "sell", 1_700_000_000_000)
+    assert len(first) <= 36 and first.startswith("hodl-")
+    assert make_client_order_id() != make_client_order_id()
+
+@pytest.mark.asyncio
+@patch('src.core.order_executor.ccxt.binance')
+async def test_create_orders_batches_where_supported(mock_binance, mock_exchange):
+    """Tests that derivative orders go out in one batch, spot orders concurrently, and results keep input order."""
+    # Arrange
+    mock_exchange.has = {'createOrders': True}
+    mock_exchange.markets = {'BTC/USDT': {'spot': True}, 'BTC/USDT:USDT': {'spot': False}, 'ETH/USDT:USDT': {'spot': False}}
+    mock_exchange.amount_to_precision.side_effect = lambda symbol, amount: str(amount)
+    mock_exchange.create_orders.return_value = [{'id': 'b1'}, {'id': 'b2'}]
+    mock_binance.return_value = mock_exchange
+    executor = OrderExecutor(api_key="key", api_secret="secret", fast_path=True)
+    orders = [
+        {'symbol': 'BTC/USDT:USDT', 'type': 'market', 'side': 'buy', 'amount': 0.01},
+        {'symbol': 'BTC/USDT', 'type': 'market', 'side': 'sell', 'amount': 0.02},
+        {'symbol': 'ETH/USDT:USDT', 'type': 'market', 'side': 'buy', 'amount': 0.1},
+    ]
+
+    # Act
+    results = await executor.create_orders(orders)
+
+    # Assert
+    assert [r['id'] for r in results] == ['b1', '12345', 'b2']
+    batch = mock_exchange.create_orders.await_args.args[0]
+    assert [o['symbol'] for o in batch] == ['BTC/USDT:USDT', 'ETH/USDT:USDT']
+    assert all(o['params']['clientOrderId'].startswith("hodl-") for o in batch)
+    mock_exchange.create_order.assert_awaited_once()
+
+@pytest.mark.asyncio
+@patch('src.core.order_executor.ccxt.binance')
+async def test_failed_batch_reconciles_before_resubmitting(mock_binance, mock_exchange):
+    """Tests that orders a failed batch request placed anyway are found rather than placed twice."""
+    # Arrange: the batch times out after the exchange placed its first order
+    mock_exchange.has = {'createOrders': True}
+    mock_exchange.markets = {'BTC/USDT:USDT': {'spot': False}, 'ETH/USDT:USDT': {'spot': False}}
+    mock_exchange.create_orders.side_effect = ccxt.RequestTimeout("Read timed out")
+    mock_exchange.fetch_order.side_effect = [{'id': 'placed'}, ccxt.OrderNotFound("Order does not exist")]
+    mock_binance.return_value = mock_exchange
+    executor = OrderExecutor(api_key="key", api_secret="secret")
+    orders = [
+        {'symbol': 'BTC/USDT:USDT', 'type': 'market', 'side': 'buy', 'amount': 0.01, 'client_order_id': 'hodl-a'},
+        {'symbol': 'ETH/USDT:USDT', 'type': 'market', 'side': 'buy', 'amount': 0.1, 'client_order_id': 'hodl-b'},
+    ]
+
+    # Act
+    results = await executor.create_orders(orders)
+
+    # Assert
+    assert [r['id'] for r in results] == ['placed', '12345']
+    mock_exchange.create_order.assert_awaited_once_with('ETH/USDT:USDT', 'market', 'buy', 0.1, None, {'clientOrderId': 'hodl-b'})
@@ -0,0 +1,113 @@
+# tests/core/test_paper_exchange.py
+import pytest
+import ccxt
+from src.core.paper_exchange import PaperExchange
+from src.core.order_executor import OrderExecutor
+
+STEP = 60_000
+T0 = 1_700_000_040_000  # a multiple of one minute
+
+def candles(n: int = 10) -> list[list]:
+    return [[T0 + i * STEP, 100.0 + i, 101.0 + i, 99.0 + i, 100.5 + i, 1.0] for i in range(n)]
+
+@pytest.mark.asyncio
+async def test_ohlcv_follows_market_time():
+    """Tests that only candles opened by market time are served, honouring since and limit."""
+    # Arrange
+    exchange = PaperExchange({("BTC/USDT", "1m"): candles()})
+    exchange.set_time(T0 + 5 * STEP + 1)
+
+    # Act
+    latest = await exchange.fetch_ohlcv("BTC/USDT", "1m", limit=3)
+    paged = await exchange.fetch_ohlcv("BTC/USDT", "1m", since=T0 + STEP, limit=2)
+
+    # Assert
+    assert [row[0] for row in latest] == [T0 + 3 * STEP, T0 + 4 * STEP, T0 + 5 * STEP]
+    assert [row[0] for row in paged] == [T0 + STEP, T0 + 2 * STEP]
+
+@pytest.mark.asyncio
+async def test_market_order_fills_with_slippage_and_fees():
+    """Tests fills at the last closed candle's close plus slippage, with balances and fees settled."""
+    exchange = PaperExchange({("BTC/USDT", "1m"): candles()}, balances={"USDT": 1000.0},
+                             slippage_bps=10, fee_rate=0.001)
+    exchange.set_time(T0 + 3 * STEP + 30_000)  # bar 2 is the last closed one
+
+    order = await exchange.create_order("BTC/USDT", "market", "buy", 2.0)
+
+    assert order["status"] == "closed"
+    assert order["average"] == pytest.approx(102.5 * 1.001)
+    balance = await exchange.fetch_balance()
+    assert balance["BTC"]["free"] == 2.0
+    assert balance["USDT"]["free"] == pytest.approx(1000 - 2 * 102.5 * 1.001 * 1.001)
+    with pytest.raises(ccxt.InsufficientFunds):
+        await exchange.create_order("BTC/USDT", "market", "sell", 3.0)
+
+@pytest.mark.asyncio
+async def test_market_order_walks_recorded_book():
+    """Tests that a symbol with a tick recording fills against the book as of market time."""
+    messages = [
+        ["s", T0, [[99.0, 1.0]], [[101.0, 1.0], [102.0, 5.0]]],
+        ["d", T0 + 1000, [], [[101.0, 0.5]]],
+    ]
+    exchange = PaperExchange(books={"BTC/USDT": messages}, slippage_bps=0)
+    exchange.set_time(T0 + 1000)
+
+    order = await exchange.create_order("BTC/USDT", "market", "buy", 1.5)
+
+    assert order["average"] == pytest.approx((0.5 * 101.0 + 1.0 * 102.0) / 1.5)
+
+@pytest.mark.asyncio
+async def test_limit_order_rests_until_price_reaches_it():
+    """Tests that a limit order below the market stays open until market time brings the price down."""
+    rows = candles()
+    rows[6][4] = 90.0
+    exchange = PaperExchange({("BTC/USDT", "1m"): rows}, slippage_bps=0)
+    exchange.set_time(T0 + 2 * STEP)
+
+    order = await exchange.create_order("BTC/USDT", "limit", "buy", 1.0, 95.0, {"clientOrderId": "hodl-1"})
+    assert order["status"] == "open"
+    exchange.set_time(T0 + 7 * STEP)
+
+    assert (await exchange.fetch_order(None, "BTC/USDT", {"clientOrderId": "hodl-1"}))["status"] == "closed"
+    assert (await exchange.fetch_order(order["id"]))["average"] == 95.0
+
+@pytest.mark.asyncio
+async def test_resting_orders_hold_their_funds():
+    """Tests that an open limit order's funds are moved to used, so a second order can't spend them too."""
+    # Arrange
+    rows = candles()
+    rows[6][4] = 90.0
+    exchange = PaperExchange({("BTC/USDT", "1m"): rows}, balances={"USDT": 150.0}, slippage_bps=0, fee_rate=0.0)
+    exchange.set_time(T0 + 2 * STEP)
+
+    # Act
+    await exchange.create_order("BTC/USDT", "limit", "buy", 1.0, 95.0)
+    held = (await exchange.fetch_balance())["USDT"]
+    with pytest.raises(ccxt.InsufficientFunds):
+        await exchange.create_order("BTC/USDT", "limit", "buy", 1.0, 94.0)
+    exchange.set_time(T0 + 7 * STEP)
+
+    # Assert
+    assert held == {"free": 55.0, "used": 95.0, "total": 150.0}
+    balance = await exchange.fetch_balance()
+    assert balance["USDT"] == {"free": 55.0, "used": 0.0, "total": 55.0}
+    assert balance["BTC"]["free"] == 1.0
+    assert [order["status"] for order in exchange.orders.values()] == ["closed"]
+
+@pytest.mark.asyncio
+async def test_order_executor_trades_against_paper_exchange():
+    """Tests the fast-path executor end to end offline, including duplicate client order IDs."""
+    # Arrange
+    exchange = PaperExchange({("BTC/USDT", "1m"): candles()}, latency=0.001)
+    exchange.set_time(T0 + 5 * STEP)
+    executor = OrderExecutor(api_key="key", api_secret="secret", fast_path=True, exchange=exchange)
+    await executor.warm_up()
+
+    # Act
+    order = await executor.create_order("BTC/USDT", "market", "buy", 0.0123456789, client_order_id="hodl-abc")
+
+    # Assert
+    assert order["amount"] == 0.012345
+    assert executor.order_timings[-1]["ack_ms"] >= 1
+    with pytest.raises(ccxt.InvalidOrder):
+        await exchange.create_order("BTC/USDT", "market", "buy", 0.01, None, {"clientOrderId": "hodl-abc"})
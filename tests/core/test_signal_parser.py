@@ -89,4 +89,27 @@ def test_hold_signal_on_prediction_error(mock_model, sample_market_data):
     signal = parser.generate_signal(sample_market_data)
     
     # Assert
-    assert signal == 'hold'
\ No newline at end of file
+    assert signal == 'hold'
+
+def test_missing_live_feature_holds_without_blaming_the_model(sample_market_data):
+    """Tests that an input lacking a trained feature holds without recording a model error."""
+    # Arrange
+    model = MagicMock()
+    model.feature_names_in_ = ['close', 'order_book_imbalance']
+    parser = SignalParser(model=model)
+
+    # Act
+    signal = parser.generate_signal(sample_market_data, live_features={})
+
+    # Assert
+    assert signal == 'hold'
+    assert parser.last_error is None
+    model.predict.assert_not_called()
+
+def test_non_finite_prediction_is_a_model_error(mock_model, sample_market_data):
+    """Tests that a NaN prediction holds and is recorded as the model's error."""
+    mock_model.predict.return_value = [float('nan')]
+    parser = SignalParser(model=mock_model)
+
+    assert parser.generate_signal(sample_market_data) == 'hold'
+    assert isinstance(parser.last_error, ValueError)
@@ -0,0 +1,109 @@
+# tests/test_async_fetcher.py
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.data_fetch.async_fetcher import AsyncFetchEngine, RateLimiter
+from src.data_fetch.exchange_health import ExchangeHealth
+
+HOUR = 3_600_000
+START = 1672531200000
+
+def make_exchange(pages=None, error=None, rate_limit=50):
+    """Builds a mock async ccxt exchange serving the given OHLCV pages."""
+    exchange = MagicMock()
+    exchange.has = {"fetchOHLCV": True}
+    exchange.timeframes = {"1h": "1h"}
+    exchange.rateLimit = rate_limit
+    exchange.fetch_ohlcv = AsyncMock(side_effect=error or (pages or []) + [[]] * 10)
+    exchange.close = AsyncMock()
+    return exchange
+
+@pytest.mark.asyncio
+async def test_fetch_matrix_falls_back_and_reports_timing():
+    """Tests that a failing exchange is skipped and each job reports its own stats."""
+    # Arrange: Bybit is down, Binance serves two candles
+    bybit = make_exchange(error=Exception("geo-blocked"))
+    binance = make_exchange(pages=[[[START, 1, 1, 1, 1, 1], [START + HOUR, 1, 1, 1, 1, 1]]])
+    clients = {"bybit": bybit, "binance": binance}
+
+    with patch('src.data_fetch.async_fetcher.create_exchange', side_effect=lambda name, *a, **kw: clients[name]):
+        engine = AsyncFetchEngine(exchanges=["bybit", "binance"], requests_per_second=1000,
+                                  exchange_health=ExchangeHealth(path=None))
+
+        # Act
+        results = await engine.fetch_matrix([("BTC", "1h", START, START + 2 * HOUR)])
+        await engine.close()
+
+    # Assert
+    result = results[0]
+    assert result.exchange == "binance"
+    assert result.rows == 2
+    assert result.requests == 1
+    assert result.error is None
+    assert result.seconds >= 0
+    bybit.close.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded_per_exchange():
+    """Tests that no more than `max_concurrency` requests hit one exchange at once."""
+    in_flight, peak = 0, 0
+
+    async def slow_fetch(symbol_pair, timeframe, since, limit=None):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return [[since, 1, 1, 1, 1, 1]]
+
+    exchange = make_exchange()
+    exchange.fetch_ohlcv = AsyncMock(side_effect=slow_fetch)
+
+    with patch('src.data_fetch.async_fetcher.create_exchange', return_value=exchange):
+        engine = AsyncFetchEngine(exchanges=["bybit"], max_concurrency=2, requests_per_second=1000,
+                                  exchange_health=ExchangeHealth(path=None))
+        jobs = [(symbol, "1h", START, START + HOUR) for symbol in ["BTC", "ETH", "SOL", "XRP", "ADA"]]
+        results = await engine.fetch_matrix(jobs)
+
+    assert [r.symbol for r in results] == ["BTC", "ETH", "SOL", "XRP", "ADA"]
+    assert all(r.rows == 1 for r in results)
+    assert peak == 2
+
+@pytest.mark.asyncio
+async def test_rate_limiter_spaces_requests():
+    """Tests that the shared token bucket throttles bursts beyond its capacity."""
+    limiter = RateLimiter(requests_per_second=100, burst=1)
+    loop = asyncio.get_running_loop()
+
+    started = loop.time()
+    for _ in range(4):
+        await limiter.acquire()
+
+    # One token is available immediately, the other three wait ~10ms each
+    assert loop.time() - started >= 0.025
+
+@pytest.mark.asyncio
+async def test_queued_jobs_skip_an_exchange_whose_circuit_opened():
+    """Tests that jobs waiting on a failing exchange's lane move on once its circuit opens."""
+    # Arrange: every job ranks Bybit first, then queues behind one slot while it times out
+    async def timeout(symbol_pair, timeframe, since, limit=None):
+        await asyncio.sleep(0.01)
+        raise Exception("timed out")
+
+    bybit = make_exchange()
+    bybit.fetch_ohlcv = AsyncMock(side_effect=timeout)
+    binance = make_exchange()
+    binance.fetch_ohlcv = AsyncMock(side_effect=lambda symbol_pair, timeframe, since, limit=None: [[since, 1, 1, 1, 1, 1]])
+    clients = {"bybit": bybit, "binance": binance}
+
+    with patch('src.data_fetch.async_fetcher.create_exchange', side_effect=lambda name, *a, **kw: clients[name]):
+        engine = AsyncFetchEngine(exchanges=["bybit", "binance"], max_concurrency=1, requests_per_second=1000,
+                                  exchange_health=ExchangeHealth(path=None, failure_threshold=3))
+        jobs = [(f"COIN{i}", "1h", START, START + HOUR) for i in range(10)]
+
+        # Act
+        results = await engine.fetch_matrix(jobs)
+
+    # Assert: only the failures that opened the circuit reached Bybit
+    assert all(r.exchange == "binance" for r in results)
+    assert bybit.fetch_ohlcv.await_count == 3
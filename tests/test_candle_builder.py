@@ -0,0 +1,111 @@
+# tests/test_candle_builder.py
+import time
+import asyncio
+import random
+import pytest
+import numpy as np
+import pandas as pd
+from src.data_fetch.candle_builder import CandleBuilder, CandleStream, BASE_MS, CLOSE_GRACE_MS
+from src.data_fetch.derived_timeframes import resample_ohlcv
+
+T0 = 1_700_000_000_000 - 1_700_000_000_000 % 3_600_000  # start of an hour
+
+def test_trades_fold_into_minute_bars():
+    """Tests OHLCV values of a 1m bar and that the next minute's trade closes it."""
+    # Arrange
+    builder = CandleBuilder("BTC")
+    closed = []
+    builder.subscribe(closed.append)
+
+    # Act
+    builder.add_trade(T0, 100.0, 1.0)
+    builder.add_trade(T0 + 10_000, 105.0, 2.0)
+    builder.add_trade(T0 + 20_000, 95.0, 0.5)
+    builder.add_trade(T0 + 59_999, 101.0, 1.0)
+    returned = builder.add_trade(T0 + BASE_MS, 102.0, 1.0)
+
+    # Assert
+    assert returned == closed
+    assert [c.as_ohlcv() for c in closed] == [[T0, 100.0, 105.0, 95.0, 101.0, 4.5]]
+    assert closed[0].trades == 4
+
+def test_bar_in_progress_at_start_is_not_emitted():
+    """Tests that the partially seen first bar (and its rollups) are skipped."""
+    builder = CandleBuilder("BTC", ["1m", "5m"])
+    builder.add_trade(T0 + 30_000, 100.0, 1.0)
+    closed = builder.add_trade(T0 + 5 * BASE_MS, 100.0, 1.0)
+    assert [c.timestamp for c in closed] == [T0 + BASE_MS * i for i in range(1, 5)]
+
+def test_quiet_market_closes_on_the_clock_with_flat_bars():
+    """Tests that advance() closes bars after the grace period and fills empty minutes."""
+    builder = CandleBuilder("BTC", ["1m", "5m"])
+    builder.add_trade(T0, 100.0, 1.0)
+
+    assert builder.advance(T0 + BASE_MS + CLOSE_GRACE_MS - 1) == []
+    closed = builder.advance(T0 + 5 * BASE_MS + CLOSE_GRACE_MS)
+
+    assert [(c.timeframe, c.timestamp) for c in closed] == \
+        [("1m", T0 + BASE_MS * i) for i in range(5)] + [("5m", T0)]
+    assert [c.volume for c in closed[1:5]] == [0.0] * 4
+    assert closed[-1].as_ohlcv() == [T0, 100.0, 100.0, 100.0, 100.0, 1.0]
+
+    # The next trade sets the open of the minute the clock opened flat
+    builder.add_trade(T0 + 5 * BASE_MS + 1_000, 90.0, 1.0)
+    closed = builder.add_trade(T0 + 6 * BASE_MS, 91.0, 1.0)
+    assert closed[0].as_ohlcv() == [T0 + 5 * BASE_MS, 90.0, 90.0, 90.0, 90.0, 1.0]
+
+def test_late_trades_are_counted_not_applied():
+    """Tests that trades for an already closed minute are dropped."""
+    builder = CandleBuilder("BTC")
+    builder.add_trade(T0, 100.0, 1.0)
+    builder.add_trade(T0 + BASE_MS, 100.0, 1.0)
+    builder.add_trade(T0 + 1_000, 500.0, 1.0)
+    assert builder.late_trades == 1
+
+def test_rollups_match_resampled_minute_bars():
+    """Tests that streamed higher-timeframe bars equal resampling the streamed 1m bars."""
+    rng = random.Random(5)
+    builder = CandleBuilder("BTC", ["1m", "15m", "1h"])
+    closed = []
+    builder.subscribe(closed.append)
+    ts, price = T0, 100.0
+    builder.add_trade(ts, price, 1.0)
+    while ts < T0 + 3 * 3_600_000:
+        ts += rng.randint(100, 40_000)
+        price += rng.uniform(-1, 1)
+        builder.add_trade(ts, price, rng.uniform(0.1, 2))
+    builder.advance(ts + 3_600_000)
+
+    minutes = pd.DataFrame([c.as_ohlcv() for c in closed if c.timeframe == "1m"],
+                           columns=["timestamp", "open", "high", "low", "close", "volume"])
+    minutes["timestamp"] = pd.to_datetime(minutes["timestamp"], unit="ms")
+    for tf in ("15m", "1h"):
+        expected = resample_ohlcv(minutes, "1m", tf)
+        streamed = [c.as_ohlcv()[1:] for c in closed if c.timeframe == tf]
+        np.testing.assert_allclose(streamed, expected[["open", "high", "low", "close", "volume"]].to_numpy())
+
+class ScriptedTrades:
+    """Stand-in for a ccxt.pro exchange that returns scripted trade batches."""
+    def __init__(self, batches):
+        self.batches = list(batches)
+
+    async def watch_trades(self, symbol):
+        if not self.batches:
+            await asyncio.sleep(3600)
+        return self.batches.pop(0)
+
+@pytest.mark.asyncio
+async def test_candle_stream_yields_requested_timeframe():
+    """Tests that the async stream yields only closed candles of the requested timeframe."""
+    start = int(time.time() * 1000) // (5 * BASE_MS) * (5 * BASE_MS) - 10 * BASE_MS
+    trade = lambda ts, p: {'timestamp': ts, 'price': p, 'amount': 1.0}
+    exchange = ScriptedTrades([
+        [trade(start, 100.0), trade(start + 4 * BASE_MS, 101.0)],
+        [trade(start + 5 * BASE_MS, 102.0)],
+    ])
+    stream = CandleStream(exchange, "BTC/USDT", ["5m"])
+    try:
+        candle = await asyncio.wait_for(stream.__aiter__().__anext__(), timeout=2)
+    finally:
+        await stream.close()
+    assert (candle.timeframe, candle.timestamp, candle.open, candle.close) == ("5m", start, 100.0, 101.0)
@@ -0,0 +1,108 @@
+# tests/test_coverage.py
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import MagicMock, patch
+from src.data_fetch.history_store import HistoryStore
+from src.data_fetch.coverage import CoverageIndex, HOLE_RETRY_SECONDS, contiguous_ranges, find_gaps, missing_within
+
+HOUR = 3_600_000
+START_MS = 1_704_067_200_000  # 2024-01-01
+
+def _hours(start: str, periods: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        'timestamp': pd.date_range(start, periods=periods, freq='h'),
+        'open': 1.0, 'high': 1.0, 'low': 1.0, 'close': 1.0, 'volume': 1.0,
+    })
+
+@pytest.fixture
+def index(tmp_path):
+    return CoverageIndex(history=HistoryStore(root=str(tmp_path / "store")), path=str(tmp_path / "index.json"))
+
+def test_contiguous_ranges_and_gaps():
+    """Tests that runs and holes are found from the timestamp diffs."""
+    ts = np.array([0, 1, 2, 5, 6, 9]) * HOUR
+
+    assert contiguous_ranges(ts, HOUR) == [[0, 2 * HOUR], [5 * HOUR, 6 * HOUR], [9 * HOUR, 9 * HOUR]]
+    assert find_gaps(ts, HOUR) == [[3 * HOUR, 5 * HOUR], [7 * HOUR, 9 * HOUR]]
+    assert find_gaps(np.array([], dtype=np.int64), HOUR) == []
+
+def test_repair_fetches_only_the_gap(index):
+    """Tests that repair requests exactly the missing interval and fills it."""
+    # Arrange: Hours 0-2 and 6-8 stored, 3-5 missing
+    full = _hours('2024-01-01', 9)
+    index.history.append('BTC', '1h', pd.concat([full.iloc[:3], full.iloc[6:]]))
+    fetch = MagicMock(return_value=full.iloc[3:6])
+
+    # Act
+    added = index.repair('BTC', '1h', fetch=fetch)
+
+    # Assert
+    assert added == 3
+    symbol, timeframe, since, until = fetch.call_args.args
+    assert (since, until) == (pd.Timestamp('2024-01-01 03:00'), pd.Timestamp('2024-01-01 06:00'))
+    assert index.report('BTC', '1h')['gaps'] == 0
+    assert index.report('BTC', '1h')['ranges'] == 1
+
+def test_unfillable_gap_is_remembered_as_hole(index):
+    """Tests that a gap the exchange has no candles for is not refetched on the next run."""
+    full = _hours('2024-01-01', 9)
+    index.history.append('BTC', '1h', pd.concat([full.iloc[:3], full.iloc[6:]]))
+    fetch = MagicMock(return_value=full.iloc[:0])
+
+    index.repair('BTC', '1h', fetch=fetch)
+    index.save()
+    reloaded = CoverageIndex(history=index.history, path=index.path)
+    reloaded.repair('BTC', '1h', fetch=fetch)
+
+    assert fetch.call_count == 1
+    assert reloaded.report('BTC', '1h')['known_holes'] == 1
+
+def test_fetch_errors_are_not_holes(index):
+    """Tests that a gap every exchange failed on is retried on the next run."""
+    full = _hours('2024-01-01', 9)
+    index.history.append('BTC', '1h', pd.concat([full.iloc[:3], full.iloc[6:]]))
+    fetch = MagicMock(return_value=None)
+
+    index.repair('BTC', '1h', fetch=fetch)
+    index.repair('BTC', '1h', fetch=fetch)
+
+    assert fetch.call_count == 2
+    assert index.report('BTC', '1h')['known_holes'] == 0
+
+def test_holes_expire(index):
+    """Tests that a hole is asked for again once HOLE_RETRY_SECONDS have passed."""
+    full = _hours('2024-01-01', 9)
+    index.history.append('BTC', '1h', pd.concat([full.iloc[:3], full.iloc[6:]]))
+    index.repair('BTC', '1h', fetch=MagicMock(return_value=full.iloc[:0]))
+    fetch = MagicMock(return_value=full.iloc[3:6])
+
+    with patch('src.data_fetch.coverage.time.time', return_value=time.time() + HOLE_RETRY_SECONDS + 1):
+        added = index.repair('BTC', '1h', fetch=fetch)
+
+    assert added == 3
+    assert index.report('BTC', '1h')['gaps'] == 0
+    assert index.report('BTC', '1h')['known_holes'] == 0
+
+def test_partly_filled_gap_is_narrowed(index):
+    """Tests that only the part of a gap the answer left empty is remembered, and nothing is refetched."""
+    # Arrange: Hours 0-1 and 8 stored; the exchange only has hours 4-5 of the gap
+    full = _hours('2024-01-01', 9)
+    index.history.append('BTC', '1h', pd.concat([full.iloc[:2], full.iloc[8:]]))
+    fetch = MagicMock(return_value=full.iloc[4:6])
+
+    # Act
+    added = index.repair('BTC', '1h', fetch=fetch)
+    index.repair('BTC', '1h', fetch=fetch)
+
+    # Assert
+    assert added == 2
+    assert fetch.call_count == 1
+    holes = [hole[:2] for hole in index.entry('BTC', '1h')['holes']]
+    assert holes == [[2 * HOUR + START_MS, 4 * HOUR + START_MS], [6 * HOUR + START_MS, 8 * HOUR + START_MS]]
+
+def test_missing_within():
+    ts = np.array([2, 3, 6]) * HOUR
+    assert missing_within(ts, 0, 8 * HOUR, HOUR) == [[0, 2 * HOUR], [4 * HOUR, 6 * HOUR], [7 * HOUR, 8 * HOUR]]
+    assert missing_within(ts, 2 * HOUR, 4 * HOUR, HOUR) == []
@@ -1,10 +1,22 @@
 # tests/test_data_source.py
 import pytest
 import pandas as pd
+import threading
 from unittest.mock import patch, MagicMock
-from data_fetch.data_source import fetch_ohlcv_data
+from data_fetch.data_source import fetch_ohlcv_data, fetch_ohlcv_range
+from data_fetch.exchange_pool import ExchangePool, MarketsUnavailableError, pool
+from data_fetch.exchange_health import ExchangeHealth, ALL_SYMBOLS, health
 from datetime import datetime
 
+@pytest.fixture(autouse=True)
+def fresh_pool():
+    """Empties the shared exchange pool and health so each test builds its own mocked clients."""
+    pool.clear()
+    health.reset()
+    yield
+    pool.clear()
+    health.reset()
+
 @patch('data_fetch.data_source.ccxt.bybit')
 def test_fetch_ohlcv_data_success(mock_bybit):
     """
@@ -31,5 +43,106 @@ def test_fetch_ohlcv_data_success(mock_bybit):
     mock_exchange_instance.fetch_ohlcv.assert_called_once()
     print("\n✅ test_fetch_ohlcv_data_success passed")
 
+@patch('data_fetch.data_source.ccxt.bybit')
+def test_fetch_ohlcv_range_pages_until_caught_up(mock_bybit):
+    """
+    Tests that a range fetch keeps paging forward with `since` and stitches
+    the pages together without duplicating the overlapping candle.
+    """
+    # Arrange: Two pages of 1h candles, the second overlapping the first by one bar
+    hour = 3_600_000
+    start = 1672531200000
+    first_page = [[start + i * hour, 1, 1, 1, 1, 1] for i in range(3)]
+    second_page = [[start + i * hour, 2, 2, 2, 2, 2] for i in range(2, 5)]
+    mock_exchange_instance = MagicMock()
+    mock_exchange_instance.fetch_ohlcv.side_effect = [first_page, second_page, []]
+    mock_exchange_instance.timeframes = ['1h']
+    mock_bybit.return_value = mock_exchange_instance
+
+    # Act
+    df = fetch_ohlcv_range(
+        symbol="BTC", timeframe="1h",
+        since=datetime(2023, 1, 1), until=datetime(2023, 1, 2),
+    )
+
+    # Assert: Five unique candles, the cursor moved forward on each request
+    assert len(df) == 5
+    assert df['timestamp'].is_unique
+    cursors = [c.args[2] for c in mock_exchange_instance.fetch_ohlcv.call_args_list]
+    assert cursors == [start, start + 3 * hour, start + 5 * hour]
+    print("\n✅ test_fetch_ohlcv_range_pages_until_caught_up passed")
+
+@patch('data_fetch.exchange_pool.ccxt.bybit')
+def test_pool_reuses_client_and_refreshes_markets_after_ttl(mock_bybit):
+    """
+    Tests that the pool builds each exchange once, loads its markets once,
+    and reloads them only after the TTL has expired.
+    """
+    # Arrange
+    exchange_pool = ExchangePool(markets_ttl=60)
+
+    # Act
+    with patch('data_fetch.exchange_pool.time.monotonic', side_effect=[0, 30, 100, 100]):
+        first = exchange_pool.get("bybit")
+        second = exchange_pool.get("bybit")
+        third = exchange_pool.get("bybit")
+
+    # Assert
+    assert first is second is third
+    mock_bybit.assert_called_once()
+    load_calls = first.load_markets.call_args_list
+    assert [c.kwargs for c in load_calls] == [{'reload': False}, {'reload': True}]
+    print("\n✅ test_pool_reuses_client_and_refreshes_markets_after_ttl passed")
+
+def test_failed_markets_load_counts_against_exchange_and_is_not_retried_at_once():
+    """Tests that a failed load is recorded in health and the exchange isn't asked again until the retry delay."""
+    # Arrange
+    exchange_health = ExchangeHealth(path=None, failure_threshold=1)
+    exchange_pool = ExchangePool(retry_seconds=60, exchange_health=exchange_health)
+    broken = MagicMock()
+    broken.load_markets.side_effect = Exception("geo-blocked")
+    exchange_pool.register("bybit", broken, markets_loaded=False)
+
+    # Act / Assert
+    for _ in range(3):
+        with pytest.raises(MarketsUnavailableError):
+            exchange_pool.get("bybit")
+    broken.load_markets.assert_called_once()
+    assert exchange_health.is_open("bybit", "BTC")
+
+def test_failed_markets_refresh_keeps_loaded_markets():
+    """Tests that a client whose markets were loaded is still served when a refresh fails."""
+    exchange_pool = ExchangePool(markets_ttl=0, exchange_health=ExchangeHealth(path=None))
+    exchange = MagicMock()
+    exchange.load_markets.side_effect = Exception("timeout")
+    exchange_pool.register("bybit", exchange)
+
+    assert exchange_pool.get("bybit") is exchange
+    assert exchange_pool.get("bybit") is exchange
+    exchange.load_markets.assert_called_once()
+
+def test_slow_markets_load_does_not_block_other_exchanges():
+    """Tests that one exchange hanging in load_markets leaves lookups of the others free."""
+    # Arrange
+    exchange_pool = ExchangePool(exchange_health=ExchangeHealth(path=None))
+    loading, release = threading.Event(), threading.Event()
+    slow = MagicMock()
+    slow.load_markets.side_effect = lambda reload: loading.set() or release.wait(5)
+    exchange_pool.register("bybit", slow, markets_loaded=False)
+    exchange_pool.register("okx", MagicMock(), markets_loaded=False)
+    waiter = threading.Thread(target=exchange_pool.get, args=("bybit",))
+
+    # Act
+    waiter.start()
+    loading.wait(5)
+    okx = exchange_pool.get("okx")
+    bybit_still_loading = waiter.is_alive()
+    release.set()
+    waiter.join()
+
+    # Assert
+    okx.load_markets.assert_called_once()
+    assert bybit_still_loading
+
 # To run this test, install pytest (`pip install pytest`)
 # and run `pytest` from your project's root directory.
\ No newline at end of file
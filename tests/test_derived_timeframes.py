@@ -0,0 +1,67 @@
+# tests/test_derived_timeframes.py
+import numpy as np
+import pandas as pd
+import pytest
+from src.data_fetch.history_store import HistoryStore
+from src.data_fetch.derived_timeframes import resample_ohlcv, build_derived_timeframes
+
+def _minutes(start: str, periods: int) -> pd.DataFrame:
+    """Builds a 1m series whose close is the minute index, for easy checks."""
+    closes = np.arange(periods, dtype=float)
+    return pd.DataFrame({
+        'timestamp': pd.date_range(start, periods=periods, freq='min'),
+        'open': closes, 'high': closes + 0.5, 'low': closes - 0.5, 'close': closes, 'volume': 1.0,
+    })
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoryStore(root=str(tmp_path))
+
+def test_resample_matches_pandas_and_drops_partial_bucket():
+    """Tests that buckets are aggregated like pandas.resample and the open bucket is held back."""
+    base = _minutes('2024-01-01', 25)
+
+    bars = resample_ohlcv(base, '1m', '10m')
+
+    expected = base.set_index('timestamp').resample('10min').agg({
+        'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'
+    }).iloc[:2].reset_index()
+    pd.testing.assert_frame_equal(bars, expected, check_dtype=False)
+
+def test_resample_keeps_bucket_once_its_last_bar_arrives():
+    """Tests that a bucket is emitted as soon as the base reaches its final bar."""
+    bars = resample_ohlcv(_minutes('2024-01-01', 20), '1m', '10m')
+
+    assert len(bars) == 2
+    assert bars['volume'].tolist() == [10.0, 10.0]
+
+def test_weekly_buckets_start_on_monday():
+    """Tests that 1w bars align to Monday like exchange weekly candles."""
+    days = pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-03', periods=14, freq='D'),  # a Wednesday
+        'open': 1.0, 'high': 1.0, 'low': 1.0, 'close': 1.0, 'volume': 1.0,
+    })
+
+    bars = resample_ohlcv(days, '1d', '1w', include_partial=True)
+
+    assert bars['timestamp'].dt.dayofweek.tolist() == [0, 0, 0]
+    assert bars['timestamp'].iloc[1] == pd.Timestamp('2024-01-08')
+
+def test_non_multiple_timeframe_is_rejected():
+    with pytest.raises(ValueError):
+        resample_ohlcv(_minutes('2024-01-01', 10), '5m', '7m')
+
+def test_incremental_build_only_extends_the_derived_series(store):
+    """Tests that a second run picks up where the first stopped without duplicates."""
+    base = _minutes('2024-01-01', 60)
+    store.append('BTC', '1m', base.iloc[:35])
+    first = build_derived_timeframes('BTC', {'10m': '1m', '30m': '1m'}, history=store)
+
+    store.append('BTC', '1m', base.iloc[35:])
+    second = build_derived_timeframes('BTC', {'10m': '1m', '30m': '1m'}, history=store)
+
+    assert first == {'10m': 3, '30m': 1}
+    assert second == {'10m': 3, '30m': 1}
+    derived = store.read('BTC', '10m')
+    full = resample_ohlcv(base, '1m', '10m')
+    pd.testing.assert_frame_equal(derived, full, check_dtype=False)
@@ -0,0 +1,65 @@
+# tests/test_exchange_health.py
+import pytest
+from unittest.mock import patch
+from src.data_fetch.exchange_health import ExchangeHealth
+
+EXCHANGES = ["bybit", "binance", "okx", "kucoin"]
+
+@pytest.fixture
+def tracker(tmp_path):
+    """An ExchangeHealth persisted to a temporary file."""
+    return ExchangeHealth(path=str(tmp_path / "health.json"), failure_threshold=3, open_seconds=600)
+
+def test_untried_exchanges_keep_configured_order(tracker):
+    """Tests that with no history the hard-coded fallback order is preserved."""
+    assert tracker.rank(EXCHANGES, "BTC") == EXCHANGES
+
+def test_fastest_healthy_exchange_goes_first(tracker):
+    """Tests that measured exchanges are ordered by latency ahead of untried ones."""
+    tracker.record_success("okx", "BTC", 0.10)
+    tracker.record_success("binance", "BTC", 0.30)
+
+    assert tracker.rank(EXCHANGES, "BTC") == ["okx", "binance", "bybit", "kucoin"]
+
+def test_repeated_failures_open_the_circuit_for_all_symbols(tracker):
+    """Tests that an exchange failing repeatedly is skipped until its circuit closes."""
+    # Arrange & Act: Bybit is geo-blocked and fails three times on different symbols
+    with patch('src.data_fetch.exchange_health.time.time', return_value=1000.0):
+        for symbol in ["BTC", "ETH", "SOL"]:
+            tracker.record_failure("bybit", symbol)
+        ranked_while_open = tracker.rank(EXCHANGES, "DOGE")
+
+    with patch('src.data_fetch.exchange_health.time.time', return_value=1000.0 + 601):
+        ranked_after_cooldown = tracker.rank(EXCHANGES, "DOGE")
+
+    # Assert
+    assert "bybit" not in ranked_while_open
+    assert "bybit" in ranked_after_cooldown
+
+def test_symbol_specific_failures_do_not_block_other_symbols(tracker):
+    """Tests that a pair missing on one exchange only affects that pair."""
+    for _ in range(3):
+        tracker.record_failure("kucoin", "WIF", exchange_wide=False)
+
+    assert "kucoin" not in tracker.rank(EXCHANGES, "WIF")
+    assert "kucoin" in tracker.rank(EXCHANGES, "BTC")
+
+def test_all_open_falls_back_to_configured_order(tracker):
+    """Tests that an all-open state still returns something to try."""
+    for ex_name in EXCHANGES:
+        for _ in range(3):
+            tracker.record_failure(ex_name, "BTC")
+
+    assert tracker.rank(EXCHANGES, "BTC") == EXCHANGES
+
+def test_state_persists_across_processes(tracker):
+    """Tests that a new tracker reloads circuits and latencies from disk."""
+    tracker.record_success("binance", "BTC", 0.05)
+    for _ in range(3):
+        tracker.record_failure("bybit", "BTC")
+    tracker.save()
+
+    reloaded = ExchangeHealth(path=tracker.path)
+
+    assert reloaded.rank(EXCHANGES, "BTC")[0] == "binance"
+    assert reloaded.is_open("bybit", "BTC")
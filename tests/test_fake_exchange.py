@@ -0,0 +1,66 @@
+# tests/test_fake_exchange.py
+import pytest
+import ccxt
+from datetime import datetime, timedelta, timezone
+from src.data_fetch.fake_exchange import FakeExchange
+from src.data_fetch.exchange_pool import pool
+from src.data_fetch.exchange_health import health
+from src.data_fetch.data_source import fetch_ohlcv_range
+from scripts.benchmark_fetch import run_benchmark
+
+NOW_MS = 1_704_067_200_000  # 2024-01-01 00:00 UTC
+
+@pytest.fixture(autouse=True)
+def fresh_pool():
+    pool.clear()
+    health.reset()
+    yield
+    pool.clear()
+    health.reset()
+
+def test_fake_caps_pages_and_counts_requests():
+    """Tests that the fake honours its page cap and history window."""
+    fake = FakeExchange(page_limit=100, history_days=1, now_ms=NOW_MS)
+
+    page = fake.fetch_ohlcv("BTC/USDT", "1m", since=0, limit=1000)
+
+    assert len(page) == 100
+    assert page[0][0] == fake.listed_ms
+    assert fake.requests == 1 and fake.bars_served == 100
+
+def test_fake_simulates_outages_and_rate_limits():
+    outage = FakeExchange(outage=True, now_ms=NOW_MS)
+    limited = FakeExchange(rate_limit_every=2, now_ms=NOW_MS)
+
+    with pytest.raises(ccxt.ExchangeNotAvailable):
+        outage.fetch_ohlcv("BTC/USDT", "1h")
+    limited.fetch_ohlcv("BTC/USDT", "1h")
+    with pytest.raises(ccxt.RateLimitExceeded):
+        limited.fetch_ohlcv("BTC/USDT", "1h")
+
+def test_range_fetch_pages_through_fake_and_falls_back_on_outage():
+    """Tests the real data_source paging and fallback against pooled fakes."""
+    # Arrange: Bybit is down, Binance serves 1 day of 1m candles in 300-bar pages
+    now = datetime.now(timezone.utc)
+    pool.register("bybit", FakeExchange(name="bybit", outage=True))
+    binance = FakeExchange(name="binance", page_limit=300, history_days=1)
+    pool.register("binance", binance)
+
+    # Act
+    df = fetch_ohlcv_range("BTC", "1m", since=now - timedelta(days=2))
+
+    # Assert: Complete, gap-free history assembled from several pages
+    assert len(df) >= 1439
+    assert df['timestamp'].diff().dropna().nunique() == 1
+    assert binance.requests >= 5
+
+def test_benchmark_reports_every_scenario_and_mode():
+    rows = run_benchmark(["healthy", "primary-outage"], ["serial", "async"], ["BTC"], ["1h"],
+                         history_days=1, latency=0.0)
+
+    assert [(r["scenario"], r["mode"]) for r in rows] == [
+        ("healthy", "serial"), ("healthy", "async"),
+        ("primary-outage", "serial"), ("primary-outage", "async"),
+    ]
+    assert all(r["bars"] >= 24 and r["requests"] >= 1 for r in rows)
+    assert rows[2]["errors"] >= 1
@@ -0,0 +1,107 @@
+# tests/test_feature_bus.py
+import math
+import pytest
+from src.data_fetch.feature_bus import FeatureBusWriter, FeatureBusReader, SEQ
+
+SYMBOLS = ["BTC", "ETH"]
+FEATURES = ["order_book_imbalance", "taker_buy_sell_ratio"]
+
+@pytest.fixture
+def bus_path(tmp_path):
+    return str(tmp_path / "features.bus")
+
+def test_publish_and_read_back(bus_path):
+    """Tests that published values are visible to a separate reader."""
+    # Arrange
+    writer = FeatureBusWriter(SYMBOLS, FEATURES, path=bus_path)
+    reader = FeatureBusReader(path=bus_path)
+
+    # Act
+    writer.publish("BTC", {"order_book_imbalance": 0.25}, timestamp=1000.0)
+    writer.publish("BTC", {"taker_buy_sell_ratio": 1.5}, timestamp=1001.0)
+
+    # Assert
+    assert reader.get("BTC") == {"order_book_imbalance": 0.25, "taker_buy_sell_ratio": 1.5}
+    assert reader.updated_at("BTC") == {"order_book_imbalance": 1000.0, "taker_buy_sell_ratio": 1001.0}
+    assert reader.get("ETH") == {}
+    assert reader.get("DOGE") == {}
+    writer.close()
+    reader.close()
+
+def test_unset_features_and_age(bus_path):
+    """Tests that unset features are absent and age is None until published."""
+    writer = FeatureBusWriter(SYMBOLS, FEATURES, path=bus_path)
+    reader = FeatureBusReader(path=bus_path)
+    assert reader.age("ETH", "order_book_imbalance") is None
+
+    writer.publish("ETH", {"order_book_imbalance": -0.1, "unknown_feature": 3.0})
+
+    assert reader.age("ETH", "order_book_imbalance") == pytest.approx(0.0, abs=1.0)
+    assert reader.snapshot() == {"BTC": {}, "ETH": {"order_book_imbalance": -0.1}}
+    writer.close()
+    reader.close()
+
+def test_get_leaves_out_stale_features(bus_path):
+    """Tests that `max_age` drops features not republished recently, and a later publish keeps the other values."""
+    # Arrange
+    writer = FeatureBusWriter(SYMBOLS, FEATURES, path=bus_path)
+    reader = FeatureBusReader(path=bus_path)
+
+    # Act
+    writer.publish("BTC", {"order_book_imbalance": 0.25}, timestamp=1000.0)
+    writer.publish("BTC", {"taker_buy_sell_ratio": 1.5})
+
+    # Assert
+    assert reader.get("BTC", max_age=60) == {"taker_buy_sell_ratio": 1.5}
+    assert reader.get("BTC") == {"order_book_imbalance": 0.25, "taker_buy_sell_ratio": 1.5}
+    writer.close()
+    reader.close()
+
+def test_writer_restart_keeps_values(bus_path):
+    """Tests that a restarted writer with the same layout reuses the file."""
+    writer = FeatureBusWriter(SYMBOLS, FEATURES, path=bus_path)
+    writer.publish("BTC", {"order_book_imbalance": 0.5})
+    writer.close()
+
+    restarted = FeatureBusWriter(SYMBOLS, FEATURES, path=bus_path)
+    reader = FeatureBusReader(path=bus_path)
+
+    assert reader.get("BTC") == {"order_book_imbalance": 0.5}
+    restarted.close()
+    reader.close()
+
+def test_layout_change_recreates_file(bus_path, monkeypatch):
+    """Tests that a reader re-attaches when the writer recreates the file with new features."""
+    monkeypatch.setattr("src.data_fetch.feature_bus.REATTACH_CHECK_SECONDS", 0.0)
+    writer = FeatureBusWriter(SYMBOLS, FEATURES, path=bus_path)
+    writer.publish("BTC", {"order_book_imbalance": 0.5})
+    reader = FeatureBusReader(path=bus_path)
+    assert reader.get("BTC") == {"order_book_imbalance": 0.5}
+    writer.close()
+
+    writer = FeatureBusWriter(SYMBOLS, FEATURES + ["spread"], path=bus_path)
+    writer.publish("BTC", {"spread": 0.01})
+
+    assert reader.get("BTC") == {"spread": 0.01}
+    assert reader.layout.features == FEATURES + ["spread"]
+    writer.close()
+    reader.close()
+
+def test_torn_row_is_recovered_by_next_publish(bus_path):
+    """Tests that an odd sequence left by a crashed writer is repaired on the next publish."""
+    writer = FeatureBusWriter(SYMBOLS, FEATURES, path=bus_path)
+    offset = writer.layout.row_offset("BTC")
+    SEQ.pack_into(writer._mm, offset, 7)  # simulate a writer that died mid-write
+
+    writer.publish("BTC", {"taker_buy_sell_ratio": 2.0})
+
+    assert SEQ.unpack_from(writer._mm, offset)[0] % 2 == 0
+    assert FeatureBusReader(path=bus_path).get("BTC") == {"taker_buy_sell_ratio": 2.0}
+    assert math.isnan(writer.layout.values.unpack_from(writer._mm, offset + SEQ.size)[0])
+    writer.close()
+
+def test_missing_bus_reads_empty(tmp_path):
+    """Tests that a reader tolerates the writer not having started yet."""
+    reader = FeatureBusReader(path=str(tmp_path / "missing.bus"))
+    assert reader.get("BTC") == {}
+    assert reader.snapshot() == {}
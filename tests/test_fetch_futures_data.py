@@ -0,0 +1,66 @@
+# tests/test_fetch_futures_data.py
+import pytest
+import pandas as pd
+from unittest.mock import patch
+from src.data_fetch import fetch_futures_data
+from src.data_fetch.history_store import HistoryStore
+
+def _candles(start: str, periods: int, close: float = 100.0) -> pd.DataFrame:
+    """Builds a small hourly OHLCV frame for the tests."""
+    return pd.DataFrame({
+        'timestamp': pd.date_range(start, periods=periods, freq='h'),
+        'open': close, 'high': close, 'low': close, 'close': close, 'volume': 1.0,
+    })
+
+@pytest.fixture
+def history_store(tmp_path, monkeypatch):
+    """Points the history store and legacy CSVs at a temporary directory."""
+    test_store = HistoryStore(root=str(tmp_path / "store"))
+    monkeypatch.setattr(fetch_futures_data, 'store', test_store)
+    monkeypatch.setattr(fetch_futures_data, 'DATA_BASE_PATH', str(tmp_path))
+    return test_store
+
+@patch('src.data_fetch.fetch_futures_data.fetch_ohlcv_range')
+def test_first_run_backfills_lookback_window(mock_range, history_store):
+    """Tests that a symbol without history is backfilled from scratch."""
+    # Arrange
+    mock_range.return_value = _candles('2024-01-01', 3)
+
+    # Act
+    written = fetch_futures_data.fetch_and_store('BTC', '1h')
+
+    # Assert
+    assert written == 3
+    assert len(history_store.read('BTC', '1h')) == 3
+
+@patch('src.data_fetch.fetch_futures_data.fetch_ohlcv_range')
+def test_incremental_run_resumes_and_replaces_last_candle(mock_range, history_store):
+    """Tests that a second run resumes at the last candle and appends only new bars."""
+    # Arrange: Three stored bars, the exchange returns the last one updated plus two new ones
+    history_store.append('BTC', '1h', _candles('2024-01-01', 3))
+    mock_range.return_value = _candles('2024-01-01 02:00', 3, close=200.0)
+
+    # Act
+    written = fetch_futures_data.fetch_and_store('BTC', '1h')
+
+    # Assert: Fetch resumed at the last stored timestamp, no duplicate candle
+    assert mock_range.call_args.args[2] == pd.Timestamp('2024-01-01 02:00')
+    assert written == 2
+    stored = history_store.read('BTC', '1h')
+    assert len(stored) == 5
+    assert stored['timestamp'].is_unique
+    assert stored['close'].tolist() == [100.0, 100.0, 200.0, 200.0, 200.0]
+
+@patch('src.data_fetch.fetch_futures_data.fetch_ohlcv_range')
+def test_legacy_csv_is_imported_before_resuming(mock_range, history_store):
+    """Tests that existing CSV history is migrated instead of refetched."""
+    # Arrange
+    _candles('2024-01-01', 200).to_csv(fetch_futures_data.get_csv_path('ETH', '1h'), index=False)
+    mock_range.return_value = None
+
+    # Act
+    fetch_futures_data.fetch_and_store('ETH', '1h')
+
+    # Assert: The fetch resumed from the last imported candle
+    assert len(history_store.read('ETH', '1h')) == 200
+    assert mock_range.call_args.args[2] == pd.Timestamp('2024-01-09 07:00')
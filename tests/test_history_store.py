@@ -0,0 +1,52 @@
+# tests/test_history_store.py
+import os
+import pytest
+import pandas as pd
+from src.data_fetch.history_store import HistoryStore
+
+def _candles(start: str, periods: int, freq: str = 'h', close: float = 100.0) -> pd.DataFrame:
+    """Builds a small OHLCV frame for the tests."""
+    return pd.DataFrame({
+        'timestamp': pd.date_range(start, periods=periods, freq=freq),
+        'open': close, 'high': close, 'low': close, 'close': close, 'volume': 1.0,
+    })
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoryStore(root=str(tmp_path))
+
+def test_append_partitions_by_month(store):
+    """Tests that candles spanning a month boundary land in one file per month."""
+    store.append('BTC', '1h', _candles('2024-01-31 22:00', 4))
+
+    assert store.months('BTC', '1h') == ['2024-01', '2024-02']
+    assert os.path.exists(store.partition_path('BTC', '1h', '2024-02'))
+    assert store.last_timestamp('BTC', '1h') == pd.Timestamp('2024-02-01 01:00')
+
+def test_append_dedupes_and_replaces_overlapping_rows(store):
+    """Tests that re-appending a stored candle replaces it instead of duplicating it."""
+    store.append('BTC', '1h', _candles('2024-01-01', 3))
+
+    added = store.append('BTC', '1h', _candles('2024-01-01 02:00', 2, close=200.0))
+
+    stored = store.read('BTC', '1h')
+    assert added == 1
+    assert stored['timestamp'].is_unique
+    assert stored['close'].tolist() == [100.0, 100.0, 200.0, 200.0]
+
+def test_read_returns_only_the_requested_range(store):
+    """Tests that a range read is bounded and typed."""
+    store.append('ETH', '1d', _candles('2024-01-01', 90, freq='D'))
+
+    df = store.read('ETH', '1d', start=pd.Timestamp('2024-02-10'), end=pd.Timestamp('2024-02-15'))
+
+    assert df['timestamp'].tolist() == list(pd.date_range('2024-02-10', periods=5, freq='D'))
+    assert df['close'].dtype == 'float64'
+
+def test_read_missing_series_is_empty(store):
+    """Tests that reading a series with no partitions returns an empty frame."""
+    df = store.read('DOGE', '5m')
+
+    assert df.empty
+    assert list(df.columns) == ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+    assert store.last_timestamp('DOGE', '5m') is None
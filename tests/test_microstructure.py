@@ -0,0 +1,47 @@
+# tests/test_microstructure.py
+import math
+import random
+import pytest
+from src.data_fetch.microstructure import BOOK_FEATURE_NAMES, DEPTH_BANDS_BPS, book_feature_vector, book_features
+
+def _reference(bids, asks):
+    """Straightforward per-metric Python loops the kernel must agree with."""
+    best_bid, bid_size = bids[0]
+    best_ask, ask_size = asks[0]
+    mid = (best_bid + best_ask) / 2
+    expected = {
+        "mid_price": mid,
+        "spread_bps": (best_ask - best_bid) / mid * 10_000,
+        "microprice": (best_bid * ask_size + best_ask * bid_size) / (bid_size + ask_size),
+        "depth_weighted_mid": sum(p * q for p, q in bids + asks) / sum(q for _, q in bids + asks),
+    }
+    for band in DEPTH_BANDS_BPS:
+        expected[f"bid_depth_{band}bps"] = sum(p * q for p, q in bids if p >= mid * (1 - band / 10_000))
+        expected[f"ask_depth_{band}bps"] = sum(p * q for p, q in asks if p <= mid * (1 + band / 10_000))
+    return expected
+
+def test_kernel_matches_reference_on_random_books():
+    """Tests every feature of the vectorized kernel against a plain Python implementation."""
+    rng = random.Random(2)
+    for _ in range(50):
+        mid = rng.uniform(0.01, 60_000)
+        tick = mid * rng.uniform(0.00001, 0.0005)
+        bids = [[mid - tick * (i + 0.5), rng.uniform(0.01, 10)] for i in range(50)]
+        asks = [[mid + tick * (i + 0.5), rng.uniform(0.01, 10)] for i in range(50)]
+
+        assert book_features(bids, asks) == pytest.approx(_reference(bids, asks))
+
+def test_microprice_leans_toward_thin_side():
+    """Tests that microprice moves toward the ask when the bid is heavier."""
+    features = book_features([[99.0, 9.0]], [[101.0, 1.0]])
+    assert features["mid_price"] == 100.0
+    assert features["spread_bps"] == pytest.approx(200.0)
+    assert features["microprice"] == pytest.approx(100.8)
+
+def test_empty_side_gives_nan_and_reuses_output():
+    """Tests that an empty side yields NaN for every feature, written into the given buffer."""
+    out = book_feature_vector([[100.0, 1.0]], [[101.0, 1.0]])
+    result = book_feature_vector([[100.0, 1.0]], [], out=out)
+    assert result is out
+    assert len(result) == len(BOOK_FEATURE_NAMES)
+    assert all(math.isnan(v) for v in result)
@@ -0,0 +1,75 @@
+# tests/test_order_book_state.py
+import random
+import pytest
+from src.data_fetch.order_book_state import OrderBookState
+
+def brute_force_imbalance(bids: dict, asks: dict, depth: int) -> float:
+    """Reference implementation: rescan the best `depth` levels of each side."""
+    top_bids = sorted(bids.items(), reverse=True)[:depth]
+    top_asks = sorted(asks.items())[:depth]
+    bid_total = sum(p * s for p, s in top_bids)
+    ask_total = sum(p * s for p, s in top_asks)
+    total = bid_total + ask_total
+    return (bid_total - ask_total) / total if total > 0 else 0.0
+
+def test_imbalance_matches_rescan_under_random_deltas():
+    """Tests that running totals stay equal to a full rescan at every depth."""
+    rng = random.Random(7)
+    book = OrderBookState()
+    bids, asks = {}, {}
+
+    for _ in range(5000):
+        side = rng.choice(["bids", "asks"])
+        levels = bids if side == "bids" else asks
+        price = float(rng.randint(9_900, 9_999) if side == "bids" else rng.randint(10_001, 10_100))
+        size = 0.0 if rng.random() < 0.3 else round(rng.uniform(0.1, 5), 3)
+        book.apply_delta(side, price, size)
+        if size:
+            levels[price] = size
+        else:
+            levels.pop(price, None)
+
+    for depth in (5, 10, 25, 50):
+        assert book.imbalance(depth) == pytest.approx(brute_force_imbalance(bids, asks, depth), abs=1e-9)
+
+def test_snapshot_diff_applies_only_changes():
+    """Tests that consecutive full snapshots, as ccxt delivers them, are tracked correctly."""
+    book = OrderBookState()
+    book.apply_snapshot([[100.0, 1.0], [99.0, 2.0]], [[101.0, 1.0], [102.0, 1.0]])
+    book.apply_snapshot([[100.0, 3.0], [98.0, 1.0]], [[101.0, 1.0]])
+
+    assert book.bids.levels() == [[100.0, 3.0], [98.0, 1.0]]
+    assert book.asks.levels() == [[101.0, 1.0]]
+    assert book.imbalance(5) == pytest.approx(brute_force_imbalance({100.0: 3.0, 98.0: 1.0}, {101.0: 1.0}, 5))
+
+def test_features_report_every_depth():
+    book = OrderBookState(depths=(1, 2))
+    book.apply_snapshot([[100.0, 1.0], [99.0, 1.0]], [[101.0, 3.0]])
+
+    features = book.features()
+
+    assert set(features) == {"order_book_imbalance_1", "order_book_imbalance_2"}
+    assert features["order_book_imbalance_1"] == round((100 - 303) / 403, 4)
+
+def test_deltas_after_snapshot_match_rescan():
+    """Tests that level changes applied on top of a snapshot array keep the totals exact."""
+    book = OrderBookState()
+    bids = {100.0 - i: 1.0 + i for i in range(30)}
+    asks = {101.0 + i: 2.0 for i in range(30)}
+    book.apply_snapshot(sorted(map(list, bids.items()), reverse=True), sorted(map(list, asks.items())))
+
+    book.apply_delta("bids", 100.0, 0.0)
+    book.apply_delta("bids", 100.5, 4.0)
+    book.apply_delta("asks", 105.0, 7.0)
+    bids.pop(100.0)
+    bids[100.5] = 4.0
+    asks[105.0] = 7.0
+
+    assert len(book.bids) == 30
+    for depth in (5, 10, 25, 50):
+        assert book.imbalance(depth) == pytest.approx(brute_force_imbalance(bids, asks, depth), abs=1e-9)
+
+def test_snapshot_diff_is_only_computed_on_request():
+    book = OrderBookState()
+    assert book.apply_snapshot([[100.0, 1.0]], [[101.0, 1.0]]) is None
+    assert book.apply_snapshot([[100.0, 2.0]], [[101.0, 1.0]], diff=True) == ([(100.0, 2.0)], [])
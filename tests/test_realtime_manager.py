@@ -0,0 +1,93 @@
+# tests/test_realtime_manager.py
+import asyncio
+import pytest
+from src.data_fetch import realtime_manager
+from src.data_fetch.realtime_manager import (
+    build_tasks, order_book_dispatch_loop, trades_dispatch_loop, order_book_loop, trades_loop,
+)
+
+class ScriptedStream:
+    """Minimal ccxt.pro stand-in that replays scripted updates, then stops the loop."""
+    def __init__(self, books=(), trades=(), multiplexed=True):
+        self.has = {'watchOrderBookForSymbols': multiplexed, 'watchTradesForSymbols': multiplexed}
+        self.markets = {f"{c}/USDT:USDT": {'symbol': f"{c}/USDT:USDT"} for c in ("BTC", "ETH")}
+        self.markets_by_id = {f"{c}USDT": [self.markets[f"{c}/USDT:USDT"]] for c in ("BTC", "ETH")}
+        self._books = list(books)
+        self._trades = list(trades)
+        self.subscriptions = []
+
+    async def load_markets(self):
+        return self.markets
+
+    def market(self, pair):
+        return self.markets_by_id[pair][0]
+
+    def _next(self, queue):
+        if not queue:
+            raise asyncio.CancelledError
+        return queue.pop(0)
+
+    async def watch_order_book_for_symbols(self, pairs, limit=None):
+        self.subscriptions.append(tuple(pairs))
+        return self._next(self._books)
+
+    async def watch_trades_for_symbols(self, pairs):
+        self.subscriptions.append(tuple(pairs))
+        return self._next(self._trades)
+
+@pytest.fixture(autouse=True)
+def clean_features(monkeypatch):
+    monkeypatch.setattr(realtime_manager, "realtime_features", {})
+    monkeypatch.setattr(realtime_manager, "feature_bus", None)
+
+@pytest.mark.asyncio
+async def test_order_book_dispatch_routes_by_market():
+    """Tests that one multiplexed book stream updates the right symbol's state."""
+    # Arrange
+    exchange = ScriptedStream(books=[
+        {'symbol': 'BTC/USDT:USDT', 'bids': [[100.0, 3.0]], 'asks': [[101.0, 1.0]]},
+        {'symbol': 'ETH/USDT:USDT', 'bids': [[10.0, 1.0]], 'asks': [[11.0, 3.0]]},
+    ])
+
+    # Act
+    with pytest.raises(asyncio.CancelledError):
+        await order_book_dispatch_loop(exchange, ["BTC", "ETH"])
+
+    # Assert
+    features = realtime_manager.realtime_features
+    assert features["BTC"]["order_book_imbalance"] > 0
+    assert features["ETH"]["order_book_imbalance"] < 0
+    assert set(exchange.subscriptions) == {("BTCUSDT", "ETHUSDT")}
+
+@pytest.mark.asyncio
+async def test_trades_dispatch_splits_mixed_batches():
+    """Tests that a trades batch spanning several symbols is split per symbol."""
+    exchange = ScriptedStream(trades=[[
+        {'symbol': 'BTC/USDT:USDT', 'timestamp': 1_000, 'side': 'buy', 'cost': 300.0, 'amount': 3.0},
+        {'symbol': 'ETH/USDT:USDT', 'timestamp': 1_000, 'side': 'sell', 'cost': 50.0, 'amount': 5.0},
+        {'symbol': 'BTC/USDT:USDT', 'timestamp': 2_000, 'side': 'sell', 'cost': 100.0, 'amount': 1.0},
+    ]])
+
+    with pytest.raises(asyncio.CancelledError):
+        await trades_dispatch_loop(exchange, ["BTC", "ETH"])
+
+    features = realtime_manager.realtime_features
+    assert features["BTC"]["taker_buy_sell_ratio"] == 3.0
+    assert features["ETH"]["taker_buy_sell_ratio"] == 0.0
+    assert features["BTC"]["vwap_60s"] == 100.0
+
+def test_build_tasks_picks_layout(monkeypatch):
+    """Tests that 'auto' multiplexes when supported and batches large symbol lists."""
+    monkeypatch.setattr(realtime_manager, "SUBSCRIPTION_BATCH_SIZE", 2)
+    symbols = ["BTC", "ETH", "SOL", "XRP", "ADA"]
+
+    multiplexed = build_tasks(ScriptedStream(multiplexed=True), symbols)
+    per_symbol = build_tasks(ScriptedStream(multiplexed=False), symbols)
+    try:
+        assert [t.__name__ for t in multiplexed].count("order_book_dispatch_loop") == 3
+        assert len(multiplexed) == 6
+        assert len(per_symbol) == 10
+        assert {t.__name__ for t in per_symbol} == {order_book_loop.__name__, trades_loop.__name__}
+    finally:
+        for coroutine in multiplexed + per_symbol:
+            coroutine.close()
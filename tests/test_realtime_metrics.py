@@ -0,0 +1,70 @@
+# tests/test_realtime_metrics.py
+import json
+import time
+import asyncio
+import pytest
+from src.data_fetch import realtime_manager
+from src.data_fetch.order_book_state import OrderBookState
+from src.data_fetch.realtime_metrics import LatencyHistogram, RealtimeMetrics, loop_lag_probe
+
+def test_histogram_quantiles_use_bucket_bounds():
+    """Tests bucket placement, quantiles and that negative latency counts as zero."""
+    histogram = LatencyHistogram((10, 100, 1000))
+    for value in [-3, 5, 7, 50, 20_000]:
+        histogram.observe(value)
+
+    summary = histogram.summary()
+    assert summary["buckets"] == {"le_10": 3, "le_100": 1, "le_1000": 0, "inf": 1}
+    assert summary["p50"] == 10.0
+    assert summary["p90"] == 20_000  # open bucket reports the max
+    assert summary["count"] == 5
+
+def test_snapshot_reports_rates_latency_and_feature_age():
+    """Tests per-symbol counters, latency and staleness in a snapshot."""
+    # Arrange
+    metrics = RealtimeMetrics()
+    for i in range(4):
+        metrics.observe("BTC", "book", exchange_ms=1_000_000, now_ms=1_000_000 + 30 + i)
+    metrics.observe("ETH", "trades", exchange_ms=None, now_ms=1_000_000)
+
+    # Act
+    snapshot = metrics.snapshot({"BTC": {"order_book_imbalance": 995.0}}, now=1_000.5)
+
+    # Assert
+    btc = snapshot["symbols"]["BTC"]
+    assert btc["book"]["messages"] == 4
+    assert btc["book"]["messages_per_second"] > 0
+    assert btc["book"]["latency_ms"]["p50"] == 50.0
+    assert btc["feature_age_seconds"] == {"order_book_imbalance": 5.5}
+    assert snapshot["symbols"]["ETH"]["trades"]["latency_ms"]["count"] == 0
+
+    # Rates cover only the time since the previous snapshot
+    assert metrics.snapshot()["symbols"]["BTC"]["book"]["messages_per_second"] == 0
+
+@pytest.mark.asyncio
+async def test_loop_lag_probe_sees_blocking_work():
+    """Tests that blocking the event loop shows up as loop lag."""
+    metrics = RealtimeMetrics()
+    probe = asyncio.create_task(loop_lag_probe(metrics, interval=0.01))
+    await asyncio.sleep(0.02)
+    time.sleep(0.1)  # block the loop
+    await asyncio.sleep(0.02)
+    probe.cancel()
+
+    assert metrics.loop_lag.max >= 50
+
+def test_handlers_feed_metrics_and_file_is_written(tmp_path, monkeypatch):
+    """Tests that the realtime handlers record messages and the metrics file is valid JSON."""
+    metrics = RealtimeMetrics()
+    monkeypatch.setattr(realtime_manager, "metrics", metrics)
+    monkeypatch.setattr(realtime_manager, "realtime_features", {})
+    monkeypatch.setattr(realtime_manager, "feature_bus", None)
+
+    realtime_manager.handle_order_book("BTC", OrderBookState(),
+                                       {'bids': [[100.0, 1.0]], 'asks': [[101.0, 1.0]], 'timestamp': None})
+    path = tmp_path / "metrics.json"
+    metrics.write(str(path))
+
+    written = json.loads(path.read_text())
+    assert written["symbols"]["BTC"]["book"]["messages"] == 1
+    assert "loop_lag_ms" in written
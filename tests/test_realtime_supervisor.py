@@ -0,0 +1,89 @@
+# tests/test_realtime_supervisor.py
+import time
+import asyncio
+from src.data_fetch import realtime_supervisor
+from src.data_fetch.realtime_supervisor import RealtimeSupervisor, shard_symbols
+from src.data_fetch.feature_bus import FeatureBusReader, FeatureBusWriter
+from src.data_fetch.realtime_manager import REALTIME_FEATURE_NAMES
+
+def crashing_shard(symbols, mode, bus_symbols, record, metrics_path, bus_path):
+    raise SystemExit(1)
+
+def publishing_shard(symbols, mode, bus_symbols, record, metrics_path, bus_path):
+    writer = FeatureBusWriter(bus_symbols, REALTIME_FEATURE_NAMES, path=bus_path)
+    for symbol in symbols:
+        writer.publish(symbol, {"order_book_imbalance": float(len(symbol))})
+    writer.close()
+
+def test_shard_symbols_covers_every_symbol_once():
+    """Tests that sharding splits symbols into disjoint, balanced groups."""
+    symbols = [f"C{i}" for i in range(10)]
+    shards = shard_symbols(symbols, 3)
+    assert len(shards) == 3
+    assert sorted(s for shard in shards for s in shard) == sorted(symbols)
+    assert max(map(len, shards)) - min(map(len, shards)) <= 1
+    assert shard_symbols(["BTC"], 8) == [["BTC"]]
+
+def test_shards_publish_into_one_bus(tmp_path):
+    """Tests that every worker writes its own rows of the shared bus."""
+    # Arrange
+    path = str(tmp_path / "features.bus")
+    symbols = ["BTC", "ETH", "SOL", "DOGE"]
+    supervisor = RealtimeSupervisor(symbols, shards=2, bus_path=path, target=publishing_shard)
+
+    # Act
+    supervisor.start()
+    for shard in supervisor.shards:
+        shard.process.join(10)
+
+    # Assert
+    snapshot = FeatureBusReader(path=path).snapshot()
+    assert {s: v["order_book_imbalance"] for s, v in snapshot.items()} == {s: len(s) for s in symbols}
+
+def test_crashed_shard_is_restarted_with_backoff(tmp_path, monkeypatch):
+    """Tests that an exited worker is restarted, and later restarts wait longer."""
+    monkeypatch.setattr(realtime_supervisor, "RESTART_BACKOFF_SECONDS", 0.2)
+    supervisor = RealtimeSupervisor(["BTC"], shards=1, bus_path=str(tmp_path / "features.bus"),
+                                    target=crashing_shard)
+    shard = supervisor.shards[0]
+    supervisor.start()
+
+    shard.process.join(10)
+    supervisor.check()  # schedules the first restart
+    assert shard.restarts == 0
+    time.sleep(0.25)
+    supervisor.check()
+    assert shard.restarts == 1
+
+    shard.process.join(10)
+    supervisor.check()
+    assert shard.restart_at - time.monotonic() > 0.25  # second crash doubles the delay
+    supervisor.stop()
+
+def test_terminated_shard_runs_its_cleanup(tmp_path, monkeypatch):
+    """Tests that stopping the supervisor cancels each worker's main so its finally block runs."""
+    # Arrange: a stand-in for realtime_manager.main that marks its cleanup
+    marker = tmp_path / "closed"
+    started = tmp_path / "started"
+
+    async def fake_main(symbols, mode, bus_symbols=None, record=False, metrics_path=None, bus_path=None):
+        try:
+            started.write_text(bus_path)
+            await asyncio.sleep(60)
+        finally:
+            marker.write_text("closed")
+
+    monkeypatch.setattr(realtime_supervisor.realtime_manager, "main", fake_main)
+    supervisor = RealtimeSupervisor(["BTC"], shards=1, bus_path=str(tmp_path / "features.bus"))
+    supervisor.start()
+    deadline = time.monotonic() + 10
+    while not started.exists() and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    # Act
+    supervisor.stop()
+
+    # Assert
+    assert started.read_text() == str(tmp_path / "features.bus")
+    assert marker.read_text() == "closed"
+    assert supervisor.shards[0].process.exitcode == 0
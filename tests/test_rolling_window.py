@@ -0,0 +1,69 @@
+# tests/test_rolling_window.py
+import math
+import random
+import pytest
+from src.data_fetch.rolling_window import RollingTakerVolume
+
+def test_sums_match_rescan_for_every_window():
+    """Tests that running sums equal a full rescan of trades inside each window."""
+    rng = random.Random(3)
+    windows = (10, 60, 300)
+    volume = RollingTakerVolume(windows)
+    trades, ts = [], 1_700_000_000_000
+
+    for _ in range(3000):
+        ts += rng.randint(0, 400)
+        trade = (ts, rng.choice(["buy", "sell"]), rng.uniform(1, 1000))
+        trades.append(trade)
+        volume.add(*trade)
+
+    for window in windows:
+        inside = [t for t in trades if t[0] >= ts - window * 1000]
+        assert volume.buy_volume(window) == pytest.approx(sum(c for _, s, c in inside if s == "buy"))
+        assert volume.sell_volume(window) == pytest.approx(sum(c for _, s, c in inside if s == "sell"))
+
+def test_eviction_uses_exchange_time():
+    """Tests that trades leave the window based on their own timestamps."""
+    volume = RollingTakerVolume((60,))
+    volume.add(0, "buy", 100.0)
+    volume.add(30_000, "sell", 50.0)
+    assert volume.ratio(60) == 2.0
+
+    volume.add(61_000, "sell", 50.0)
+
+    assert volume.buy_volume(60) == 0.0
+    assert volume.ratio(60) == 0.0
+
+def test_late_trade_outside_window_is_ignored_and_features_cover_all_windows():
+    volume = RollingTakerVolume((10, 60))
+    volume.add(100_000, "buy", 10.0)
+    volume.add(85_000, "buy", 5.0)  # 15s late: outside 10s, inside 60s
+
+    assert volume.buy_volume(10) == 10.0
+    assert volume.buy_volume(60) == 15.0
+    assert volume.features() == {"taker_buy_sell_ratio_10s": 10.0, "taker_buy_sell_ratio_60s": 15.0}
+
+def test_late_trade_inside_window_is_evicted_on_time():
+    """Tests that an out-of-order trade leaves the window at its own time, not with the newer trade before it."""
+    # Arrange
+    volume = RollingTakerVolume((60,))
+    volume.add(100_000, "buy", 10.0)
+    volume.add(50_000, "sell", 5.0)  # 50s late, still inside the window
+
+    # Act: past the late trade's cutoff but not the first trade's
+    volume.add(111_000, "buy", 1.0)
+
+    # Assert
+    assert volume.sell_volume(60) == 0.0
+    assert volume.buy_volume(60) == 11.0
+
+def test_vwap_follows_the_window():
+    """Tests that VWAP covers only trades inside each window and is NaN when empty."""
+    volume = RollingTakerVolume((10, 60))
+    volume.add(0, "buy", 100.0, 1.0)
+    volume.add(55_000, "sell", 600.0, 3.0)
+
+    assert volume.vwap(60) == pytest.approx(175.0)
+    assert volume.vwap(10) == pytest.approx(200.0)
+    volume.add(120_000, "buy", 0.0, 0.0)
+    assert math.isnan(volume.vwap_features()["vwap_60s"])
@@ -0,0 +1,269 @@
+# tests/test_trade_loop.py
+import pickle
+import asyncio
+import pytest
+from src import trade_loop
+from src.trade_loop import TradeLoop
+from src.core.paper_exchange import PaperExchange
+from src.data_fetch.candle_builder import Candle
+from src.data_fetch.feature_bus import FeatureBusWriter
+
+HOUR = 3_600_000
+T0 = 1_699_999_200_000  # a multiple of one hour
+
+class StubModel:
+    """A picklable model that always predicts `value` (1 buy, -1 sell, 0 hold)."""
+    def __init__(self, value):
+        self.value = value
+
+    def predict(self, features):
+        return [self.value] * len(features)
+
+class FeatureModel(StubModel):
+    """A StubModel trained on named columns, which keeps the input it was last given."""
+    def __init__(self, value, feature_names):
+        super().__init__(value)
+        self.feature_names_in_ = feature_names
+        self.seen = None
+
+    def predict(self, features):
+        self.seen = features
+        return super().predict(features)
+
+class FakeStream:
+    """Stands in for a CandleStream, yielding the given closed candles."""
+    def __init__(self, symbol, candles):
+        self.symbol = symbol
+        self._candles = list(candles)
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._candles:
+            raise StopAsyncIteration
+        return self._candles.pop(0)
+
+    async def close(self):
+        self.closed = True
+
+def hourly_candles(n: int, price: float = 100.0) -> list[list]:
+    return [[T0 + i * HOUR, price, price + 1, price - 1, price, 10.0] for i in range(n)]
+
+def save_model(models_dir, name, value):
+    models_dir.mkdir(exist_ok=True)
+    path = models_dir / name
+    path.write_bytes(pickle.dumps(value if hasattr(value, 'predict') else StubModel(value)))
+    return str(path)
+
+def make_loop(tmp_path, candles=None, **kwargs) -> TradeLoop:
+    exchange = PaperExchange(candles or {}, slippage_bps=0)
+    kwargs.setdefault("feature_bus_path", str(tmp_path / "features.bus"))
+    return TradeLoop(exchange=exchange, db_path=str(tmp_path / "trades.db"),
+                     models_dir=str(tmp_path / "models"), **kwargs)
+
+def logged_trades(loop: TradeLoop) -> list[tuple]:
+    rows = loop.db_manager.execute_query("SELECT symbol, type FROM trades ORDER BY id").fetchall()
+    return [tuple(row) for row in rows]
+
+@pytest.mark.asyncio
+async def test_pairs_are_discovered_from_models_dir(tmp_path):
+    """Tests that one pair runs per model in a traded timeframe, and other files are ignored."""
+    # Arrange
+    models = tmp_path / "models"
+    save_model(models, "BTCUSDT_1h_model.pkl", 0)
+    save_model(models, "ETHUSDT_15m_model.pkl", 0)
+    save_model(models, "SOLUSDT_1d_model.pkl", 0)  # not a traded timeframe
+    save_model(models, "btc_model.pkl", 0)  # legacy per-coin fallback, not a pair of its own
+    (models / "notes.txt").write_text("not a model")
+
+    # Act
+    loop = make_loop(tmp_path)
+
+    # Assert
+    assert set(loop.strategies) == {("BTC/USDT", "1h"), ("ETH/USDT", "15m")}
+    await loop.stop()
+
+@pytest.mark.asyncio
+async def test_explicit_pairs_without_a_model_are_skipped(tmp_path):
+    """Tests that configured pairs whose model file is missing are left out."""
+    btc = save_model(tmp_path / "elsewhere", "btc.pkl", 0)
+
+    loop = make_loop(tmp_path, pairs=[("BTC/USDT", "1h", btc), ("ETH/USDT", "1h", str(tmp_path / "missing.pkl"))])
+
+    assert list(loop.strategies) == [("BTC/USDT", "1h")]
+    await loop.stop()
+
+@pytest.mark.asyncio
+async def test_candles_are_routed_to_their_pairs_queue(tmp_path):
+    """Tests that each closed candle of a symbol's stream reaches the pair trading its timeframe."""
+    # Arrange
+    save_model(tmp_path / "models", "BTCUSDT_1h_model.pkl", 0)
+    save_model(tmp_path / "models", "BTCUSDT_15m_model.pkl", 0)
+    loop = make_loop(tmp_path)
+    stream = FakeStream("BTC/USDT", [
+        Candle("BTC/USDT", "15m", T0, 1, 1, 1, 1),
+        Candle("BTC/USDT", "15m", T0 + HOUR // 4, 1, 1, 1, 1),
+        Candle("BTC/USDT", "1h", T0, 1, 1, 1, 1),
+    ])
+
+    # Act
+    await loop.route_candles(stream)
+
+    # Assert
+    fifteen, hourly = loop.strategies[("BTC/USDT", "15m")].candles, loop.strategies[("BTC/USDT", "1h")].candles
+    assert [fifteen.get_nowait().timestamp for _ in range(fifteen.qsize())] == [T0, T0 + HOUR // 4]
+    assert hourly.get_nowait().timeframe == "1h" and hourly.empty()
+    assert stream.closed
+    await loop.stop()
+
+@pytest.mark.asyncio
+async def test_pairs_keep_their_own_positions_and_errors_stay_local(tmp_path):
+    """Tests that each pair trades on its own model and position, and one pair failing doesn't stop the others."""
+    # Arrange: BTC says buy, ETH says sell with no position, SOL has no market data at all
+    models = tmp_path / "models"
+    save_model(models, "BTCUSDT_1h_model.pkl", 1)
+    save_model(models, "ETHUSDT_1h_model.pkl", -1)
+    save_model(models, "SOLUSDT_1h_model.pkl", 1)
+    loop = make_loop(tmp_path, candles={
+        ("BTC/USDT", "1h"): hourly_candles(30, price=100.0),
+        ("ETH/USDT", "1h"): hourly_candles(30, price=10.0),
+    })
+    loop.order_executor.exchange.set_time(T0 + 30 * HOUR)
+    closed_ms = T0 + 29 * HOUR
+
+    # Act
+    await asyncio.gather(*(loop.poll_cycle(strategy, closed_ms, deadline_seconds=0)
+                           for strategy in loop.strategies.values()))
+
+    # Assert
+    positions = {symbol: strategy.in_position for (symbol, _), strategy in loop.strategies.items()}
+    assert positions == {"BTC/USDT": True, "ETH/USDT": False, "SOL/USDT": False}
+    assert loop.strategies[("BTC/USDT", "1h")].buffer.last_timestamp == closed_ms
+    assert logged_trades(loop) == [("BTC/USDT", "buy")]
+    assert [order["symbol"] for order in loop.order_executor.exchange.orders.values()] == ["BTC/USDT"]
+    await loop.stop()
+
+@pytest.mark.asyncio
+async def test_replay_steps_paper_market_time_through_each_close(tmp_path):
+    """Tests a replay over a PaperExchange, with orders filled on it and logged to the given database."""
+    # Arrange
+    save_model(tmp_path / "models", "BTCUSDT_1h_model.pkl", 1)
+    exchange = PaperExchange({("BTC/USDT", "1h"): hourly_candles(30)}, slippage_bps=0)
+    loop = TradeLoop(exchange=exchange, db_path=str(tmp_path / "replay.db"), models_dir=str(tmp_path / "models"),
+                     feature_bus_path=str(tmp_path / "features.bus"))
+
+    # Act
+    report = await loop.replay(T0 + 25 * HOUR, T0 + 28 * HOUR)
+
+    # Assert: one buy on the first close, then the position is held
+    assert loop.order_executor.exchange is exchange
+    assert report["pairs"] == 1 and report["closes"] == 3 and report["orders"] == 1
+    assert report["close_ms_max"] >= report["close_ms_p50"] >= 0
+    assert report["filled"] == 1 and report["fill_ms_max"] >= report["fill_ms_p50"]
+    order = next(iter(exchange.orders.values()))
+    assert order["info"]["market_ms"] == T0 + 25 * HOUR
+    assert order["average"] == 100.0
+    assert loop.strategies[("BTC/USDT", "1h")].buffer.last_timestamp == T0 + 26 * HOUR
+    assert logged_trades(loop) == [("BTC/USDT", "buy")]
+    assert (tmp_path / "replay.db").exists()
+    await loop.stop()
+
+@pytest.mark.asyncio
+async def test_poll_waits_for_the_closed_candle(tmp_path, monkeypatch):
+    """Tests that a candle published late is re-polled for and traded on, not decided on the bar before."""
+    # Arrange: at wake-up the exchange's latest bar is still the one before the close
+    monkeypatch.setattr(trade_loop, "POLL_RETRY_SECONDS", 0.01)
+    save_model(tmp_path / "models", "BTCUSDT_1h_model.pkl", 1)
+    loop = make_loop(tmp_path, candles={("BTC/USDT", "1h"): hourly_candles(30)})
+    exchange = loop.order_executor.exchange
+    exchange.set_time(T0 + 28 * HOUR)
+    strategy = loop.strategies[("BTC/USDT", "1h")]
+
+    async def publish_late():
+        await asyncio.sleep(0.02)
+        exchange.set_time(T0 + 30 * HOUR)
+
+    # Act
+    await asyncio.gather(loop.poll_cycle(strategy, T0 + 29 * HOUR, deadline_seconds=5), publish_late())
+
+    # Assert
+    assert strategy.buffer.last_timestamp == T0 + 29 * HOUR
+    assert strategy.in_position
+    await loop.stop()
+
+@pytest.mark.asyncio
+async def test_poll_skips_a_close_that_never_arrives(tmp_path, monkeypatch):
+    """Tests that no decision is made when the closed candle is still missing at the deadline."""
+    monkeypatch.setattr(trade_loop, "POLL_RETRY_SECONDS", 0.01)
+    save_model(tmp_path / "models", "BTCUSDT_1h_model.pkl", 1)
+    loop = make_loop(tmp_path, candles={("BTC/USDT", "1h"): hourly_candles(30)})
+    loop.order_executor.exchange.set_time(T0 + 28 * HOUR)
+    strategy = loop.strategies[("BTC/USDT", "1h")]
+
+    await loop.poll_cycle(strategy, T0 + 29 * HOUR, deadline_seconds=0.05)
+
+    assert strategy.market_data is None
+    assert not strategy.in_position
+    assert logged_trades(loop) == []
+    await loop.stop()
+
+@pytest.mark.asyncio
+async def test_live_features_from_the_bus_reach_the_model(tmp_path):
+    """Tests that a model trained on realtime features gets the bus's fresh values next to its candle columns."""
+    # Arrange
+    save_model(tmp_path / "models", "BTCUSDT_1h_model.pkl", FeatureModel(1, ["close", "order_book_imbalance"]))
+    loop = make_loop(tmp_path, candles={("BTC/USDT", "1h"): hourly_candles(30)})
+    loop.order_executor.exchange.set_time(T0 + 30 * HOUR)
+    writer = FeatureBusWriter(["BTC"], ["order_book_imbalance", "taker_buy_sell_ratio"],
+                              path=str(tmp_path / "features.bus"))
+    writer.publish("BTC", {"order_book_imbalance": 0.25, "taker_buy_sell_ratio": 1.5})
+    strategy = loop.strategies[("BTC/USDT", "1h")]
+
+    # Act
+    await loop.poll_cycle(strategy, T0 + 29 * HOUR, deadline_seconds=0)
+
+    # Assert: exactly the trained columns, in training order
+    seen = loop.models.get("BTC/USDT", "1h").seen
+    assert list(seen.columns) == ["close", "order_book_imbalance"]
+    assert seen.iloc[0].tolist() == [100.0, 0.25]
+    assert strategy.in_position
+    writer.close()
+    await loop.stop()
+
+@pytest.mark.asyncio
+async def test_missing_live_feature_holds(tmp_path):
+    """Tests that no trade is made when a feature the model was trained on isn't on the bus."""
+    save_model(tmp_path / "models", "BTCUSDT_1h_model.pkl", FeatureModel(1, ["close", "order_book_imbalance"]))
+    loop = make_loop(tmp_path, candles={("BTC/USDT", "1h"): hourly_candles(30)})
+    loop.order_executor.exchange.set_time(T0 + 30 * HOUR)
+    strategy = loop.strategies[("BTC/USDT", "1h")]
+
+    await loop.poll_cycle(strategy, T0 + 29 * HOUR, deadline_seconds=0)
+
+    assert not strategy.in_position
+    assert logged_trades(loop) == []
+    await loop.stop()
+
+@pytest.mark.asyncio
+async def test_stale_live_feature_does_not_roll_back_a_swapped_model(tmp_path):
+    """Tests that a freshly swapped-in model is kept when its input is incomplete, as that isn't the model's fault."""
+    # Arrange: a retrained model needing a bus feature is swapped in, but nothing is published yet
+    path = save_model(tmp_path / "models", "BTCUSDT_1h_model.pkl", 0)
+    loop = make_loop(tmp_path, candles={("BTC/USDT", "1h"): hourly_candles(30)})
+    loop.order_executor.exchange.set_time(T0 + 30 * HOUR)
+    key = ("BTC/USDT", "1h")
+    old = loop.models.get(*key)
+    entry = loop.models.index[key]
+    retrained = FeatureModel(1, ["close", "order_book_imbalance"])
+    loop.models.swap(key, retrained, type(entry)(path, entry.size, entry.mtime + 1))
+
+    # Act
+    await loop.poll_cycle(loop.strategies[key], T0 + 29 * HOUR, deadline_seconds=0)
+
+    # Assert
+    assert loop.models.get(*key) is retrained and loop.models.get(*key) is not old
+    assert loop.model_watcher.rollbacks == 0 and not loop.models.rejected
+    assert logged_trades(loop) == []
+    await loop.stop()
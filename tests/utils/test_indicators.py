@@ -0,0 +1,45 @@
+# tests/utils/test_indicators.py
+import numpy as np
+import pandas as pd
+from src.utils.indicators import compute_indicators, StreamingIndicators, INDICATOR_COLUMNS, MACD_SLOW, MACD_SIGNAL
+
+def random_walk(n: int, seed: int = 7) -> pd.DataFrame:
+    close = 100 + np.cumsum(np.random.default_rng(seed).normal(0, 1, n))
+    return pd.DataFrame({'timestamp': np.arange(n) * 60_000, 'open': close, 'high': close + 1,
+                         'low': close - 1, 'close': close, 'volume': 1.0})
+
+def test_streaming_matches_batch():
+    """Tests that bar-by-bar updates reproduce compute_indicators, warm-up NaNs included."""
+    # Arrange
+    df = random_walk(300)
+    state = StreamingIndicators()
+
+    # Act
+    streamed = np.array([state.update(close) for close in df['close']])
+
+    # Assert
+    np.testing.assert_allclose(streamed, compute_indicators(df)[INDICATOR_COLUMNS].to_numpy(), rtol=1e-9, atol=1e-9)
+
+def test_warm_up_lengths():
+    """Tests where each indicator first has a value."""
+    result = compute_indicators(random_walk(60))
+    assert result['rsi'].first_valid_index() == 13
+    assert result['ema'].first_valid_index() == 19
+    assert result['macd'].first_valid_index() == MACD_SLOW + MACD_SIGNAL - 2
+
+def test_rsi_matches_ta_definition():
+    """Tests RSI against ta's RSIIndicator formula, where the first bar's missing change counts as zero."""
+    close = random_walk(100)['close']
+    diff = close.diff()
+    up = diff.where(diff > 0, 0.0).ewm(alpha=1 / 14, min_periods=14, adjust=False).mean()
+    down = (-diff.where(diff < 0, 0.0)).ewm(alpha=1 / 14, min_periods=14, adjust=False).mean()
+    expected = 100 - 100 / (1 + up / down)
+
+    np.testing.assert_allclose(compute_indicators(random_walk(100))['rsi'], expected, rtol=1e-12)
+
+def test_rsi_is_100_without_losses():
+    """Tests that a series that only rises has an RSI of 100."""
+    state = StreamingIndicators()
+    rsi = [state.update(float(close))[0] for close in range(1, 30)]
+    assert rsi[-1] == 100.0
+    assert compute_indicators(pd.DataFrame({'close': range(1, 30)}))['rsi'].iloc[-1] == 100.0